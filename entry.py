@@ -1,18 +1,297 @@
-with open('data.json', 'r') as file:
-    data = json.load(file)
-
-build_id = data.get('build_id')
-project_name = data.get('project_name')
-version = data.get('version')
-author = data.get('author')
-release_date = data.get('release_date')
-post_build_int = data.get('post_build_int')
-build_ID_dot = data.get('build_ID.')
-
-print(build_id)
-print(project_name)
-print(version)
-print(author)
-print(release_date)
-print(post_build_int)
-print(build_ID_dot)
\ No newline at end of file
+import argparse
+import json
+import os
+import sys
+
+# Startup script for the swim meet manager.
+#
+#     python entry.py init                       create (or upgrade) the meet database
+#     python entry.py import entries.csv         add a whole entry list
+#     python entry.py seed entries.csv           seed heats and lanes from seed times, then add them
+#                         [--season DIR]         (missing seed times from the season's best times)
+#     python entry.py render [--pdf event]       draw the timesheets
+#     python entry.py rebuild SHEETS NEW_DB      rebuild a meet from scanned timesheets
+#     python entry.py serve                      run the results web UI
+#     python entry.py settings [--set name=value] show or change the meet settings
+#     python entry.py close                      archive the finished meet into the season
+#     python entry.py season best 50 freestyle   season queries: best, history, meets, rebuild
+#     python entry.py dump [--tag TAG]           write a debug zip of the meet
+#     python entry.py demo                       random demo meet, as the old script did
+#     python entry.py                            print the build information
+#
+# Every command takes --db (default: $SWIM_MEET_DB or Active_meet/swim_meet.db).
+# Modules are imported inside each command, so a command only loads what it
+# needs: serving never touches qrcode, PIL or pyzbar.
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, "program_File", "scripps")
+BUILD_INFO_PATH = os.path.join(BASE_DIR, "program_File", "app_resources", "build_info.json")
+DEFAULT_DB = os.environ.get("SWIM_MEET_DB", os.path.join("Active_meet", "swim_meet.db"))
+
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+def print_build_info():
+    try:
+        with open(BUILD_INFO_PATH, 'r') as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        print(f"No build information ({BUILD_INFO_PATH} not found)")
+        return
+
+    build_id = data.get('build_id')
+    project_name = data.get('project_name')
+    version = data.get('version')
+    author = data.get('author')
+    release_date = data.get('release_date')
+    post_build_int = data.get('post_build_int')
+    build_ID_dot = data.get('build_ID.')
+
+    print(build_id)
+    print(project_name)
+    print(version)
+    print(author)
+    print(release_date)
+    print(post_build_int)
+    print(build_ID_dot)
+
+
+def command_init(args) -> int:
+    from create_meet_api import initialize_database_at_path
+    initialize_database_at_path(args.db)
+    print(f"Meet database ready at {args.db}")
+    return 0
+
+def command_import(args) -> int:
+    from entry_import import EntryImportError, bulk_import_entries, read_entries_csv
+    from meet_store import get_store
+    get_store(args.db).initialize_schema()
+    try:
+        ids = bulk_import_entries(args.db, read_entries_csv(args.csv))
+    except EntryImportError as e:
+        print(f"Import failed, nothing was written: {e}")
+        return 1
+    print(f"Imported {len(ids['lanes'])} entries in {len(ids['heats'])} heats of {len(ids['events'])} events")
+    return 0
+
+def command_seed(args) -> int:
+    from entry_import import EntryImportError, read_entries_csv
+    from meet_store import get_store
+    from seeding import import_seeded_entries
+    store = get_store(args.db)
+    store.initialize_schema()
+    pool_size = args.pool_size or store.get_setting("pool_size")
+    try:
+        entries = read_entries_csv(args.csv)
+        if args.season:
+            from season_archive import season_seed_times
+            entries = season_seed_times(args.season, entries, store.get_setting("course"))
+        ids = import_seeded_entries(args.db, entries, pool_size, args.method)
+    except (EntryImportError, ValueError, FileNotFoundError) as e:
+        print(f"Seeding failed, nothing was written: {e}")
+        return 1
+    print(f"Seeded {len(ids['lanes'])} entries into {len(ids['heats'])} heats of {len(ids['events'])} events")
+    return 0
+
+def command_render(args) -> int:
+    from timesheets import render_all_timesheets, render_timesheet_pdfs
+    if args.pdf:
+        paths = render_timesheet_pdfs(args.db, pdf_scope=args.pdf, skip_empty=args.skip_empty,
+                                      qr_format=args.qr_format)
+        print(f"Wrote {len(paths)} PDF files")
+    else:
+        render_all_timesheets(args.db, workers=args.workers, incremental=not args.full, qr_format=args.qr_format)
+    return 0
+
+def command_rebuild(args) -> int:
+    from timesheet_recovery import rebuild_database_from_timesheets
+    summary = rebuild_database_from_timesheets(args.timesheet_dir, args.new_db, args.damaged_db, args.workers)
+    print(f"Rebuilt {summary['events']} events, {summary['heats']} heats and {summary['lanes']} lanes")
+    # Compact sheets only carry part of the name, so say what still needs a person to check it
+    for key, label in (("unknown_events", "events without a description"),
+                       ("approximate_names", "lanes with a truncated name from the sheet"),
+                       ("unnamed_lanes", "lanes without a swimmer name"),
+                       ("unreadable", "unreadable sheets")):
+        if summary[key]:
+            print(f"  {len(summary[key])} {label}")
+    if not args.damaged_db and summary["lanes"]:
+        print("No --damaged-db given: swimmer names and event descriptions come from the sheets only.")
+    return 0
+
+def command_serve(args) -> int:
+    import signal
+    import threading
+    from create_meet_api import start_WEB_UI
+    cleanup = start_WEB_UI(host=args.host, port=args.port, workers=args.workers, db_path=args.db)
+    stop = threading.Event()
+    # Stop the workers on Ctrl+C and on a plain kill alike
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    try:
+        stop.wait()
+    except KeyboardInterrupt:
+        pass
+    cleanup()
+    return 0
+
+def command_settings(args) -> int:
+    from create_meet_api import import_legacy_metadata
+    from meet_store import get_store
+    store = get_store(args.db)
+    store.initialize_schema()
+    try:
+        if args.import_legacy:
+            import_legacy_metadata(args.db, args.import_legacy)
+        settings = {}
+        for assignment in args.set:
+            name, _, value = assignment.partition("=")
+            try:
+                # Numbers, lists and null as JSON, anything else as plain text
+                settings[name.strip()] = json.loads(value)
+            except json.JSONDecodeError:
+                settings[name.strip()] = value
+        store.set_settings(settings)
+    except (OSError, ValueError) as e:
+        print(f"Settings not changed: {e}")
+        return 1
+    for name, value in store.get_settings().items():
+        print(f"{name:10} {json.dumps(value)}")
+    return 0
+
+def command_close(args) -> int:
+    from season_archive import close_meet
+    try:
+        close_meet(args.db, args.archive, args.name, args.date)
+    except (FileExistsError, ValueError) as e:
+        print(f"Meet not archived: {e}")
+        return 1
+    return 0
+
+def command_season(args) -> int:
+    import season_archive
+    try:
+        if args.season_command == "best":
+            age_group = tuple(int(age) for age in args.age.split("-")) if args.age else None
+            rows = season_archive.season_best_times(args.archive, args.distance, args.stroke, args.gender,
+                                                    age_group, args.course, args.limit)
+            for rank, (name, best_time, gender, age_min, age_max, meet, swum_on) in enumerate(rows, start=1):
+                print(f"{rank:3}. {name:28} {best_time:8.2f}  {gender} {age_min}-{age_max}  {meet} ({swum_on})")
+        elif args.season_command == "history":
+            for swum_on, meet, course, distance, stroke, total_time in \
+                    season_archive.swimmer_season_history(args.archive, args.swimmer):
+                print(f"{swum_on}  {course} {distance}m {stroke:12} {total_time:8.2f}  {meet}")
+        elif args.season_command == "meets":
+            for meet_id, file_name, name, meet_date, course, swims in season_archive.archived_meets(args.archive):
+                print(f"{meet_id:3}  {meet_date}  {name:30} {course}  {swims:6} swims  {file_name}")
+        else:
+            meets = season_archive.rebuild_season_index(args.archive)
+            print(f"Rebuilt the season index from {meets} meets")
+    except (FileNotFoundError, ValueError) as e:
+        print(e)
+        return 1
+    return 0
+
+def command_dump(args) -> int:
+    from create_meet_api import full_state_dump
+    full_state_dump(args.db, args.tag)
+    return 0
+
+def command_demo(args) -> int:
+    from create_meet_api import run_demo
+    run_demo(args.db)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Swim meet manager")
+    parser.add_argument("--version", action="store_true", help="print the build information and exit")
+    meet = argparse.ArgumentParser(add_help=False)
+    meet.add_argument("--db", default=DEFAULT_DB, help=f"meet database (default {DEFAULT_DB})")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    commands.add_parser("init", parents=[meet], help="create or upgrade the meet database").set_defaults(run=command_init)
+
+    importer = commands.add_parser("import", parents=[meet], help="import an entry list CSV")
+    importer.add_argument("csv")
+    importer.set_defaults(run=command_import)
+
+    seed = commands.add_parser("seed", parents=[meet], help="seed an entry list CSV with seed times and import it")
+    seed.add_argument("csv", help="entry list with a seed_time column instead of heat_num and lane_num")
+    seed.add_argument("--pool-size", type=int, help="lanes in the pool (default: the pool_size setting)")
+    seed.add_argument("--method", choices=("timed_finals", "circle"), default="timed_finals")
+    seed.add_argument("--season", metavar="ARCHIVE", help="fill missing seed times from this season archive")
+    seed.set_defaults(run=command_seed)
+
+    render = commands.add_parser("render", parents=[meet], help="render timesheets")
+    render.add_argument("--workers", type=int, default=1, help="render processes (0 for one per CPU)")
+    render.add_argument("--full", action="store_true", help="redraw every sheet, not just changed heats")
+    render.add_argument("--pdf", choices=("event", "meet"), help="write print-ready PDFs instead of PNGs")
+    render.add_argument("--skip-empty", action="store_true", help="leave empty lanes out of the PDFs")
+    render.add_argument("--qr-format", choices=("legacy", "compact"),
+                        help="QR payload on the sheets (default: the meet's qr_format setting, legacy JSON "
+                             "unless set); compact sheets need a scanner that reads the SM1 format")
+    render.set_defaults(run=command_render)
+
+    rebuild = commands.add_parser("rebuild", help="rebuild a meet database from timesheet images")
+    rebuild.add_argument("timesheet_dir")
+    rebuild.add_argument("new_db")
+    rebuild.add_argument("--damaged-db", help="salvage event descriptions and full swimmer names from this database; "
+                                               "without it compact sheets give upper-case names cut to 12 characters")
+    rebuild.add_argument("--workers", type=int, help="decoding processes (default one per CPU)")
+    rebuild.set_defaults(run=command_rebuild)
+
+    serve = commands.add_parser("serve", parents=[meet], help="serve the results web UI")
+    serve.add_argument("--host")
+    serve.add_argument("--port", type=int)
+    serve.add_argument("--workers", type=int)
+    serve.set_defaults(run=command_serve)
+
+    settings = commands.add_parser("settings", parents=[meet], help="show or change the meet settings")
+    settings.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                          help="e.g. meet_name=\"Summer Invitational\", pool_size=6 or dual_meet='[\"A\", \"B\"]'")
+    settings.add_argument("--import-legacy", metavar="JSON", help="import a meta_data.json from older versions first")
+    settings.set_defaults(run=command_settings)
+
+    archive = argparse.ArgumentParser(add_help=False)
+    archive.add_argument("--archive", default="Season_archive", help="season archive directory (default Season_archive)")
+
+    close = commands.add_parser("close", parents=[meet, archive], help="archive the finished meet into the season")
+    close.add_argument("--name", help="meet name (default: the meet_name setting)")
+    close.add_argument("--date", help="meet date, YYYY-MM-DD (default: the meet_date setting, else today)")
+    close.set_defaults(run=command_close)
+
+    season = commands.add_parser("season", help="query the season archive")
+    season_commands = season.add_subparsers(dest="season_command", metavar="query", required=True)
+    best = season_commands.add_parser("best", parents=[archive], help="fastest swimmers of the season in an event")
+    best.add_argument("distance", type=int)
+    best.add_argument("stroke")
+    best.add_argument("--gender", choices=("Boys", "Girls"))
+    best.add_argument("--age", help="age group, e.g. 9-10")
+    best.add_argument("--course", default="SCM", choices=("SCY", "SCM", "LCM"))
+    best.add_argument("--limit", type=int, default=25)
+    history = season_commands.add_parser("history", parents=[archive], help="every archived swim of a swimmer")
+    history.add_argument("swimmer")
+    season_commands.add_parser("meets", parents=[archive], help="list the archived meets")
+    season_commands.add_parser("rebuild", parents=[archive], help="rebuild the season index from the meet files")
+    season.set_defaults(run=command_season)
+
+    dump = commands.add_parser("dump", parents=[meet], help="write a debug zip of the meet")
+    dump.add_argument("--tag", default="")
+    dump.set_defaults(run=command_dump)
+
+    commands.add_parser("demo", parents=[meet], help="build a random demo meet").set_defaults(run=command_demo)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    # With no command it prints the build information, as the old startup script did
+    if args.version or args.command is None:
+        print_build_info()
+        return 0
+    if getattr(args, "workers", None) == 0:
+        args.workers = None
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
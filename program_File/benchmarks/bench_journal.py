@@ -0,0 +1,168 @@
+"""
+Write-path overhead of the meet journal, and checks that replay rebuilds the
+meet exactly.
+
+Imports a meet, then plays a time desk (single lane corrections and whole
+heats) twice: once without a journal and once with one attached. Then:
+
+  - replays the journal into a fresh database and compares every table with
+    the live meet;
+  - replays to a timestamp half way through the time desk and compares with
+    a copy of the meet taken at that moment;
+  - takes checkpoints until compaction kicks in and checks that replay still
+    works from what is left.
+
+Run:  python3 program_File/benchmarks/bench_journal.py [num_events] [heat_writes]
+"""
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_journal import MeetJournal, read_records, replay_journal
+from meet_store import MeetStore, get_store
+
+TABLES = {
+    "events": "SELECT * FROM events ORDER BY id",
+    "swimmers": "SELECT * FROM swimmers ORDER BY id",
+    "heats": "SELECT * FROM heats ORDER BY id",
+    "lanes": "SELECT * FROM lanes ORDER BY id",
+    "event_standings": "SELECT * FROM event_standings ORDER BY event_id, position",
+    "search_index": "SELECT rowid, swimmer_name, event_name FROM search_index ORDER BY rowid",
+    "teams": "SELECT * FROM teams ORDER BY id",
+    "team_event_points": "SELECT event_id, team_id, ROUND(points, 6) FROM team_event_points ORDER BY event_id, team_id",
+    "team_scores": "SELECT team_id, ROUND(points, 6) FROM team_scores ORDER BY team_id",
+    "meet_metadata": "SELECT key, value, version FROM meet_metadata ORDER BY key",
+}
+
+
+def sample_entries(num_events: int, heats_per_event: int = 4):
+    for event in range(1, num_events + 1):
+        for heat_num in range(1, heats_per_event + 1):
+            for lane_num in range(1, 9):
+                yield {"event": event, "gender": "Boys" if event % 2 else "Girls", "age_min": 11, "age_max": 12,
+                       "distance": 100, "stroke": "freestyle", "heat_num": heat_num, "lane_num": lane_num,
+                       "swimmer_name": f"Swimmer {event}-{heat_num}-{lane_num}",
+                       "team": "Sharks" if lane_num % 2 else "Dolphins"}
+
+
+def time_desk(store: MeetStore, heat_writes: int, seed: int, midpoint=None) -> list:
+    """Enters heat_writes heats plus a lane correction every fourth heat; returns per-write latencies."""
+    rng = random.Random(seed)
+    heats = store.connection().execute("SELECT COUNT(*) FROM heats").fetchone()[0]
+    lanes = store.connection().execute("SELECT COUNT(*) FROM lanes").fetchone()[0]
+    latencies = []
+    for i in range(heat_writes):
+        if midpoint is not None and i == heat_writes // 2:
+            midpoint()
+        times = {lane: tuple(rng.randint(600, 800) / 10 for _ in range(3)) for lane in range(1, 9)}
+        start = time.perf_counter()
+        store.update_heat_times(rng.randint(1, heats), times)
+        if i % 4 == 0:
+            store.update_lane_times(rng.randint(1, lanes), rng.randint(600, 800) / 10, None, rng.randint(600, 800) / 10)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def differences(db_a: str, db_b: str) -> list:
+    a, b = sqlite3.connect(db_a), sqlite3.connect(db_b)
+    try:
+        return [table for table, sql in TABLES.items() if a.execute(sql).fetchall() != b.execute(sql).fetchall()]
+    finally:
+        a.close()
+        b.close()
+
+
+def report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    mean = sum(latencies) / len(latencies)
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{label:<22} mean {mean * 1000:6.3f} ms   p99 {p99 * 1000:6.3f} ms")
+    return mean
+
+
+def new_meet(temp_dir: str, name: str, num_events: int, journal: MeetJournal | None = None) -> MeetStore:
+    db_path = os.path.join(temp_dir, name)
+    store = get_store(db_path)
+    store.initialize_schema()
+    if journal is not None:
+        store.attach_journal(journal)
+    bulk_import_entries(db_path, sample_entries(num_events))
+    return store
+
+
+def main() -> int:
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    heat_writes = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        plain = new_meet(temp_dir, "plain.db", num_events)
+        baseline = report("without journal", time_desk(plain, heat_writes, seed=7))
+        plain.close()
+
+        journal_dir = os.path.join(temp_dir, "journal")
+        journal = MeetJournal(journal_dir, checkpoint_every=None)
+        store = new_meet(temp_dir, "journaled.db", num_events, journal)
+        marks = {}
+
+        def midpoint():
+            # Copy the meet and remember the moment, for the point-in-time check
+            journal.flush()
+            store.checkpoint()
+            shutil.copy(store.db_path, os.path.join(temp_dir, "midpoint.db"))
+            marks["time"] = time.time()
+            time.sleep(0.01)
+
+        journaled = report("with journal", time_desk(store, heat_writes, seed=7, midpoint=midpoint))
+        journal.flush()
+        print(f"journal overhead: {(journaled / baseline - 1) * 100:+.1f}% per write, "
+              f"{len(read_records(journal_dir))} records")
+
+        replayed = os.path.join(temp_dir, "replayed.db")
+        replay_journal(journal_dir, replayed)
+        diff = differences(store.db_path, replayed)
+        print("replay to latest:    " + ("identical" if not diff else f"differs in {', '.join(diff)}"))
+        failures += bool(diff)
+
+        at_midpoint = os.path.join(temp_dir, "replayed-midpoint.db")
+        replay_journal(journal_dir, at_midpoint, until_time=marks["time"])
+        diff = differences(os.path.join(temp_dir, "midpoint.db"), at_midpoint)
+        print("point-in-time replay: " + ("identical" if not diff else f"differs in {', '.join(diff)}"))
+        failures += bool(diff)
+
+        # Checkpoints with writes in between, so older segments become redundant
+        journal.keep_checkpoints = 2
+        for seed in range(4):
+            time_desk(store, 50, seed=seed)
+            journal.checkpoint()
+        time_desk(store, 50, seed=99)
+        journal.flush()
+        left = sorted(os.listdir(journal_dir))
+        print(f"after compaction:    {sum(n.startswith('checkpoint') for n in left)} checkpoints, "
+              f"{sum(n.startswith('journal') for n in left)} segments")
+        compacted = os.path.join(temp_dir, "replayed-compacted.db")
+        replay_journal(journal_dir, compacted)
+        diff = differences(store.db_path, compacted)
+        print("replay after compaction: " + ("identical" if not diff else f"differs in {', '.join(diff)}"))
+        failures += bool(diff)
+        try:
+            replay_journal(journal_dir, os.path.join(temp_dir, "too-old.db"), until_time=marks["time"])
+            print("replay before the oldest checkpoint was not refused")
+            failures += 1
+        except ValueError:
+            pass
+
+        journal.close()
+        store.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
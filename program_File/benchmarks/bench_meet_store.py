@@ -0,0 +1,152 @@
+"""
+Compares the old connect-per-call functions against MeetStore.
+
+Run from anywhere:  python3 program_File/benchmarks/bench_meet_store.py [num_events]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from meet_store import MeetStore
+
+
+# ----- the original per-call implementations, kept here only for comparison -----
+
+def legacy_create_event(db_path, gender, age_min, age_max, distance, stroke):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        INSERT INTO events (gender, age_min, age_max, distance, stroke)
+        VALUES (?, ?, ?, ?, ?)
+    """, (gender, age_min, age_max, distance, stroke))
+    conn.commit()
+    event_id = cursor.lastrowid
+    conn.close()
+    return event_id
+def legacy_add_heat(db_path, event_id, heat_num):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO heats (event_id, heat_num) VALUES (?, ?)", (event_id, heat_num))
+    conn.commit()
+    heat_id = cursor.lastrowid
+    conn.close()
+    return heat_id
+def legacy_add_swimmer_to_lane(db_path, heat_id, lane_num, swimmer_name):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    # The original wrote the name onto the lane; since schema v10 it goes through swimmers
+    name_key = " ".join(swimmer_name.split()).casefold()
+    cursor.execute("INSERT OR IGNORE INTO swimmers (name, name_key) VALUES (?, ?)", (swimmer_name, name_key))
+    cursor.execute("""
+        INSERT INTO lanes (heat_id, lane_num, swimmer_id, timer1_time, timer2_time, timer3_time, total_time)
+        VALUES (?, ?, (SELECT id FROM swimmers WHERE name_key = ?), ?, ?, ?, ?)
+    """, (heat_id, lane_num, name_key, None, None, None, None))
+    conn.commit()
+    lane_id = cursor.lastrowid
+    conn.close()
+    return lane_id
+def legacy_update_lane_times(db_path, lane_id, timer1, timer2, timer3):
+    total_time = round((timer1 + timer2 + timer3) / 3, 3)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        UPDATE lanes
+        SET timer1_time = ?, timer2_time = ?, timer3_time = ?, total_time = ?
+        WHERE id = ?
+    """, (timer1, timer2, timer3, total_time, lane_id))
+    conn.commit()
+    conn.close()
+def legacy_get_swimmers_in_heat(db_path, heat_id):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT lane_num, swimmers.name, timer1_time, timer2_time, timer3_time, total_time
+        FROM lanes JOIN swimmers ON lanes.swimmer_id = swimmers.id WHERE heat_id = ? ORDER BY lane_num
+    """, (heat_id,))
+    swimmers = cursor.fetchall()
+    conn.close()
+    return swimmers
+
+
+class LegacyApi:
+    def __init__(self, db_path):
+        self.db_path = db_path
+
+    def create_event(self, *args):
+        return legacy_create_event(self.db_path, *args)
+
+    def add_heat(self, *args):
+        return legacy_add_heat(self.db_path, *args)
+
+    def add_swimmer_to_lane(self, *args):
+        return legacy_add_swimmer_to_lane(self.db_path, *args)
+
+    def update_lane_times(self, *args):
+        return legacy_update_lane_times(self.db_path, *args)
+
+    def get_swimmers_in_heat(self, *args):
+        return legacy_get_swimmers_in_heat(self.db_path, *args)
+
+
+def run_workload(api, num_events: int, heats_per_event: int = 4) -> dict:
+    timings = {}
+
+    start = time.perf_counter()
+    heat_ids = []
+    lane_ids = []
+    for e in range(num_events):
+        event_id = api.create_event("Boys" if e % 2 else "Girls", 9, 10, 50, "freestyle")
+        for heat_num in range(1, heats_per_event + 1):
+            heat_id = api.add_heat(event_id, heat_num)
+            heat_ids.append(heat_id)
+            for lane_num in range(1, 9):
+                lane_ids.append(api.add_swimmer_to_lane(heat_id, lane_num, f"Swimmer {e}-{heat_num}-{lane_num}"))
+    timings["build"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i, lane_id in enumerate(lane_ids):
+        base = 30.0 + (i % 50) / 10
+        api.update_lane_times(lane_id, base, base + 0.1, base + 0.2)
+    timings["update_times"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for heat_id in heat_ids:
+        api.get_swimmers_in_heat(heat_id)
+    timings["read_heats"] = time.perf_counter() - start
+
+    timings["rows"] = len(lane_ids)
+    return timings
+
+
+def main():
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        setup = MeetStore(legacy_path)
+        setup.initialize_schema()
+        setup.close()
+        # The legacy path ran with the default rollback journal
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+        legacy = run_workload(LegacyApi(legacy_path), num_events)
+
+        store = MeetStore(os.path.join(temp_dir, "store.db"))
+        store.initialize_schema()
+        pooled = run_workload(store, num_events)
+        store.close()
+
+    print(f"{legacy['rows']} lanes across {num_events} events")
+    print(f"{'phase':<14}{'per-call (s)':>14}{'MeetStore (s)':>15}{'speedup':>10}")
+    for phase in ("build", "update_times", "read_heats"):
+        speedup = legacy[phase] / pooled[phase] if pooled[phase] else float("inf")
+        print(f"{phase:<14}{legacy[phase]:>14.3f}{pooled[phase]:>15.3f}{speedup:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
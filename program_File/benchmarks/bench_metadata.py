@@ -0,0 +1,165 @@
+"""
+Meet metadata in meet_metadata (see MeetStore.set_metadata) against the old
+meta_data.json that save_teams_to_json rewrote on every call.
+
+  - cost of one more write after n earlier ones, for the old JSON file and
+    for the store;
+  - two processes writing at once: entries lost from the JSON file, keys
+    lost from the store (must be none);
+  - a corrupt meta_data.json: import_legacy_metadata must refuse it and
+    leave it untouched, where the old code started over with an empty list;
+  - the results feed's poll with nothing new, and that a settings change
+    reaches settings_payload after one refresh;
+  - journal replay rebuilds the same metadata.
+
+Run:  python3 program_File/benchmarks/bench_metadata.py [writes]
+"""
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from create_meet_api import import_legacy_metadata
+from meet_journal import enable_journal, replay_journal
+from meet_store import close_all_stores, get_store
+from results_feed import ResultsFeed
+
+
+def old_save_teams_to_json(team_one, team_two, file_path):
+    # save_teams_to_json as it was before meet_metadata
+    if os.path.exists(file_path):
+        try:
+            with open(file_path, 'r') as f:
+                existing_data = json.load(f)
+                if not isinstance(existing_data, list):
+                    existing_data = [existing_data]
+        except (json.JSONDecodeError, IOError):
+            existing_data = []
+    else:
+        existing_data = []
+    existing_data.append({"team_one": team_one, "team_two": team_two})
+    with open(file_path, 'w') as f:
+        json.dump(existing_data, f, indent=4)
+
+def time_per_write(write, before: int, sample: int = 50) -> float:
+    for i in range(before):
+        write(i)
+    start = time.perf_counter()
+    for i in range(before, before + sample):
+        write(i)
+    return (time.perf_counter() - start) / sample
+
+def json_writer(path: str, name: str, count: int):
+    for i in range(count):
+        old_save_teams_to_json(f"{name} {i}", "Visitors", path)
+
+def store_writer(db_path: str, name: str, count: int):
+    store = get_store(db_path)
+    for i in range(count):
+        store.set_metadata({f"{name}.{i}": [name, i]})
+    store.close()
+
+def race(target, path: str, count: int):
+    workers = [multiprocessing.Process(target=target, args=(path, name, count)) for name in ("A", "B")]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def main() -> int:
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        print(f"{'earlier writes':>14} {'meta_data.json':>16} {'meet_metadata':>16}")
+        for before in (0, 1000, 5000):
+            json_path = os.path.join(temp_dir, f"appends-{before}.json")
+            db_path = os.path.join(temp_dir, f"appends-{before}.db")
+            store = get_store(db_path)
+            store.initialize_schema()
+            old = time_per_write(lambda i: old_save_teams_to_json(f"Team {i}", "Visitors", json_path), before)
+            new = time_per_write(lambda i: store.set_metadata({f"entry.{i}": [f"Team {i}", "Visitors"]}), before)
+            print(f"{before:>14} {old * 1000:13.3f} ms {new * 1000:13.3f} ms")
+
+        json_path = os.path.join(temp_dir, "race.json")
+        race(json_writer, json_path, writes)
+        try:
+            with open(json_path) as f:
+                kept = len(json.load(f))
+        except json.JSONDecodeError:
+            kept = 0
+        db_path = os.path.join(temp_dir, "race.db")
+        get_store(db_path).initialize_schema()
+        close_all_stores()
+        race(store_writer, db_path, writes)
+        stored = len(get_store(db_path).get_all_metadata())
+        print(f"two writers x {writes}: meta_data.json kept {kept}, meet_metadata kept {stored}")
+        if stored != 2 * writes:
+            print(f"meet_metadata lost {2 * writes - stored} writes")
+            failures += 1
+
+        corrupt = os.path.join(temp_dir, "corrupt.json")
+        with open(corrupt, "w") as f:
+            f.write('[{"team_one": "Sharks", "team_two": "Eels"}, {"team_one": "Ra')
+        with open(corrupt) as f:
+            before_text = f.read()
+        try:
+            import_legacy_metadata(db_path, corrupt)
+            print("a corrupt meta_data.json was imported")
+            failures += 1
+        except ValueError:
+            pass
+        with open(corrupt) as f:
+            if f.read() != before_text:
+                print("a corrupt meta_data.json was changed")
+                failures += 1
+
+        feed_db = os.path.join(temp_dir, "feed.db")
+        store = get_store(feed_db)
+        store.initialize_schema()
+        feed = ResultsFeed(feed_db)
+        feed.refresh()
+        runs = 2000
+        start = time.perf_counter()
+        for _ in range(runs):
+            feed.refresh()
+        print(f"results feed poll, nothing new: {(time.perf_counter() - start) / runs * 1e6:.1f} us")
+        store.set_settings({"meet_name": "Summer Invitational", "dual_meet": ["Sharks", "Eels"]})
+        feed.refresh()
+        payload = json.loads(feed.settings_payload())
+        if payload["settings"]["meet_name"] != "Summer Invitational":
+            print(f"settings_payload missed the change: {payload}")
+            failures += 1
+
+        meet_db = os.path.join(temp_dir, "journaled.db")
+        get_store(meet_db).initialize_schema()
+        journal_dir = os.path.join(temp_dir, "journal")
+        journal = enable_journal(meet_db, journal_dir)
+        store = get_store(meet_db)
+        store.set_settings({"meet_name": "Dual", "pool_size": 6, "meet_date": "2026-07-04"})
+        store.set_dual_meet("Sharks", "Eels")
+        store.set_metadata({"note": {"lifeguards": 2}})
+        journal.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            replay_journal(journal_dir, os.path.join(temp_dir, "replayed.db"))
+        replayed = get_store(os.path.join(temp_dir, "replayed.db"))
+        if replayed.get_all_metadata() != store.get_all_metadata():
+            print("journal replay gave different metadata")
+            failures += 1
+        if replayed.get_team_scores() != store.get_team_scores():
+            print("journal replay gave different teams")
+            failures += 1
+        close_all_stores()
+
+    print("metadata: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
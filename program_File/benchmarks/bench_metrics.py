@@ -0,0 +1,154 @@
+"""
+Cost of the metrics layer on a cheap API call, and checks that what it
+records adds up.
+
+  - times create_meet_api.get_event_standings bare, instrumented with
+    metrics off, and instrumented with metrics on;
+  - checks call counts, SQL statement and row counts against a traced
+    connection, and the per-sheet render histogram against the sheets drawn;
+  - checks that collect() sums another process's exported snapshot, that
+    exited processes are folded into retired.json without the totals going
+    down, and that the web UI serves it as Prometheus text and JSON;
+  - checks that large counters are exported exactly.
+
+Run:  python3 program_File/benchmarks/bench_metrics.py [calls]
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+import create_meet_api
+import meet_metrics
+from meet_store import get_store
+from synthetic_meet import build_synthetic_meet
+from timesheets import render_event_timesheets
+
+WEB_UI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web_ui")
+
+
+def per_call(function, calls: int) -> float:
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def value(data: dict, name: str, **labels):
+    for sample_name, sample_labels, sample_value in data["counters"] + data["histograms"]:
+        if sample_name == name and sample_labels == {k: str(v) if k == "status" else v for k, v in labels.items()}:
+            return sample_value
+    return None
+
+
+def main() -> int:
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        with open(os.devnull, "w") as devnull:
+            sys.stdout, stdout = devnull, sys.stdout
+            build_synthetic_meet(db_path, "small", seed=1)
+            sys.stdout = stdout
+        store = get_store(db_path)
+        event_id = store.get_all_events()[0][0]
+
+        instrumented = create_meet_api.get_event_standings
+        get_event_standings = instrumented.__wrapped__
+
+        meet_metrics.disable()
+        bare = per_call(lambda: get_event_standings(db_path, event_id), calls)
+        off = per_call(lambda: instrumented(db_path, event_id), calls)
+        meet_metrics.enable()
+        on = per_call(lambda: instrumented(db_path, event_id), calls // 4)
+        meet_metrics.disable()
+        print(f"get_event_standings bare        {bare * 1e6:7.2f} us")
+        print(f"instrumented, metrics off       {off * 1e6:7.2f} us  ({(off - bare) * 1e9:+.0f} ns)")
+        print(f"instrumented, metrics on        {on * 1e6:7.2f} us  ({(on - bare) * 1e9:+.0f} ns)")
+
+        # Counts: compare with what SQLite itself says it ran
+        meet_metrics.reset()
+        meet_metrics.enable()
+        statements = []
+        conn = store.connection()
+        rows = len(instrumented(db_path, event_id))
+        # Run it again with our own trace callback in place of the metrics one
+        conn.set_trace_callback(lambda sql: statements.append(sql) if not sql.startswith("--") else None)
+        instrumented(db_path, event_id)
+        conn.set_trace_callback(meet_metrics.count_statement)
+        data = meet_metrics.collect()
+        checks = {
+            "calls": (value(data, "swim_meet_calls_total", function="get_event_standings"), 2),
+            "rows": (value(data, "swim_meet_sql_rows_total", function="get_event_standings"), 2 * rows),
+            "statements": (value(data, "swim_meet_sql_statements_total", function="get_event_standings"),
+                           len(statements)),
+        }
+        sheets = render_event_timesheets(db_path, event_id, os.path.join(temp_dir, "sheets"))
+        histogram = value(meet_metrics.collect(), "swim_meet_timesheet_render_seconds")
+        checks["sheets"] = (sum(histogram[:-1]) if histogram else None, sheets)
+        for name, (found, expected) in checks.items():
+            if found != expected:
+                print(f"{name}: recorded {found}, expected {expected}")
+                failures += 1
+
+        # Another process exports its snapshot; collect() and the web UI add it in
+        metrics_dir = os.path.join(temp_dir, "metrics")
+        meet_metrics.enable(metrics_dir)
+        worker = (
+            "import sys; sys.path.insert(0, sys.argv[1]); import meet_metrics; meet_metrics.enable(sys.argv[2]); "
+            "meet_metrics.inc('swim_meet_calls_total', 5, function='get_event_standings'); meet_metrics.write_snapshot()"
+        )
+        subprocess.run([sys.executable, "-c", worker, sys.path[0], metrics_dir], check=True)
+        merged = value(meet_metrics.collect(), "swim_meet_calls_total", function="get_event_standings")
+        if merged != 7:
+            print(f"merged calls across processes: {merged}, expected 7")
+            failures += 1
+        # Exited workers are retired on the next export; their calls still count
+        subprocess.run([sys.executable, "-c", worker, sys.path[0], metrics_dir], check=True)
+        meet_metrics.write_snapshot()
+        merged = value(meet_metrics.collect(), "swim_meet_calls_total", function="get_event_standings")
+        left = sorted(n for n in os.listdir(metrics_dir) if n.endswith(".json"))
+        if merged != 12 or len(left) != 2:
+            print(f"after retiring exited workers: {merged} calls (expected 12), files {left}")
+            failures += 1
+
+        big = {"counters": [["swim_meet_calls_total", {}, 1234567], ["swim_meet_sql_rows_total", {}, 2.5]],
+               "histograms": [], "buckets": list(meet_metrics.LATENCY_BUCKETS)}
+        text = meet_metrics.prometheus_text(big)
+        if "swim_meet_calls_total 1234567\n" not in text or "swim_meet_sql_rows_total 2.5\n" not in text:
+            print(f"large counters are not exported exactly:\n{text}")
+            failures += 1
+
+        os.environ["SWIM_MEET_DB"] = db_path
+        sys.path.insert(0, WEB_UI_DIR)
+        import web_ui
+        client = web_ui.app.test_client()
+        client.get("/results/events.json")
+        text = client.get("/metrics").get_data(as_text=True)
+        snapshot = json.loads(client.get("/metrics.json").get_data(as_text=True))
+        if 'swim_meet_calls_total{function="get_event_standings"} 12' not in text:
+            print("/metrics is missing the merged call count")
+            failures += 1
+        if "# TYPE swim_meet_http_request_duration_seconds histogram" not in text:
+            print("/metrics is missing request latency")
+            failures += 1
+        if value(snapshot, "swim_meet_http_requests_total", endpoint="results_index", status=200) != 1:
+            print("/metrics.json is missing the request count")
+            failures += 1
+        meet_metrics.disable()
+        print("counts: " + ("ok" if not failures else f"{failures} FAILED"))
+        get_store(db_path, read_only=True).close()
+        store.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Generation and pyzbar decode time per sheet for the legacy JSON QR payload
+and the compact SM1 payload.
+
+Run:  python3 program_File/benchmarks/bench_qr_payload.py [num_sheets]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from qr_payload import decode_lane_payload, encode_lane_payload, encode_legacy_lane_payload
+from timesheets import render_lane_sheet
+
+QR_CORNER = (0, 0, 150, 148)
+
+
+def sample_lanes(num_sheets: int):
+    for i in range(num_sheets):
+        event_id = 1 + i // 40
+        heat_num = 1 + (i // 8) % 5
+        lane_num = 1 + i % 8
+        yield event_id, 1000 + i // 8, heat_num, 5000 + i, lane_num, f"Swimmer Number {i} Longname-Hyphenated"
+
+
+def time_format(qr_format: str, lanes: list, decode) -> dict:
+    start = time.perf_counter()
+    sheets = [render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, name, qr_format)
+              for event_id, heat_id, heat_num, lane_id, lane_num, name in lanes]
+    generate_time = time.perf_counter() - start
+
+    result = {"generate_ms": generate_time / len(lanes) * 1000}
+    if decode is None:
+        return result
+
+    corners = [sheet.convert("L").crop(QR_CORNER) for sheet in sheets]
+    decoded = 0
+    start = time.perf_counter()
+    for corner, lane in zip(corners, lanes):
+        for item in decode(corner):
+            if decode_lane_payload(item.data)["lane_id"] == lane[3]:
+                decoded += 1
+                break
+    result["decode_ms"] = (time.perf_counter() - start) / len(lanes) * 1000
+    result["decoded"] = decoded
+    return result
+
+
+def main():
+    num_sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    lanes = list(sample_lanes(num_sheets))
+
+    try:
+        from pyzbar.pyzbar import decode
+    except ImportError as e:
+        print(f"pyzbar unavailable ({e}); timing generation only")
+        decode = None
+
+    example = lanes[0]
+    legacy_payload = encode_legacy_lane_payload(*example[:5], example[5])
+    compact_payload = encode_lane_payload(*example[:5], example[5])
+    print(f"legacy payload:  {len(legacy_payload)} chars  {legacy_payload}")
+    print(f"compact payload: {len(compact_payload)} chars  {compact_payload}")
+
+    for qr_format in ("legacy", "compact"):
+        result = time_format(qr_format, lanes, decode)
+        line = f"{qr_format:<8} generate {result['generate_ms']:.2f} ms/sheet"
+        if "decode_ms" in result:
+            line += f", decode {result['decode_ms']:.2f} ms/sheet ({result['decoded']}/{len(lanes)} read)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
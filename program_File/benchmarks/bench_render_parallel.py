@@ -0,0 +1,90 @@
+"""
+Renders the same meet serially and on a process pool, times both and checks
+that every PNG is byte-identical.
+
+Run:  python3 program_File/benchmarks/bench_render_parallel.py [num_events] [workers]
+"""
+import filecmp
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_store import get_store
+from timesheets import render_all_timesheets
+
+
+def sample_entries(num_events: int, seed: int = 7):
+    rng = random.Random(seed)
+    for event_num in range(1, num_events + 1):
+        for heat_num in range(1, rng.randint(2, 6) + 1):
+            for lane_num in sorted(rng.sample(range(1, 9), rng.randint(3, 8))):
+                yield {
+                    "event": event_num, "gender": "Girls", "age_min": 11, "age_max": 12,
+                    "distance": 50, "stroke": "freestyle", "heat_num": heat_num,
+                    "lane_num": lane_num, "swimmer_name": f"Swimmer {event_num}-{heat_num}-{lane_num}",
+                }
+
+
+def compare_trees(left: str, right: str) -> list:
+    mismatches = []
+    for root, _, files in os.walk(left):
+        for name in files:
+            path = os.path.join(root, name)
+            other = os.path.join(right, os.path.relpath(path, left))
+            if not os.path.exists(other) or not filecmp.cmp(path, other, shallow=False):
+                mismatches.append(os.path.relpath(path, left))
+    return mismatches
+
+
+def main() -> int:
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        get_store(db_path).initialize_schema()
+        bulk_import_entries(db_path, sample_entries(num_events))
+
+        serial_root = os.path.join(temp_dir, "serial")
+        start = time.perf_counter()
+        sheets = render_all_timesheets(db_path, workers=1, output_root=serial_root)["rendered"]
+        serial_time = time.perf_counter() - start
+
+        parallel_root = os.path.join(temp_dir, "parallel")
+        start = time.perf_counter()
+        render_all_timesheets(db_path, workers=workers, output_root=parallel_root)
+        parallel_time = time.perf_counter() - start
+
+        mismatches = compare_trees(serial_root, parallel_root) + compare_trees(parallel_root, serial_root)
+
+        # Event ids with a gap (as a rebuild that keeps ids can leave): only the
+        # dropped event's sheets may go, and the last event must still be drawn
+        conn = get_store(db_path).connection()
+        dropped = sum(len(files) for _, _, files in os.walk(os.path.join(serial_root, "1")))
+        conn.execute("DELETE FROM lanes WHERE heat_id IN (SELECT id FROM heats WHERE event_id = 1)")
+        conn.execute("DELETE FROM heats WHERE event_id = 1")
+        conn.execute("DELETE FROM events WHERE id = 1")
+        gap_report = render_all_timesheets(db_path, workers=1, output_root=serial_root)
+        last_event = os.path.join(serial_root, str(num_events))
+        gap_ok = (gap_report["removed"] == dropped and gap_report["rendered"] == 0
+                  and os.path.isdir(last_event) and os.listdir(last_event))
+
+    print(f"{sheets} sheets: serial {serial_time:.2f}s, {workers} workers {parallel_time:.2f}s "
+          f"({serial_time / parallel_time:.1f}x)")
+    if mismatches:
+        print(f"{len(mismatches)} sheets differ, e.g. {mismatches[:5]}")
+        return 1
+    if not gap_ok:
+        print(f"after deleting event 1: {gap_report}, expected {dropped} removed and the rest kept")
+        return 1
+    print("serial and parallel output are byte-identical")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
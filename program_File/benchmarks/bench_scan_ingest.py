@@ -0,0 +1,160 @@
+"""
+The scan drop folder, end to end on rendered sheets:
+
+  - process_once queues every sheet once, times the decode per sheet, and
+    skips the same files on a second pass (the ledger is keyed by content);
+  - the watcher picks a sheet up again when it is re-scanned under the same
+    file name, and forgets files that have left the folder;
+  - a sheet showing two lanes is recorded as a mismatch, not half-entered;
+  - stop() returns within its timeout while a full time_entry_queue holds
+    the pipeline back, and every lane it recorded stays queued in the ledger.
+
+Run:  python3 program_File/benchmarks/bench_scan_ingest.py [num_sheets]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+try:
+    import pyzbar.pyzbar  # noqa: F401
+except ImportError as e:
+    print(f"scan ingest: skipped, decoding sheets needs pyzbar and the zbar shared library ({e})")
+    sys.exit(0)
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore, get_store
+from scan_ingest import ScanIngestService
+from timesheets import render_lane_sheet
+
+SQL_LANES = """
+    SELECT heats.event_id, heats.id, heats.heat_num, lanes.lane_num, lanes.id, swimmers.name
+    FROM lanes JOIN heats ON lanes.heat_id = heats.id JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    ORDER BY lanes.id
+"""
+SQL_LEDGER = "SELECT status, COUNT(*) FROM scanned_sheets GROUP BY status"
+
+
+def build_meet(db_path: str, num_sheets: int) -> list:
+    store = MeetStore(db_path)
+    store.initialize_schema()
+    store.close()
+    entries = [{"event": 1 + i // 16, "gender": "Girls", "age_min": 11, "age_max": 12, "distance": 50,
+                "stroke": "freestyle", "heat_num": 1 + i // 8 % 2, "lane_num": 1 + i % 8,
+                "swimmer_name": f"Scanned Swimmer {i}"} for i in range(num_sheets)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_import_entries(db_path, entries)
+    return get_store(db_path).connection().execute(SQL_LANES).fetchall()
+
+def save_sheets(lanes: list, drop_dir: str, compress_level: int = 6) -> list:
+    paths = []
+    for event_id, heat_id, heat_num, lane_num, lane_id, name in lanes:
+        path = os.path.join(drop_dir, f"scan_{lane_id:04}.png")
+        render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, name).save(path, compress_level=compress_level)
+        paths.append(path)
+    return paths
+
+def ledger(db_path: str) -> dict:
+    return dict(get_store(db_path).connection().execute(SQL_LEDGER).fetchall())
+
+
+def main() -> int:
+    num_sheets = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        drop_dir = os.path.join(temp_dir, "Scans")
+        lanes = build_meet(db_path, num_sheets)
+        service = ScanIngestService(db_path, drop_dir, time_entry_queue_size=num_sheets + 1)
+        paths = save_sheets(lanes, drop_dir)
+
+        start = time.perf_counter()
+        stats = service.process_once()
+        print(f"process_once: {(time.perf_counter() - start) / len(paths) * 1000:.1f} ms/sheet  {stats}")
+        if stats["queued"] != len(paths) or service.time_entry_queue.qsize() != len(paths):
+            print(f"expected {len(paths)} lanes queued")
+            failures += 1
+        if service.process_once()["skipped"] != len(paths):
+            print("a second pass decoded files the ledger already holds")
+            failures += 1
+
+        # The watcher: a file is ready once it is unchanged for a poll, and ready
+        # again when a new scan is saved under the same name
+        watcher = ScanIngestService(db_path, drop_dir)
+        watcher.scan_drop_folder()
+        if len(watcher.scan_drop_folder()) != len(paths) or watcher.scan_drop_folder():
+            print("settled files weren't handed over exactly once")
+            failures += 1
+        rescanned = paths[0]
+        Image.open(rescanned).convert("RGB").save(rescanned, compress_level=1)
+        stat = os.stat(rescanned)
+        os.utime(rescanned, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        watcher.scan_drop_folder()
+        if watcher.scan_drop_folder() != [rescanned]:
+            print("a sheet re-scanned under the same file name was not picked up")
+            failures += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = service.process_once()
+        if stats["duplicate"] != 1:
+            print(f"the re-scanned sheet should be a duplicate of its lane, got {stats}")
+            failures += 1
+        for path in paths[1:]:
+            os.remove(path)
+        watcher.scan_drop_folder()
+        if list(watcher._seen_files) != [rescanned]:
+            print(f"the watcher still remembers {len(watcher._seen_files) - 1} removed files")
+            failures += 1
+
+        # Two lanes' QR codes side by side in the corner of one sheet
+        first, second = (render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, name)
+                         for event_id, heat_id, heat_num, lane_num, lane_id, name in lanes[1:3])
+        double = Image.new("RGB", (2000, 400), "white")
+        double.paste(first.crop((0, 0, 150, 150)), (0, 0))
+        double.paste(second.crop((0, 0, 150, 150)), (150, 0))
+        double.save(os.path.join(drop_dir, "double.png"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = service.process_once()
+        if stats["mismatch"] != 1 or stats["queued"] != len(paths):
+            print(f"a sheet with two lanes should be a mismatch, got {stats}")
+            failures += 1
+
+        # Backpressure: nobody takes lanes off a one-slot time_entry_queue
+        stop_db = os.path.join(temp_dir, "stop.db")
+        stop_dir = os.path.join(temp_dir, "StopScans")
+        stop_lanes = build_meet(stop_db, num_sheets)
+        blocked = ScanIngestService(stop_db, stop_dir, workers=1, max_pending_files=2,
+                                    time_entry_queue_size=1, poll_interval=0.05)
+        save_sheets(stop_lanes, stop_dir)
+        with contextlib.redirect_stdout(io.StringIO()):
+            blocked.start()
+            deadline = time.monotonic() + 60
+            while blocked.stats["queued"] < 2 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            start = time.perf_counter()
+            blocked.stop(timeout=10)
+        elapsed = time.perf_counter() - start
+        recorded = ledger(stop_db).get("queued", 0)
+        print(f"stop() with a full time_entry_queue: {elapsed * 1000:.0f} ms, "
+              f"{recorded} lanes left queued in the ledger for the next start")
+        if blocked._threads or elapsed >= 10:
+            print("stop() was held up by the full queue")
+            failures += 1
+        if recorded != blocked.stats["queued"] or len(blocked.pending_time_entries()) != recorded:
+            print("lanes recorded as queued went missing from the ledger")
+            failures += 1
+
+        for path in (db_path, stop_db):
+            get_store(path).close()
+
+    print("scan ingest: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Search latency on a large meet, plus checks that the FTS5 index stays in step
+with the lanes table.
+
+Builds a meet with num_entries swimmers through bulk_import_entries (so the
+index is filled by the insert triggers), then:
+
+  - compares search() for a set of queries, across every keyset page, with
+    a brute-force word-prefix filter over every lane;
+  - adds, renames and moves lanes and checks the index follows;
+  - times random one- to four-letter prefix searches (first page) against
+    list_all_swimmers plus a Python filter.
+
+Run:  python3 program_File/benchmarks/bench_search.py [num_entries] [searches]
+"""
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore
+from results_feed import event_label
+
+FIRST_NAMES = ["Olivia", "Liam", "Emma", "Noah", "Ava", "Elijah", "Sophia", "James", "Isabella", "Lucas",
+               "Mia", "Mason", "Amelia", "Ethan", "Harper", "Zoë", "Mateo", "Chloé", "Jack", "Aria"]
+LAST_NAMES = ["Smith", "Johnson", "Nguyen", "García", "Brown", "O'Neil", "Miller", "Davis", "Martínez",
+              "Wilson", "Anderson", "Taylor", "Thomas", "Moore", "Jackson", "Martin", "Lee", "Pérez",
+              "Thompson-White", "Harris"]
+STROKES = ["freestyle", "backstroke", "breaststroke", "butterfly", "medley"]
+CHECK_QUERIES = ["ol", "smi", "z", "garcia", "o neil", "thompson wh", "girls 9", "boys 13 100", "back",
+                 "free 50", "lee emma", "martínez butter", "xyz"]
+
+
+def sample_entries(num_entries: int, rng: random.Random):
+    event = 0
+    written = 0
+    while written < num_entries:
+        event += 1
+        age_min = rng.choice([9, 11, 13, 15])
+        heats = rng.randint(3, 8)
+        gender, distance, stroke = rng.choice(["Boys", "Girls"]), rng.choice([50, 100, 200]), rng.choice(STROKES)
+        for heat_num in range(1, heats + 1):
+            for lane_num in range(1, 9):
+                if written == num_entries:
+                    return
+                written += 1
+                yield {"event": event, "gender": gender, "age_min": age_min, "age_max": age_min + 1,
+                       "distance": distance, "stroke": stroke, "heat_num": heat_num, "lane_num": lane_num,
+                       "swimmer_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"}
+
+
+def fold(text: str) -> list:
+    # Roughly what unicode61 remove_diacritics does to a word
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return re.findall(r"\w+", "".join(c for c in text if not unicodedata.combining(c)))
+
+
+def brute_force(store: MeetStore, text: str) -> list:
+    events = {row[0]: event_label(row) for row in store.get_all_events()}
+    words = fold(text)
+    hits = []
+    for lane_id, name, heat_id, event_id in store.connection().execute(
+            "SELECT lanes.id, swimmers.name, heats.id, heats.event_id FROM lanes JOIN heats ON lanes.heat_id = heats.id"
+            " JOIN swimmers ON lanes.swimmer_id = swimmers.id"):
+        tokens = fold(name) + fold(events[event_id])
+        if all(any(t.startswith(w) for t in tokens) for w in words):
+            hits.append(lane_id)
+    return sorted(hits)
+
+
+def all_pages(store: MeetStore, text: str, limit: int = 50) -> list:
+    lane_ids = []
+    after = 0
+    while after is not None:
+        rows, after = store.search(text, after, limit)
+        lane_ids += [row[0] for row in rows]
+    return lane_ids
+
+
+def check_consistency(store: MeetStore) -> int:
+    failures = 0
+    for text in CHECK_QUERIES:
+        expected = brute_force(store, text)
+        found = all_pages(store, text)
+        if found != expected:
+            print(f"search {text!r}: {len(found)} hits, expected {len(expected)}")
+            failures += 1
+
+    # Lanes added, renamed and moved after the import must be searchable straight away
+    heat_id = store.add_heat(1, 99)
+    lane_id = store.add_swimmer_to_lane(heat_id, 1, "Quentin Zyzzyva")
+    if all_pages(store, "zyzz") != [lane_id]:
+        print("new lane not found")
+        failures += 1
+    store.connection().execute("UPDATE swimmers SET name = 'Quinn Xylo', name_key = 'quinn xylo' "
+                               "WHERE id = (SELECT swimmer_id FROM lanes WHERE id = ?)", (lane_id,))
+    if all_pages(store, "zyzz") or all_pages(store, "xylo") != [lane_id]:
+        print("renamed lane not reindexed")
+        failures += 1
+    other_event = store.get_all_events()[-1]
+    store.connection().execute("UPDATE heats SET event_id = ? WHERE id = ?", (other_event[0], heat_id))
+    if lane_id not in all_pages(store, f"xylo {other_event[5]}"):
+        print("moved lane not reindexed")
+        failures += 1
+    store.connection().execute("DELETE FROM lanes WHERE id = ?", (lane_id,))
+    if all_pages(store, "xylo"):
+        print("deleted lane still found")
+        failures += 1
+
+    rows_before = store.connection().execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+    store.rebuild_search_index()
+    rows_after = store.connection().execute("SELECT COUNT(*) FROM search_index").fetchone()[0]
+    lanes = store.connection().execute("SELECT COUNT(*) FROM lanes").fetchone()[0]
+    if not rows_before == rows_after == lanes:
+        print(f"index holds {rows_before} rows ({rows_after} after rebuild) for {lanes} lanes")
+        failures += 1
+    return failures
+
+
+def percentile(latencies: list, fraction: float) -> float:
+    latencies = sorted(latencies)
+    return latencies[max(0, int(len(latencies) * fraction) - 1)]
+
+
+def main() -> int:
+    num_entries = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    searches = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    rng = random.Random(15)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        store = MeetStore(db_path)
+        store.initialize_schema()
+        start = time.perf_counter()
+        bulk_import_entries(db_path, sample_entries(num_entries, rng))
+        print(f"imported {num_entries} entries in {time.perf_counter() - start:.2f}s (index filled by triggers)")
+
+        failures = check_consistency(store)
+        print("consistency: " + ("ok" if not failures else f"{failures} FAILED"))
+
+        words = [w.lower() for w in FIRST_NAMES + LAST_NAMES + STROKES + ["boys", "girls"]]
+        queries = [rng.choice(words)[:rng.randint(1, 4)] for _ in range(searches)]
+
+        latencies = []
+        for text in queries:
+            start = time.perf_counter()
+            store.search(text)
+            latencies.append(time.perf_counter() - start)
+        print(f"search (first page of 25)    p50 {statistics.median(latencies) * 1000:6.2f} ms   "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+
+        latencies = []
+        for text in queries[:max(1, searches // 20)]:
+            start = time.perf_counter()
+            [row for row in store.list_all_swimmers() if text in row[0].lower()][:25]
+            latencies.append(time.perf_counter() - start)
+        print(f"list_all_swimmers + filter   p50 {statistics.median(latencies) * 1000:6.2f} ms   "
+              f"p99 {percentile(latencies, 0.99) * 1000:6.2f} ms")
+        store.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
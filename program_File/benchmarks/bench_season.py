@@ -0,0 +1,173 @@
+"""
+Season archive: closing meets one after another, and season queries from
+the index against opening every archived meet.
+
+  - a season of synthetic meets (different seeds, so swimmers recur with
+    new times), closed one at a time; each close is timed and the personal
+    bests checked against a fresh pass (check_season_index);
+  - rebuild_season_index over the whole season, for comparison;
+  - "best 50 free this season" and seed times for a whole entry list from
+    the index, checked against and timed with a pass over every meet file;
+    "NS" and "nt" count as no seed time, as in seeding;
+  - a meet copied into the archive by hand, in the v9 layout and without a
+    date in its file name, is indexed by the rebuild and left unchanged, and
+    a file that isn't a meet is skipped.
+
+Run:  python3 program_File/benchmarks/bench_season.py [meets] [size]
+"""
+import contextlib
+import datetime
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+import season_archive
+from meet_store import close_all_stores, get_store
+from schema_migrations import get_schema_version, migrate
+from synthetic_meet import build_synthetic_meet, plan_synthetic_meet
+
+SQL_MEET_SWIMS = """
+    SELECT swimmers.name, events.gender, events.age_min, events.age_max, events.distance,
+           events.stroke, lanes.total_time
+    FROM lanes JOIN swimmers ON swimmers.id = lanes.swimmer_id
+    JOIN heats ON heats.id = lanes.heat_id JOIN events ON events.id = heats.event_id
+    WHERE lanes.total_time IS NOT NULL
+"""
+
+
+def scan_meets(archive_dir: str) -> list:
+    """Every timed swim of the season, read from the archived meet files themselves."""
+    swims = []
+    meets_dir = os.path.join(archive_dir, season_archive.MEETS_DIR)
+    for file_name in sorted(os.listdir(meets_dir)):
+        conn = sqlite3.connect(f"file:{os.path.join(meets_dir, file_name)}?mode=ro", uri=True)
+        swims.extend(conn.execute(SQL_MEET_SWIMS).fetchall())
+        conn.close()
+    return swims
+
+def scan_best_times(archive_dir: str, distance: int, stroke: str, limit: int) -> list:
+    best = {}
+    for name, gender, age_min, age_max, swim_distance, swim_stroke, total_time in scan_meets(archive_dir):
+        if swim_distance == distance and swim_stroke == stroke:
+            key = season_archive.swimmer_key(name)
+            best[key] = min(best.get(key, total_time), total_time)
+    return sorted(best.values())[:limit]
+
+def scan_seed_times(archive_dir: str, entries: list) -> list:
+    best = {}
+    for name, _, _, _, distance, stroke, total_time in scan_meets(archive_dir):
+        key = (season_archive.swimmer_key(name), distance, stroke)
+        best[key] = min(best.get(key, total_time), total_time)
+    return [best.get((season_archive.swimmer_key(e["swimmer_name"]), e["distance"], e["stroke"]), "NT")
+            for e in entries]
+
+def build_hand_copied_meet(db_path: str):
+    """A small meet in the v9 layout (names on the lanes), with one timed swim."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn, 9)
+    event_id = conn.execute("INSERT INTO events (gender, age_min, age_max, distance, stroke) "
+                            "VALUES ('Girls', 11, 12, 50, 'freestyle')").lastrowid
+    heat_id = conn.execute("INSERT INTO heats (event_id, heat_num) VALUES (?, 1)", (event_id,)).lastrowid
+    conn.execute("INSERT INTO lanes (heat_id, lane_num, swimmer_name, total_time) VALUES (?, 4, 'Hand Copied', 31.5)",
+                 (heat_id,))
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main() -> int:
+    meets = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    size = sys.argv[2] if len(sys.argv) > 2 else "league"
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_dir = os.path.join(temp_dir, "season")
+        print(f"closing {meets} {size} meets:")
+        for number in range(meets):
+            db_path = os.path.join(temp_dir, f"meet-{number}.db")
+            with contextlib.redirect_stdout(io.StringIO()):
+                build_synthetic_meet(db_path, size, seed=number)
+                get_store(db_path).set_settings({"meet_name": f"Meet {number + 1}",
+                                                 "meet_date": f"2026-{number % 12 + 1:02}-{number // 12 + 1:02}"})
+                result, elapsed = timed(lambda: season_archive.close_meet(db_path, archive_dir))
+            wrong = season_archive.check_season_index(archive_dir)
+            print(f"  meet {number + 1:2}  {result['swims']:5} swims  close_meet {elapsed * 1000:7.1f} ms"
+                  + (f"  {len(wrong)} WRONG personal bests" if wrong else ""))
+            failures += bool(wrong)
+            get_store(db_path).close()
+
+        conn = season_archive.open_season_index(archive_dir, read_only=True)
+        before = conn.execute("SELECT * FROM personal_bests ORDER BY 1, 2, 3, 4, 5, 6, 7").fetchall()
+        conn.close()
+        _, elapsed = timed(lambda: season_archive.rebuild_season_index(archive_dir))
+        print(f"rebuild_season_index over {meets} meets: {elapsed * 1000:.1f} ms")
+        conn = season_archive.open_season_index(archive_dir, read_only=True)
+        after = conn.execute("SELECT * FROM personal_bests ORDER BY 1, 2, 3, 4, 5, 6, 7").fetchall()
+        conn.close()
+        if [row[:9] + row[10:] for row in before] != [row[:9] + row[10:] for row in after]:
+            print("the rebuilt index has different personal bests")
+            failures += 1
+
+        rows, index_time = timed(lambda: season_archive.season_best_times(archive_dir, 50, "freestyle", limit=25))
+        expected, scan_time = timed(lambda: scan_best_times(archive_dir, 50, "freestyle", 25))
+        print(f"best 50 freestyle:  index {index_time * 1000:7.2f} ms   every meet file {scan_time * 1000:7.1f} ms")
+        if [row[1] for row in rows] != expected:
+            print("season_best_times differs from a pass over the meet files")
+            failures += 1
+
+        entries, _ = plan_synthetic_meet(size, seed=meets)
+        entries = [{k: v for k, v in e.items() if k not in ("heat_num", "lane_num")} for e in entries]
+        seeded, index_time = timed(lambda: season_archive.season_seed_times(archive_dir, entries))
+        expected, scan_time = timed(lambda: scan_seed_times(archive_dir, entries))
+        found = sum(entry["seed_time"] != "NT" for entry in seeded)
+        print(f"seed times for {len(entries)} entries ({found} with a season time):  "
+              f"index {index_time * 1000:7.2f} ms   every meet file {scan_time * 1000:7.1f} ms")
+        if [entry["seed_time"] for entry in seeded] != expected:
+            print("season_seed_times differs from a pass over the meet files")
+            failures += 1
+        marked = [dict(entry, seed_time=mark) for entry, mark in zip(entries, ("NS", " nt ", ""))]
+        if [entry["seed_time"] for entry in season_archive.season_seed_times(archive_dir, marked)] != expected[:3]:
+            print("an NS or lower-case nt seed time was kept instead of the season time")
+            failures += 1
+
+        meets_dir = os.path.join(archive_dir, season_archive.MEETS_DIR)
+        hand_copied = os.path.join(meets_dir, "club champs.db")
+        build_hand_copied_meet(hand_copied)
+        today = datetime.date.today().isoformat()
+        with open(os.path.join(meets_dir, "notes.db"), "w") as f:
+            f.write("not a meet")
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            indexed = season_archive.rebuild_season_index(archive_dir)
+        archived = {row[1]: row for row in season_archive.archived_meets(archive_dir)}
+        conn = sqlite3.connect(hand_copied)
+        version = get_schema_version(conn)
+        conn.close()
+        print(f"rebuild with a hand-copied v9 meet and a stray file: {indexed} meets, "
+              f"{output.getvalue().count('skipping')} skipped")
+        if indexed != meets + 1 or "notes.db" in archived or "club champs.db" not in archived:
+            print("the hand-copied meet wasn't indexed, or the stray file was")
+            failures += 1
+        elif archived["club champs.db"][2:6:3] != ("club champs", 1) or archived["club champs.db"][3] != today:
+            # No meet_name or meet_date set and no date in the file name: the file's name and date stand in
+            print(f"the hand-copied meet was indexed as {archived['club champs.db']}")
+            failures += 1
+        if version != 9:
+            print(f"rebuilding the index upgraded the archived file to v{version}")
+            failures += 1
+        close_all_stores()
+
+    print("season: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Seeding time for a whole meet's entry list, and checks that the seeding
+follows the rules in seeding.py.
+
+  - entries come from the synthetic league meet (about 2,000), with seed
+    times drawn per swimmer and some "NT";
+  - seed_entries is timed with an empty plan cache and a warm one, for
+    timed finals and circle seeding;
+  - import_seeded_entries is timed into a fresh database;
+  - checks heats, lanes and seed order in every event, and that a bad entry
+    rolls back the whole import.
+
+Run:  python3 program_File/benchmarks/bench_seeding.py [size] [pool_size]
+"""
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+import seeding
+from entry_import import EntryImportError
+from meet_store import get_store
+from synthetic_meet import plan_synthetic_meet
+
+
+def entry_list(size: str) -> list:
+    entries, _ = plan_synthetic_meet(size, seed=1)
+    rng = random.Random(1)
+    seeded = []
+    for entry in entries:
+        entry = {k: v for k, v in entry.items() if k not in ("heat_num", "lane_num")}
+        base = entry["distance"] / 50 * 36
+        if rng.random() < 0.05:
+            entry["seed_time"] = "NT"
+        else:
+            seconds = base * rng.uniform(0.85, 1.3)
+            entry["seed_time"] = f"{int(seconds // 60)}:{seconds % 60:05.2f}" if seconds >= 60 else round(seconds, 2)
+        seeded.append(entry)
+    return seeded
+
+
+def best_of(function, runs: int = 5) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check(seeded: list, pool_size: int, method: str) -> list:
+    problems = []
+    lanes = seeding.lane_order(pool_size)
+    events = {}
+    for entry in seeded:
+        time_key = seeding.parse_seed_time(entry["seed_time"])
+        events.setdefault(entry["event"], []).append(
+            (entry["heat_num"], entry["lane_num"], float("inf") if time_key is None else time_key))
+    for event, rows in events.items():
+        heats = {}
+        for heat_num, lane_num, seed_time in rows:
+            heats.setdefault(heat_num, []).append((lane_num, seed_time))
+        sizes = [len(heats[h]) for h in sorted(heats)]
+        if sizes != seeding.heat_sizes(len(rows), pool_size):
+            problems.append(f"event {event}: heat sizes {sizes}")
+        for heat_num, heat in heats.items():
+            by_lane = dict(heat)
+            if len(by_lane) != len(heat) or set(by_lane) != set(lanes[:len(heat)]):
+                problems.append(f"event {event} heat {heat_num}: lanes {sorted(by_lane)}")
+            # Faster seeds nearer the centre
+            ordered = [by_lane[lane] for lane in lanes if lane in by_lane]
+            if ordered != sorted(ordered):
+                problems.append(f"event {event} heat {heat_num}: seed times out of lane order")
+        if method == "timed_finals":
+            # Every heat is at least as fast as the one before it
+            for heat_num in range(2, len(heats) + 1):
+                if max(t for _, t in heats[heat_num]) > min(t for _, t in heats[heat_num - 1]):
+                    problems.append(f"event {event}: heat {heat_num} has a slower seed than heat {heat_num - 1}")
+        elif len(heats) >= 3 and all(size == pool_size for size in sizes[-3:]):
+            # The three fastest seeds are in the centre lane of the last three heats, fastest last
+            centre = [dict(heats[len(heats) - i])[lanes[0]] for i in range(3)]
+            if centre != sorted(t for _, _, t in rows)[:3]:
+                problems.append(f"event {event}: centre lanes of the last heats have {centre}")
+    return problems
+
+
+def main() -> int:
+    size = sys.argv[1] if len(sys.argv) > 1 else "league"
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    entries = entry_list(size)
+    failures = 0
+    print(f"{len(entries)} entries in {len({e['event'] for e in entries})} events, {pool_size}-lane pool")
+
+    for method in seeding.SEEDING_METHODS:
+        def cold():
+            seeding.seeding_plan.cache_clear()
+            return seeding.seed_entries(entries, pool_size, method)
+        cold_time = best_of(cold)
+        warm_time = best_of(lambda: seeding.seed_entries(entries, pool_size, method))
+        print(f"seed_entries {method:<13} {cold_time * 1000:7.2f} ms  ({warm_time * 1000:.2f} ms with plans cached)")
+        for problem in check(seeding.seed_entries(entries, pool_size, method), pool_size, method)[:10]:
+            print(f"  {method}: {problem}")
+            failures += 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        get_store(db_path).initialize_schema()
+        start = time.perf_counter()
+        ids = seeding.import_seeded_entries(db_path, entries, pool_size)
+        print(f"import_seeded_entries      {(time.perf_counter() - start) * 1000:7.2f} ms  "
+              f"({len(ids['heats'])} heats, {len(ids['lanes'])} lanes)")
+
+        bad_db = os.path.join(temp_dir, "rolled_back.db")
+        get_store(bad_db).initialize_schema()
+        try:
+            seeding.import_seeded_entries(bad_db, entries[:-1] + [dict(entries[-1], gender="Mixed")], pool_size)
+            print("an invalid entry was imported")
+            failures += 1
+        except EntryImportError:
+            pass
+        get_store(bad_db).close()
+        with sqlite3.connect(bad_db) as conn:
+            if conn.execute("SELECT COUNT(*) FROM lanes").fetchone()[0]:
+                print("a failed import left lanes behind")
+                failures += 1
+        get_store(db_path).close()
+
+    print("seeding: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
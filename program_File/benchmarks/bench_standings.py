@@ -0,0 +1,219 @@
+"""
+Checks the materialized event_standings against the original JOIN queries and
+times results polling with and without it.
+
+The consistency part enters times (including ties and partial timers) through
+update_lane_times and update_heat_times, then checks that get_event_results and
+get_fastest_swimmer_in_event agree with the original queries, that places
+follow RANK() (ties share a place), that check_standings() is clean and that a
+rebuild from scratch produces the same rows. It also upgrades a schema-3
+database that already holds times.
+
+Run:  python3 program_File/benchmarks/bench_standings.py [num_events] [polls]
+"""
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore
+from schema_migrations import migrate
+
+# The queries get_event_results and get_fastest_swimmer_in_event ran before event_standings
+LEGACY_EVENT_RESULTS = """
+    SELECT swimmers.name, heats.heat_num, lanes.lane_num,
+           timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes
+    JOIN heats ON lanes.heat_id = heats.id
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE heats.event_id = ? AND total_time IS NOT NULL
+    ORDER BY total_time ASC
+"""
+LEGACY_FASTEST_SWIMMER = """
+    SELECT swimmers.name, total_time, heats.heat_num, lanes.lane_num,
+           timer1_time, timer2_time, timer3_time
+    FROM lanes
+    JOIN heats ON lanes.heat_id = heats.id
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE heats.event_id = ? AND total_time IS NOT NULL
+    ORDER BY total_time ASC
+    LIMIT 1
+"""
+
+
+def sample_entries(num_events: int, heats_per_event: int = 6):
+    for event in range(1, num_events + 1):
+        for heat_num in range(1, heats_per_event + 1):
+            for lane_num in range(1, 9):
+                yield {"event": event, "gender": "Boys" if event % 2 else "Girls", "age_min": 9, "age_max": 10,
+                       "distance": 50, "stroke": "freestyle", "heat_num": heat_num, "lane_num": lane_num,
+                       "swimmer_name": f"Swimmer {event}-{heat_num}-{lane_num}"}
+
+
+def random_timers(rng: random.Random):
+    # Whole tenths so plenty of lanes tie; now and then a watch fails
+    base = rng.randint(280, 300) / 10
+    timers = [base, base, base]
+    if rng.random() < 0.1:
+        timers[rng.randrange(3)] = None
+    return tuple(timers)
+
+
+def enter_times(store: MeetStore, rng: random.Random, num_events: int):
+    for event_id in range(1, num_events + 1):
+        heats = store.get_heats_for_event(event_id)
+        for heat_id, _, heat_num in heats[:-1]:
+            # Leave a lane or two untimed in some heats
+            lanes = {lane_num: random_timers(rng) for lane_num in range(1, 9) if rng.random() > 0.1}
+            store.update_heat_times(heat_id, lanes)
+        # The last heat goes in one lane at a time, with a correction
+        last_heat_id = heats[-1][0]
+        for lane_num in range(1, 9):
+            store.update_lane_times(store.get_lane_id_by_heat_and_lane(last_heat_id, lane_num), *random_timers(rng))
+        store.update_lane_times(store.get_lane_id_by_heat_and_lane(last_heat_id, 1), 20.0, 20.0, None)
+
+
+def check_event(store: MeetStore, event_id: int) -> list:
+    problems = []
+    conn = store.connection()
+    legacy = conn.execute(LEGACY_EVENT_RESULTS, (event_id,)).fetchall()
+    results = store.get_event_results(event_id)
+    if sorted(legacy) != sorted(results):
+        problems.append("results differ from the original query")
+    totals = [row[6] for row in results]
+    if totals != sorted(totals):
+        problems.append("results are not fastest first")
+
+    legacy_fastest = conn.execute(LEGACY_FASTEST_SWIMMER, (event_id,)).fetchone()
+    fastest = store.get_fastest_swimmer_in_event(event_id)
+    if (legacy_fastest is None) != (fastest is None) or (fastest and fastest[1] != legacy_fastest[1]):
+        problems.append(f"fastest time {fastest} != {legacy_fastest}")
+
+    for place, _, _, _, total_time in store.get_event_standings(event_id):
+        expected_place = 1 + sum(t < total_time for t in totals)
+        if place != expected_place:
+            problems.append(f"time {total_time} has place {place}, expected {expected_place}")
+            break
+    return problems
+
+
+def check_consistency(store: MeetStore, num_events: int) -> int:
+    failures = 0
+    for event_id in range(1, num_events + 1):
+        for problem in check_event(store, event_id):
+            print(f"event {event_id}: {problem}")
+            failures += 1
+
+    stale = store.check_standings()
+    if stale:
+        print(f"check_standings reports stale events: {stale}")
+        failures += 1
+
+    before = store.connection().execute("SELECT * FROM event_standings ORDER BY event_id, position").fetchall()
+    store.rebuild_standings()
+    after = store.connection().execute("SELECT * FROM event_standings ORDER BY event_id, position").fetchall()
+    if before != after:
+        print("rebuild_standings changed the incrementally maintained rows")
+        failures += 1
+
+    ties = store.connection().execute(
+        "SELECT COUNT(*) FROM (SELECT 1 FROM event_standings GROUP BY event_id, place HAVING COUNT(*) > 1)"
+    ).fetchone()[0]
+    print(f"{len(after)} timed lanes, {ties} tied places checked")
+    return failures
+
+
+def check_upgrade(temp_dir: str) -> int:
+    """A meet file from before event_standings, already holding times, comes up ranked."""
+    db_path = os.path.join(temp_dir, "old_meet.db")
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    migrate(conn, 3)
+    conn.execute("INSERT INTO events (gender, age_min, age_max, distance, stroke) VALUES ('Girls', 11, 12, 100, 'back')")
+    conn.execute("INSERT INTO heats (event_id, heat_num) VALUES (1, 1)")
+    for lane_num, total in [(1, 70.5), (2, 68.2), (3, 70.5), (4, None)]:
+        conn.execute("INSERT INTO lanes (heat_id, lane_num, swimmer_name, total_time) VALUES (1, ?, ?, ?)",
+                     (lane_num, f"Old {lane_num}", total))
+    conn.close()
+
+    store = MeetStore(db_path)
+    standings = [(place, lane_num) for place, _, _, lane_num, _ in store.get_event_standings(1)]
+    store.close()
+    if standings != [(1, 2), (2, 1), (2, 3)]:
+        print(f"upgraded meet has standings {standings}")
+        return 1
+    return 0
+
+
+def poll(store: MeetStore, sql: str | None, event_ids: list, polls: int) -> list:
+    conn = store.connection()
+    latencies = []
+    for i in range(polls):
+        event_id = event_ids[i % len(event_ids)]
+        start = time.perf_counter()
+        if sql is None:
+            store.get_event_results(event_id)
+            store.get_fastest_swimmer_in_event(event_id)
+        else:
+            conn.execute(sql, (event_id,)).fetchall()
+            conn.execute(LEGACY_FASTEST_SWIMMER, (event_id,)).fetchone()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(label: str, latencies: list):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{label:<28} mean {statistics.mean(latencies) * 1e6:7.1f} us   p99 {p99 * 1e6:7.1f} us")
+
+
+def main() -> int:
+    num_events = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    polls = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+    rng = random.Random(12)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        store = MeetStore(db_path)
+        store.initialize_schema()
+        bulk_import_entries(db_path, sample_entries(num_events))
+        enter_times(store, rng, num_events)
+
+        failures = check_consistency(store, num_events)
+        failures += check_upgrade(temp_dir)
+        print("consistency: " + ("ok" if not failures else f"{failures} FAILED"))
+
+        event_ids = [rng.randint(1, num_events) for _ in range(256)]
+        report("original JOIN + ORDER BY", poll(store, LEGACY_EVENT_RESULTS, event_ids, polls))
+        report("event_standings", poll(store, None, event_ids, polls))
+
+        # Polling while the time desk keeps writing whole heats
+        stop = threading.Event()
+        def writer():
+            writer_rng = random.Random(7)
+            while not stop.is_set():
+                heat_id = writer_rng.randint(1, num_events * 6)
+                store.update_heat_times(heat_id, {lane: random_timers(writer_rng) for lane in range(1, 9)})
+                time.sleep(0.005)
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            report("event_standings + writes", poll(store, None, event_ids, polls))
+        finally:
+            stop.set()
+            thread.join()
+        if store.check_standings():
+            print("standings went stale under concurrent writes")
+            failures += 1
+        store.close()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Startup cost of the meet API and the entry.py CLI, each in a fresh interpreter.
+
+  - import time of create_meet_api alone, and with the timesheet renderer
+    (qrcode, PIL) it used to import up front;
+  - entry.py --help, and the modules `python -X importtime` spends most of
+    `import create_meet_api` in;
+  - the serve path: `entry.py serve --port 0` on a small synthetic meet until
+    the first 200 from /results/events.json, then a clean SIGTERM shutdown.
+
+Checks that importing create_meet_api writes nothing and loads none of
+qrcode, PIL, pyzbar, timesheets or flask.
+
+Run:  python3 program_File/benchmarks/bench_startup.py [runs]
+"""
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+SCRIPPS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps")
+ENTRY = os.path.join(SCRIPPS, "..", "..", "entry.py")
+HEAVY_MODULES = ("qrcode", "PIL", "pyzbar", "timesheets", "timesheet_recovery", "flask",
+                 "meet_journal", "season_archive", "entry_import", "seeding", "synthetic_meet")
+sys.path.insert(0, SCRIPPS)
+
+from synthetic_meet import build_synthetic_meet
+
+
+def python(code: str, cwd: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-c", f"import sys; sys.path.insert(0, {SCRIPPS!r}); {code}"],
+                          cwd=cwd, capture_output=True, text=True, check=True)
+
+def median_wall(command: list, cwd: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, capture_output=True, check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+def slowest_imports(cwd: str, count: int = 5) -> list:
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c",
+                             f"import sys; sys.path.insert(0, {SCRIPPS!r}); import create_meet_api"],
+                            cwd=cwd, capture_output=True, text=True, check=True).stderr
+    modules = []
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        match = re.match(r"import time:\s+(\d+) \|\s+\d+ \|\s+(\S+)", line)
+        if match:
+            modules.append((int(match.group(1)), match.group(2)))
+    return sorted(modules, reverse=True)[:count]
+
+def time_serve(db_path: str, cwd: str) -> tuple:
+    """Seconds from launching `entry.py serve` to its first 200, and its exit code after SIGTERM."""
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, ENTRY, "serve", "--db", db_path, "--host", "127.0.0.1",
+                             "--port", "0", "--workers", "1"],
+                            cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            env=dict(os.environ, PYTHONUNBUFFERED="1"))
+    try:
+        url = None
+        for line in proc.stdout:
+            match = re.search(r"Serving on (http://\S+)", line)
+            if match:
+                url = match.group(1) + "/results/events.json"
+                break
+        if url is None:
+            raise RuntimeError("entry.py serve exited before it started serving")
+        while True:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except OSError:
+                time.sleep(0.005)
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            returncode = proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            returncode = None
+        proc.stdout.close()
+    return elapsed, returncode
+
+
+def main() -> int:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 7
+    failures = 0
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        loaded = python(f"import create_meet_api; print(' '.join(m for m in {HEAVY_MODULES!r} "
+                        "if m in sys.modules))", temp_dir).stdout.split()
+        if loaded or os.listdir(temp_dir):
+            print(f"import create_meet_api loaded {loaded} and wrote {os.listdir(temp_dir)}")
+            failures += 1
+
+        base = [sys.executable, "-c", f"import sys; sys.path.insert(0, {SCRIPPS!r}); "]
+        timings = {
+            "python (nothing imported)": median_wall([sys.executable, "-c", "pass"], temp_dir, runs),
+            "import create_meet_api": median_wall(base[:2] + [base[2] + "import create_meet_api"], temp_dir, runs),
+            "  + timesheets (old eager import)": median_wall(
+                base[:2] + [base[2] + "import create_meet_api, timesheets"], temp_dir, runs),
+            "entry.py --help": median_wall([sys.executable, ENTRY, "--help"], temp_dir, runs),
+        }
+        for name, seconds in timings.items():
+            print(f"{name:36} {seconds * 1000:7.1f} ms")
+        print("slowest modules to import (own time) for create_meet_api:")
+        for microseconds, module in slowest_imports(temp_dir):
+            print(f"  {module:32} {microseconds / 1000:7.1f} ms")
+
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        with open(os.devnull, "w") as devnull:
+            sys.stdout, stdout = devnull, sys.stdout
+            build_synthetic_meet(db_path, "small", seed=1)
+            sys.stdout = stdout
+        serve_times = []
+        for _ in range(max(1, runs // 2)):
+            elapsed, returncode = time_serve(db_path, temp_dir)
+            serve_times.append(elapsed)
+            if returncode != 0:
+                print(f"entry.py serve exited with {returncode} on SIGTERM")
+                failures += 1
+        print(f"{'entry.py serve to first 200':36} {statistics.median(serve_times) * 1000:7.1f} ms")
+    print("startup: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
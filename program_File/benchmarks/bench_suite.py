@@ -0,0 +1,331 @@
+"""
+Benchmark suite: times every public function in create_meet_api.py, timesheet
+rendering and the QR rebuild on seeded synthetic meets of several sizes, and
+writes the results as JSON so two commits can be compared.
+
+Each size is built with synthetic_meet.build_synthetic_meet (same seed, same
+meet), then every case runs until it has taken --min-time seconds or --repeat
+runs; heavy cases (rendering, rebuild, dumps) run once. Output is printed while
+it runs and written to --output:
+
+    {"meta": {"commit", "python", "sqlite", "platform", "seed", "created"},
+     "results": [{"size", "name", "runs", "min_s", "median_s", "mean_s"}, ...]}
+
+A public function with neither a case nor a SKIPPED reason fails the run, so
+new API functions get benchmarked.
+
+Run:  python3 program_File/benchmarks/bench_suite.py [--sizes small,league,championship] [--render-sizes small,league]
+      python3 program_File/benchmarks/bench_suite.py --compare old.json new.json [--threshold 1.25]
+"""
+import argparse
+import collections
+import contextlib
+import datetime
+import inspect
+import io
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SCRIPPS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps")
+sys.path.insert(0, SCRIPPS)
+
+from meet_store import get_store
+from season_archive import close_meet
+from synthetic_meet import MEET_SIZES, build_synthetic_meet
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+DEFAULT_SIZES = "small,league,championship"
+DEFAULT_RENDER_SIZES = "small,league"
+SQL_SEED_ENTRIES = """
+    SELECT events.id, gender, age_min, age_max, distance, stroke, swimmers.name, total_time
+    FROM lanes JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    JOIN heats ON lanes.heat_id = heats.id JOIN events ON heats.event_id = events.id
+"""
+SKIPPED = {
+    "start_WEB_UI": "starts server processes; see load_test_web_ui.py",
+    "enable_metrics": "would time every later case with metrics on; see bench_metrics.py",
+    "run_demo": "builds a random demo meet out of calls that are timed individually",
+}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=SCRIPPS, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def meet_context(db_path: str, repeat: int) -> dict:
+    """
+    Ids of a mid-meet event, its first heat and a lane for the cases to use.
+
+    Write cases get their own copy of the meet (write_db), so the rows they
+    add never show up in the read, render or rebuild timings, plus enough
+    empty lanes there for add_swimmer_to_lane. seed_meet gets the meet's
+    entries back as an entry list, with the swum times as seed times. The
+    season queries read a season archive holding the meet.
+    """
+    store = get_store(db_path)
+    events = store.get_all_events()
+    event_id = events[len(events) // 2][0]
+    heat_id, _, heat_num = store.get_heats_for_event(event_id)[0]
+    lane_id = store.get_lane_id_by_heat_and_lane(heat_id, 1)
+
+    write_db = os.path.join(os.path.dirname(db_path), "writes.db")
+    store.checkpoint()
+    shutil.copy(db_path, write_db)
+    write_store = get_store(write_db)
+    spare_heats = [write_store.add_heat(event_id, 100 + i) for i in range(repeat // 8 + 1)]
+    with sqlite3.connect(db_path) as conn:
+        fields = ("event", "gender", "age_min", "age_max", "distance", "stroke", "swimmer_name", "seed_time")
+        seed_entries = [dict(zip(fields, row)) for row in conn.execute(SQL_SEED_ENTRIES)]
+    conn.close()
+    archive_dir = os.path.join(os.path.dirname(db_path), "season")
+    with contextlib.redirect_stdout(io.StringIO()):
+        close_meet(db_path, archive_dir, "Bench meet", "2026-01-01")
+    swimmer_name = store.get_swimmer_name_from_lane(lane_id)
+    return {"db": db_path, "archive_dir": archive_dir, "swimmer_name": swimmer_name,
+            "swimmer_id": store.get_swimmer_id(swimmer_name), "write_db": write_db, "event_id": event_id, "heat_id": heat_id, "heat_num": heat_num,
+            "lane_id": lane_id, "heat_nums": iter(range(1000, 10 ** 9)),
+            "spare_lanes": iter([(heat, lane) for heat in spare_heats for lane in range(1, 9)]),
+            "seed_entries": seed_entries, "unseeded_entries": [dict(e, seed_time=None) for e in seed_entries]}
+
+
+def api_cases(api, ctx: dict, scratch: str) -> list:
+    """(name, call, heavy) in run order: reads, then writes, then the heavy ones."""
+    db, write_db, archive_dir = ctx["db"], ctx["write_db"], ctx["archive_dir"]
+    event_id, heat_id, lane_id = ctx["event_id"], ctx["heat_id"], ctx["lane_id"]
+    counter = iter(range(1, 10 ** 9))
+    fresh = lambda name: os.path.join(scratch, f"{name}-{next(counter)}.db")
+
+    def legacy_metadata() -> str:
+        # A meta_data.json as 50 calls of the old save_teams_to_json left it
+        path = os.path.join(scratch, f"meta_data-{next(counter)}.json")
+        with open(path, "w") as f:
+            json.dump([{"team_one": f"Legacy {i}", "team_two": f"Legacy {i + 1}"} for i in range(50)], f, indent=4)
+        return path
+    heat_times = {lane: (70.11 + lane, 70.15 + lane, 70.19 + lane) for lane in range(1, 9)}
+    return [
+        ("get_all_events", lambda: api.get_all_events(db), False),
+        ("get_event", lambda: api.get_event(db, event_id), False),
+        ("get_heats_for_event", lambda: api.get_heats_for_event(db, event_id), False),
+        ("get_swimmers_in_heat", lambda: api.get_swimmers_in_heat(db, heat_id), False),
+        ("get_heat_standings", lambda: api.get_heat_standings(db, heat_id), False),
+        ("get_fastest_swimmer_in_event", lambda: api.get_fastest_swimmer_in_event(db, event_id), False),
+        ("list_all_swimmers", lambda: api.list_all_swimmers(db), False),
+        ("list_swimmers_in_event", lambda: api.list_swimmers_in_event(db, event_id), False),
+        ("get_event_results", lambda: api.get_event_results(db, event_id), False),
+        ("get_event_standings", lambda: api.get_event_standings(db, event_id), False),
+        ("check_standings", lambda: api.check_standings(db), False),
+        ("get_changes_since", lambda: api.get_changes_since(db, 0), False),
+        ("get_team_scores", lambda: api.get_team_scores(db), False),
+        ("get_team_event_points", lambda: api.get_team_event_points(db, event_id), False),
+        ("check_team_scores", lambda: api.check_team_scores(db), False),
+        ("get_meet_settings", lambda: api.get_meet_settings(db), False),
+        ("get_meet_setting", lambda: api.get_meet_setting(db, "pool_size"), False),
+        ("get_meet_metadata", lambda: api.get_meet_metadata(db, "dual_meet"), False),
+        ("get_archived_meets", lambda: api.get_archived_meets(archive_dir), False),
+        ("get_season_best_times", lambda: api.get_season_best_times(archive_dir, 50, "freestyle"), False),
+        ("get_season_seed_times", lambda: api.get_season_seed_times(archive_dir, ctx["unseeded_entries"]), False),
+        ("get_swimmer_season_history", lambda: api.get_swimmer_season_history(archive_dir, ctx["swimmer_name"]), False),
+        ("check_season_index", lambda: api.check_season_index(archive_dir), False),
+        ("search_swimmers", lambda: api.search_swimmers(db, "em"), False),
+        ("get_lane_id_by_heat_and_lane", lambda: api.get_lane_id_by_heat_and_lane(db, heat_id, 1), False),
+        ("get_event_id_from_heat", lambda: api.get_event_id_from_heat(db, heat_id), False),
+        ("get_swimmer_name_from_lane", lambda: api.get_swimmer_name_from_lane(db, lane_id), False),
+        ("get_swimmer_id", lambda: api.get_swimmer_id(db, ctx["swimmer_name"]), False),
+        ("list_swimmers", lambda: api.list_swimmers(db), False),
+        ("get_swimmer_entries", lambda: api.get_swimmer_entries(db, ctx["swimmer_id"]), False),
+        ("get_heat_number_from_id", lambda: api.get_heat_number_from_id(db, heat_id), False),
+        ("get_number_of_heats_for_event", lambda: api.get_number_of_heats_for_event(db, event_id), False),
+        ("get_total_number_of_events", lambda: api.get_total_number_of_events(db), False),
+        ("list_all_info", lambda: api.list_all_info(db), False),
+        ("get_metrics", api.get_metrics, False),
+        ("generate_time_based_id", lambda: api.generate_time_based_id("Swimmer"), False),
+        ("random_swimmer_name", api.random_swimmer_name, False),
+        ("generate_realistic_test_entries", lambda: list(api.generate_realistic_test_entries()), False),
+        ("initialize_database_at_path", lambda: api.initialize_database_at_path(write_db), False),
+        ("create_event", lambda: api.create_event(write_db, "Girls", 11, 12, 50, "freestyle"), False),
+        ("add_heat", lambda: api.add_heat(write_db, event_id, next(ctx["heat_nums"])), False),
+        ("add_swimmer_to_lane", lambda: api.add_swimmer_to_lane(write_db, *next(ctx["spare_lanes"]), "Bench Swimmer"), False),
+        ("update_lane_times", lambda: api.update_lane_times(write_db, lane_id, 71.02, 71.05, 70.98), False),
+        ("update_heat_times", lambda: api.update_heat_times(write_db, heat_id, heat_times), False),
+        ("save_teams_to_json", lambda: api.save_teams_to_json("Bench A", "Bench B", os.path.join(scratch, "meta_data.json"), write_db), False),
+        ("set_meet_settings", lambda: api.set_meet_settings(write_db, {"meet_name": "Bench Invitational", "pool_size": 6}), False),
+        ("set_meet_metadata", lambda: api.set_meet_metadata(write_db, {"bench_note": {"run": 1}}), False),
+        ("import_legacy_metadata", lambda: api.import_legacy_metadata(write_db, legacy_metadata()), False),
+        ("rebuild_standings", lambda: api.rebuild_standings(write_db), False),
+        ("rebuild_search_index", lambda: api.rebuild_search_index(write_db), False),
+        ("add_team", lambda: api.add_team(write_db, "Bench Team"), False),
+        ("set_lane_team", lambda: api.set_lane_team(write_db, lane_id, 1), False),
+        ("set_points_table", lambda: api.set_points_table(write_db, [6, 4, 3, 2, 1]), False),
+        ("rebuild_team_scores", lambda: api.rebuild_team_scores(write_db), False),
+        ("generate_realistic_test_data", lambda: api.generate_realistic_test_data(fresh("realistic")), False),
+        ("seed_meet", lambda: api.seed_meet(fresh("seeded"), ctx["seed_entries"]), False),
+        ("close_meet", lambda: api.close_meet(db, archive_dir, "Bench meet", f"2026-02-{next(counter) % 28 + 1:02}"), True),
+        ("rebuild_season_index", lambda: api.rebuild_season_index(archive_dir), True),
+        ("full_state_dump", lambda: os.remove(api.full_state_dump(db, "bench_suite")), True),
+    ]
+
+
+def time_case(call, heavy: bool, min_time: float, repeat: int) -> list:
+    timings = []
+    while True:
+        # The API prints progress; keep it out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - start)
+        if heavy or len(timings) >= repeat or (len(timings) >= 3 and sum(timings) >= min_time):
+            return timings
+
+
+def run_size(api, size: str, seed: int, render: bool, args, results: list):
+    def record(name: str, timings: list):
+        result = {"size": size, "name": name, "runs": len(timings), "min_s": min(timings),
+                  "median_s": statistics.median(timings), "mean_s": statistics.fmean(timings)}
+        results.append(result)
+        print(f"{size:<13} {name:<40} {result['median_s'] * 1000:10.3f} ms  (min {result['min_s'] * 1000:.3f}, "
+              f"{result['runs']} runs)")
+
+    scratch = tempfile.mkdtemp(prefix=f"bench-{size}-")
+    cwd = os.getcwd()
+    # The timesheet functions write under Active_meet/ in the working directory
+    os.chdir(scratch)
+    try:
+        db = os.path.join(scratch, "swim_meet.db")
+        record("generate_synthetic_meet", time_case(lambda: api.generate_synthetic_meet(db, size, seed), True, 0, 1))
+        ctx = meet_context(db, args.repeat)
+        for name, call, heavy in api_cases(api, ctx, scratch):
+            record(name, time_case(call, heavy, args.min_time, args.repeat))
+
+        journal_db = os.path.join(scratch, "journaled.db")
+        get_store(journal_db).initialize_schema()
+        journal = [None]
+        record("enable_journal", time_case(
+            lambda: journal.__setitem__(0, api.enable_journal(journal_db, os.path.join(scratch, "journal"))), True, 0, 1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            build_synthetic_meet(journal_db, size, seed)
+        journal[0].close()
+        record("replay_journal", time_case(
+            lambda: api.replay_journal(os.path.join(scratch, "journal"), os.path.join(scratch, "replayed.db")), True, 0, 1))
+
+        if render:
+            record("rendered_a_timesheets", time_case(lambda: api.rendered_a_timesheets(db, ctx["event_id"]), True, 0, 1))
+            record("rendered_all_timesheets", time_case(
+                lambda: api.rendered_all_timesheets(db, incremental=False), True, 0, 1))
+            record("rendered_all_timesheets[incremental]", time_case(
+                lambda: api.rendered_all_timesheets(db), False, args.min_time, args.repeat))
+            record("rendered_timesheet_pdfs", time_case(lambda: api.rendered_timesheet_pdfs(db), True, 0, 1))
+            record("rebuild_database_from_timesheets", time_case(
+                lambda: api.rebuild_database_from_timesheets(os.path.join("Active_meet", "Time_sheets"),
+                                                             os.path.join(scratch, "rebuilt.db"), db), True, 0, 1))
+    finally:
+        os.chdir(cwd)
+        for path in list(sqlite_paths(scratch)):
+            get_store(path).close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def sqlite_paths(directory: str):
+    for name in os.listdir(directory):
+        if name.endswith(".db"):
+            yield os.path.join(directory, name)
+
+
+def import_api():
+    import create_meet_api
+    return create_meet_api
+
+
+def unbenchmarked(api) -> list:
+    names = {name for name, _, _ in api_cases(api, collections.defaultdict(lambda: None), "")}
+    names |= {"generate_synthetic_meet", "enable_journal", "replay_journal", "rendered_a_timesheets",
+              "rendered_all_timesheets", "rendered_timesheet_pdfs"}
+    return [
+        name for name, function in inspect.getmembers(api, inspect.isfunction)
+        if function.__module__ == api.__name__ and not name.startswith("_") and name not in names | SKIPPED.keys()
+    ]
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path) as f:
+        old = {(r["size"], r["name"]): r for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    regressions = 0
+    for result in new:
+        before = old.get((result["size"], result["name"]))
+        if before is None:
+            continue
+        # Medians of a few runs are noisy below a few microseconds; compare the faster of median and min
+        ratio = min(result["median_s"] / before["median_s"], result["min_s"] / before["min_s"])
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{result['size']:<13} {result['name']:<40} {before['median_s'] * 1000:10.3f} -> "
+              f"{result['median_s'] * 1000:10.3f} ms  x{ratio:.2f}{flag}")
+    print(f"{regressions} regressions above x{threshold:.2f}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"meet sizes to run, from {', '.join(MEET_SIZES)}")
+    parser.add_argument("--render-sizes", default=DEFAULT_RENDER_SIZES,
+                        help="sizes that also render timesheets and rebuild from them (slow)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=50, help="most runs per case")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds to spend per case")
+    parser.add_argument("--output", help="JSON results path (default results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files and exit")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    sizes = [s for s in args.sizes.split(",") if s]
+    render_sizes = {s for s in args.render_sizes.split(",") if s}
+    for size in sizes + sorted(render_sizes):
+        if size not in MEET_SIZES:
+            parser.error(f"unknown size {size!r}")
+
+    api = import_api()
+    missing = unbenchmarked(api)
+    if missing:
+        print(f"no benchmark case or SKIPPED reason for: {', '.join(missing)}")
+        return 1
+
+    commit = git_commit()
+    results = []
+    for size in sizes:
+        run_size(api, size, args.seed, size in render_sizes, args, results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({
+            "meta": {"commit": commit, "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                     "platform": platform.platform(), "seed": args.seed,
+                     "created": datetime.datetime.now().isoformat(timespec="seconds")},
+            "results": results,
+        }, f, indent=2)
+    print(f"results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Swimmers as their own table (schema v10) against a name on every lane.
+
+  - a meet file in the v9 layout, with some names re-entered in another case
+    or spacing, is upgraded by opening it; the upgrade is timed and must keep
+    every lane, time and standing, with one swimmer per swimmer_key;
+  - a swimmer's entries by id (idx_lanes_swimmer) against the old lookup by
+    name, which had to scan lanes;
+  - the plan of each, so a regression to a scan shows up here too.
+
+Run:  python3 program_File/benchmarks/bench_swimmers.py [size]
+"""
+import contextlib
+import io
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from meet_store import SQL_GET_SWIMMER_ENTRIES, MeetStore
+from schema_migrations import migrate, swimmer_key
+from synthetic_meet import plan_synthetic_meet
+
+# How a swimmer's entries were found when the name lived on the lane
+LEGACY_SWIMMER_ENTRIES = """
+    SELECT lanes.id, heats.event_id, heats.heat_num, lanes.lane_num, lanes.total_time, event_standings.place
+    FROM lanes
+    JOIN heats ON lanes.heat_id = heats.id
+    LEFT JOIN event_standings ON event_standings.lane_id = lanes.id
+    WHERE lanes.swimmer_name = ?
+    ORDER BY heats.event_id, heats.heat_num
+"""
+
+
+def build_v9_meet(db_path: str, size: str) -> list:
+    """A meet in the v9 layout where about one entry in 20 re-types the name. Returns the names as entered."""
+    entries, times = plan_synthetic_meet(size, seed=3)
+    rng = random.Random(3)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        migrate(conn, 9)
+    conn.execute("BEGIN")
+    events, heats, names = {}, {}, []
+    for entry in entries:
+        if entry["event"] not in events:
+            events[entry["event"]] = conn.execute(
+                "INSERT INTO events (gender, age_min, age_max, distance, stroke) VALUES (?, ?, ?, ?, ?)",
+                (entry["gender"], entry["age_min"], entry["age_max"], entry["distance"], entry["stroke"])).lastrowid
+        heat_key = (entry["event"], entry["heat_num"])
+        if heat_key not in heats:
+            heats[heat_key] = conn.execute("INSERT INTO heats (event_id, heat_num) VALUES (?, ?)",
+                                           (events[entry["event"]], entry["heat_num"])).lastrowid
+        name = entry["swimmer_name"]
+        if rng.random() < 0.05:
+            name = "  ".join(name.upper().split())
+        names.append(name)
+        timers = times.get(heat_key, {}).get(entry["lane_num"])
+        total = None if timers is None else round(sum(t for t in timers if t is not None)
+                                                  / sum(t is not None for t in timers), 2)
+        conn.execute("INSERT INTO lanes (heat_id, lane_num, swimmer_name, total_time) VALUES (?, ?, ?, ?)",
+                     (heats[heat_key], entry["lane_num"], name, total))
+    conn.execute("COMMIT")
+    conn.close()
+    return names
+
+def per_lookup(function, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    return (time.perf_counter() - start) / len(keys)
+
+def plan_of(conn: sqlite3.Connection, sql: str, params) -> list:
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+
+
+def main() -> int:
+    size = sys.argv[1] if len(sys.argv) > 1 else "championship"
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        names = build_v9_meet(db_path, size)
+        # An untouched v9 copy for the old lookup by name
+        legacy_path = os.path.join(temp_dir, "legacy.db")
+        shutil.copy(db_path, legacy_path)
+        legacy = sqlite3.connect(legacy_path, isolation_level=None)
+
+        start = time.perf_counter()
+        store = MeetStore(db_path)
+        store.connection()
+        print(f"upgrade of a {size} meet ({len(names)} lanes) to schema v10: "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+        conn = store.connection()
+        if conn.execute("SELECT COUNT(*) FROM lanes").fetchone()[0] != len(names):
+            print("the upgrade lost lanes")
+            failures += 1
+        keys = {swimmer_key(name) for name in names}
+        swimmers = store.list_swimmers()
+        print(f"{len(set(names))} spellings entered, {len(swimmers)} swimmers after the upgrade")
+        if len(swimmers) != len(keys):
+            print(f"expected {len(keys)} swimmers, one per swimmer_key")
+            failures += 1
+        before = [row[:4] for row in legacy.execute(
+            "SELECT id, heat_id, lane_num, total_time FROM lanes ORDER BY id")]
+        after = [row[:4] for row in conn.execute(
+            "SELECT id, heat_id, lane_num, total_time FROM lanes ORDER BY id")]
+        if before != after:
+            print("the upgrade changed lanes")
+            failures += 1
+        wrong = [lane_id for lane_id, name in legacy.execute("SELECT id, swimmer_name FROM lanes")
+                 if swimmer_key(store.get_swimmer_name_from_lane(lane_id)) != swimmer_key(name)]
+        if wrong:
+            print(f"{len(wrong)} lanes point at the wrong swimmer")
+            failures += 1
+        if store.check_standings():
+            print("standings differ after the upgrade")
+            failures += 1
+        # Results show each merged swimmer under its one name, without a rebuild
+        stale = [(event_id, name) for (event_id, *_) in store.get_all_events()
+                 for _, name, *_ in store.get_event_standings(event_id)
+                 if name != store.get_swimmer(store.get_swimmer_id(name))[1]]
+        if stale:
+            print(f"{len(stale)} results still show a spelling that was merged away, e.g. {stale[0]}")
+            failures += 1
+
+        sample = random.Random(5).sample(swimmers, min(500, len(swimmers)))
+        by_id = per_lookup(store.get_swimmer_entries, [swimmer_id for swimmer_id, _ in sample])
+        by_name_id = per_lookup(lambda name: store.get_swimmer_entries(store.get_swimmer_id(name)),
+                                [name for _, name in sample])
+        by_scan = per_lookup(lambda name: legacy.execute(LEGACY_SWIMMER_ENTRIES, (name,)).fetchall(),
+                             [name for _, name in sample])
+        print(f"a swimmer's entries:  by id {by_id * 1e6:7.1f} us   by name via swimmers {by_name_id * 1e6:7.1f} us   "
+              f"by lanes.swimmer_name {by_scan * 1e6:8.1f} us")
+        id_plan = plan_of(conn, SQL_GET_SWIMMER_ENTRIES, (1,))
+        for label, plan in (("by id", id_plan), ("by name", plan_of(legacy, LEGACY_SWIMMER_ENTRIES, ("x",)))):
+            print(f"  {label}: {'; '.join(plan)}")
+        if any(step.startswith("SCAN") for step in id_plan):
+            print("lookup by swimmer id scans lanes")
+            failures += 1
+
+        # A name typed again in another case is the same swimmer, under the first spelling
+        lane_id = store.add_swimmer_to_lane(store.add_heat(1, 999), 1, "  " + sample[0][1].swapcase() + " ")
+        if store.get_swimmer_name_from_lane(lane_id) != sample[0][1] or len(store.list_swimmers()) != len(swimmers):
+            print("re-entered name made a new swimmer")
+            failures += 1
+        store.close()
+        legacy.close()
+
+    print("swimmers: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
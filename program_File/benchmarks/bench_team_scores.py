@@ -0,0 +1,113 @@
+"""
+Cost of keeping team scores current while times come in, against scoring
+the whole meet again after every heat.
+
+  - enters every heat of a synthetic meet (untimed) the way the time desk
+    does, with team scores kept incrementally; the last heats are entered
+    again on a copy with rebuild_team_scores() after each one, i.e. with
+    the rest of the meet already scored;
+  - times the scoreboard read (get_team_scores);
+  - checks the incremental totals against a full recompute with
+    check_team_scores(), and that tied places share their points.
+
+Run:  python3 program_File/benchmarks/bench_team_scores.py [size]
+"""
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_store import get_store
+from synthetic_meet import plan_synthetic_meet
+
+RECOMPUTE_SAMPLE = 50
+
+
+def main() -> int:
+    size = sys.argv[1] if len(sys.argv) > 1 else "league"
+    failures = 0
+    entries, times = plan_synthetic_meet(size, seed=1)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        store = get_store(db_path)
+        store.initialize_schema()
+        ids = bulk_import_entries(db_path, entries)
+        store.checkpoint()
+        recompute_path = os.path.join(temp_dir, "recompute.db")
+        shutil.copy(db_path, recompute_path)
+        heats = [(ids["heats"][key], lane_times) for key, lane_times in times.items()]
+
+        incremental = []
+        for heat_id, lane_times in heats:
+            start = time.perf_counter()
+            store.update_heat_times(heat_id, lane_times)
+            incremental.append(time.perf_counter() - start)
+
+        recompute_store = get_store(recompute_path)
+        for heat_id, lane_times in heats[:-RECOMPUTE_SAMPLE]:
+            recompute_store.update_heat_times(heat_id, lane_times)
+        recompute = []
+        for heat_id, lane_times in heats[-RECOMPUTE_SAMPLE:]:
+            start = time.perf_counter()
+            recompute_store.update_heat_times(heat_id, lane_times)
+            recompute_store.rebuild_team_scores()
+            recompute.append(time.perf_counter() - start)
+
+        reads = []
+        for _ in range(2000):
+            start = time.perf_counter()
+            store.get_team_scores()
+            reads.append(time.perf_counter() - start)
+
+        print(f"{size} meet: {len(heats)} heats, {len(store.get_team_scores())} teams")
+        print(f"heat entry, scores kept incrementally     {statistics.median(incremental) * 1000:7.3f} ms per heat")
+        print(f"  last {len(recompute)} heats only                        "
+              f"{statistics.median(incremental[-len(recompute):]) * 1000:7.3f} ms per heat")
+        print(f"  with a full team score recompute        {statistics.median(recompute) * 1000:7.3f} ms per heat")
+        print(f"get_team_scores                           {statistics.median(reads) * 1e6:7.1f} us")
+        for team_id, name, points in store.get_team_scores():
+            print(f"  {name:<12} {points:8.1f}")
+
+        wrong = store.check_team_scores()
+        if wrong:
+            print(f"incremental totals differ from a recompute for teams {wrong}")
+            failures += 1
+        before = store.get_team_scores()
+        store.rebuild_team_scores()
+        if [(t, round(p, 6)) for t, _, p in before] != [(t, round(p, 6)) for t, _, p in store.get_team_scores()]:
+            print("rebuild_team_scores changed the totals")
+            failures += 1
+
+        # A dead heat for 2nd shares 2nd and 3rd place points
+        heat_id, lane_times = next((h, t) for h, t in reversed(heats) if len(t) >= 3)
+        store.set_points_table([5, 3, 1])
+        lanes = sorted(lane_times)[:3]
+        store.update_heat_times(heat_id, {lanes[0]: (1.0, 1.0, 1.0), lanes[1]: (2.0, 2.0, 2.0),
+                                          lanes[2]: (2.0, 2.0, 2.0)})
+        event_id = store.get_event_id_from_heat(heat_id)
+        places = sorted(row[0] for row in store.get_event_standings(event_id))[:3]
+        if places != [1, 2, 2]:
+            print(f"expected places 1, 2, 2 for the dead heat, got {places}")
+            failures += 1
+        total = sum(points for _, _, points in store.get_team_event_points(event_id))
+        if round(total, 6) != 9:
+            print(f"event points add up to {total}, expected 9 (5 + (3 + 1) / 2 * 2)")
+            failures += 1
+        if store.check_team_scores():
+            print("team scores inconsistent after the dead heat")
+            failures += 1
+        recompute_store.close()
+        store.close()
+
+    print("team scores: " + ("ok" if not failures else f"{failures} FAILED"))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Per-sheet cost, drawing and PNG encode, of the original timesheet renderer
+(fresh canvas, font load and three lookups per lane, RGBA PNG) against the
+current one (cached template, QR drawn from its module matrix, grayscale PNG),
+plus a check that both draw the same image and write the same pixels.
+
+Run:  python3 program_File/benchmarks/bench_timesheet_template.py [num_heats]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from PIL import ImageDraw, ImageFont, Image
+
+from entry_import import bulk_import_entries
+from meet_store import get_store
+from timesheets import generate_qr_image, get_event_layout, render_lane_sheet
+
+FONT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app_resources", "arial.ttf")
+
+
+def legacy_render_event(db_path: str, event_id: int) -> list:
+    """The original rendered_a_timesheets loop, returning images instead of saving them."""
+    store = get_store(db_path)
+    qr_size = 125
+    font = ImageFont.truetype(FONT_PATH, 30)
+    margin_left = 30
+    margin_top = 20
+    line_spacing = 50
+    sheets = []
+
+    for heat in store.get_heats_for_event(event_id):
+        heat_id = heat[0]
+        heat_num = heat[2]
+        swimmers = store.get_swimmers_in_heat(heat_id)
+
+        for lane_num in range(1, 9):
+            swimmer = next((s for s in swimmers if s[0] == lane_num), None)
+            if swimmer:
+                swimmer_name = swimmer[1]
+                lane_id = store.get_lane_id_by_heat_and_lane(heat_id, lane_num)
+            else:
+                swimmer_name = "Empty Lane"
+                lane_id = None
+
+            background = Image.new("RGBA", (1000, 400), (255, 255, 255, 255))
+            draw = ImageDraw.Draw(background)
+            if lane_id:
+                qr_code_data = json.dumps({"event_id": event_id,"heat_id": heat_id,"heat_num": heat_num,"lane_id": lane_id,"lane_num": lane_num,"swimmer_name": swimmer_name})
+                qr_img = generate_qr_image(qr_code_data).resize((qr_size, qr_size))
+                background.paste(qr_img, (15, 15), qr_img)
+
+            margin_left_2 = margin_left + qr_size
+            draw.text((margin_left_2, margin_top), f"Swimmer: {swimmer_name}", fill=(0, 0, 0), font=font)
+            draw.text((margin_left_2, margin_top + line_spacing), f"Event: {event_id} | Heat: {heat_num} | Lane: {lane_num}", fill=(0, 0, 0), font=font)
+            times_start_y = margin_top + line_spacing * 2 - 10 + 30
+            draw.text((margin_left, times_start_y), "Timer 1: ____________________", fill=(0, 0, 0), font=font)
+            draw.text((margin_left, times_start_y + line_spacing), "Timer 2: ____________________", fill=(0, 0, 0), font=font)
+            draw.text((margin_left, times_start_y + 2 * line_spacing), "Timer 3: ____________________", fill=(0, 0, 0), font=font)
+            draw.text((margin_left, times_start_y + 3 * line_spacing), "Total:   ____________________", fill=(0, 0, 0), font=font)
+            sheets.append(background)
+    return sheets
+
+
+def cached_render_event(db_path: str, event_id: int) -> list:
+    sheets = []
+    for heat_id, heat_num, lanes in get_event_layout(db_path, event_id):
+        for lane_num in range(1, 9):
+            lane_id, swimmer_name = lanes.get(lane_num, (None, "Empty Lane"))
+            sheets.append(render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, swimmer_name, "legacy"))
+    return sheets
+
+
+def png_bytes(image: Image.Image) -> bytes:
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+def png_pixels(data: bytes) -> bytes:
+    with Image.open(io.BytesIO(data)) as image:
+        return image.convert("RGBA").tobytes()
+
+
+def main() -> int:
+    num_heats = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_path = os.path.join(temp_dir, "swim_meet.db")
+        get_store(db_path).initialize_schema()
+        bulk_import_entries(db_path, (
+            {"event": 1, "gender": "Boys", "age_min": 13, "age_max": 14, "distance": 100,
+             "stroke": "butterfly", "heat_num": heat_num, "lane_num": lane_num,
+             "swimmer_name": f"Swimmer {heat_num}-{lane_num}"}
+            for heat_num in range(1, num_heats + 1)
+            for lane_num in range(1, 9 if heat_num > 1 else 4)
+        ))
+
+        start = time.perf_counter()
+        before = legacy_render_event(db_path, 1)
+        before_png = [png_bytes(sheet) for sheet in before]
+        before_time = time.perf_counter() - start
+
+        cached_render_event(db_path, 1)  # warm the template and font caches once
+        start = time.perf_counter()
+        after = cached_render_event(db_path, 1)
+        after_png = [png_bytes(sheet.convert("L")) for sheet in after]
+        after_time = time.perf_counter() - start
+
+    differing = sum(a.tobytes() != b.tobytes() for a, b in zip(before, after))
+    differing_png = sum(png_pixels(a) != png_pixels(b) for a, b in zip(before_png, after_png))
+    print(f"{len(before)} sheets")
+    print(f"before: {before_time / len(before) * 1000:.2f} ms per sheet, {sum(map(len, before_png)) // len(before)} bytes")
+    print(f"after:  {after_time / len(after) * 1000:.2f} ms per sheet, {sum(map(len, after_png)) // len(after)} bytes "
+          f"({before_time / after_time:.1f}x)")
+    if differing or differing_png or len(before) != len(after):
+        print(f"{differing} sheets drawn differently and {differing_png} PNGs with different pixels")
+        return 1
+    print("all sheets draw the same image and write the same pixels as the original renderer")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Local load test for the web UI: many keep-alive clients polling results the
+way spectators' phones do, while the time desk keeps writing heats.
+
+Each client picks an event, sends If-None-Match with the ETag it saw last for
+that event (so most answers are 304) and now and then reloads the full
+/results page. Reports requests per second, p50/p99 latency and status codes.
+
+Run:  python3 program_File/benchmarks/load_test_web_ui.py [--workers 2] [--clients 32] [--duration 10]
+      python3 program_File/benchmarks/load_test_web_ui.py --url http://host:5000   (existing server, no writes)
+"""
+import argparse
+import http.client
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from entry_import import bulk_import_entries
+from meet_store import get_store
+
+WEB_UI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "web_ui", "web_ui.py")
+PAGE_RELOAD_RATIO = 0.02
+
+
+def sample_entries(num_events: int, heats_per_event: int = 5):
+    for event in range(1, num_events + 1):
+        for heat_num in range(1, heats_per_event + 1):
+            for lane_num in range(1, 9):
+                yield {"event": event, "gender": "Boys" if event % 2 else "Girls", "age_min": 11, "age_max": 12,
+                       "distance": 100, "stroke": "freestyle", "heat_num": heat_num, "lane_num": lane_num,
+                       "swimmer_name": f"Swimmer {event}-{heat_num}-{lane_num}"}
+
+
+def start_workers(db_path: str, workers: int) -> tuple:
+    """Binds a local port and starts web_ui.py workers on it, as start_WEB_UI does."""
+    listener = socket.create_server(("127.0.0.1", 0), backlog=1024)
+    listener.set_inheritable(True)
+    env = dict(os.environ, SWIM_MEET_DB=db_path)
+    procs = [
+        subprocess.Popen([sys.executable, WEB_UI, "--host", "127.0.0.1", "--fd", str(listener.fileno())],
+                         env=env, pass_fds=(listener.fileno(),), stdout=subprocess.DEVNULL)
+        for _ in range(workers)
+    ]
+    return listener, procs
+
+
+def wait_until_up(host: str, port: int, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request("GET", "/results/events.json")
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def client(host: str, port: int, num_events: int, stop: threading.Event, seed: int,
+           latencies: list, statuses: Counter):
+    rng = random.Random(seed)
+    etags = {}
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while not stop.is_set():
+        if rng.random() < PAGE_RELOAD_RATIO:
+            path = "/results"
+        else:
+            path = f"/results/events/{rng.randint(1, num_events)}.json"
+        headers = {"Accept-Encoding": "gzip"}
+        if path in etags:
+            headers["If-None-Match"] = etags[path]
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            statuses["error"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+        statuses[response.status] += 1
+        if response.getheader("ETag"):
+            etags[path] = response.getheader("ETag")
+    conn.close()
+
+
+def time_desk(db_path: str, num_events: int, stop: threading.Event, writes_per_second: float):
+    rng = random.Random(3)
+    store = get_store(db_path)
+    heats = num_events * 5
+    while not stop.wait(1 / writes_per_second):
+        lanes = {lane: tuple(rng.randint(600, 800) / 10 for _ in range(3)) for lane in range(1, 9)}
+        store.update_heat_times(rng.randint(1, heats), lanes)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--events", type=int, default=40)
+    parser.add_argument("--writes-per-second", type=float, default=2.0)
+    args = parser.parse_args()
+
+    temp_dir = None
+    listener = None
+    procs = []
+    stop = threading.Event()
+    threads = []
+    if args.url:
+        parsed = urllib.parse.urlparse(args.url)
+        host, port = parsed.hostname, parsed.port or 80
+    else:
+        temp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(temp_dir.name, "swim_meet.db")
+        get_store(db_path).initialize_schema()
+        bulk_import_entries(db_path, sample_entries(args.events))
+        listener, procs = start_workers(db_path, args.workers)
+        host, port = listener.getsockname()
+        threads.append(threading.Thread(target=time_desk, args=(db_path, args.events, stop, args.writes_per_second)))
+
+    try:
+        wait_until_up(host, port)
+        latencies = []
+        statuses = Counter()
+        threads += [
+            threading.Thread(target=client, args=(host, port, args.events, stop, seed, latencies, statuses))
+            for seed in range(args.clients)
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        for proc in procs:
+            proc.terminate()
+            proc.wait()
+        if listener is not None:
+            listener.close()
+        if temp_dir is not None:
+            get_store(db_path).close()
+            temp_dir.cleanup()
+
+    if not latencies:
+        print("no requests completed")
+        return 1
+    latencies.sort()
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)]
+    print(f"{len(latencies)} requests from {args.clients} clients in {elapsed:.1f}s "
+          f"({args.workers if not args.url else '?'} workers)")
+    print(f"throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"latency:    p50 {statistics.median(latencies) * 1000:.2f} ms   p99 {p99 * 1000:.2f} ms")
+    print("status:     " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items(), key=str)))
+    return 1 if statuses["error"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
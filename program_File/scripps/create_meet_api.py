@@ -1,35 +1,158 @@
-import qrcode
-from qrcode.constants import ERROR_CORRECT_H
-import sqlite3
-import hashlib
-import time
-from PIL import ImageDraw, ImageFont, Image
-import random
+import atexit
 import datetime
-import inspect
-import pprint
-import shutil
-import zipfile
-import tempfile
-import os
-import threading
-import subprocess
+import hashlib
+import importlib
+import io
 import json
-import atexit
-import signal
-import sys
-from io import BytesIO
 import os
+import random
+import reprlib
+import signal
+import socket
 import sqlite3
-import shutil
-from pyzbar.pyzbar import decode
-from PIL import Image
-import json
-from typing import List
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import zipfile
+
+import meet_metrics
+from meet_store import get_store, DEFAULT_DISAGREEMENT_THRESHOLD, MEET_SETTINGS
+
+# Importing this module must stay cheap and free of side effects: the web UI
+# workers, the CLI (entry.py) and the benchmarks all load it. Timesheets pull
+# in qrcode and PIL and the rebuild pulls in pyzbar, so those names are only
+# imported the first time they are used (see __getattr__). The journal, import,
+# seeding and season modules are likewise imported by the functions that use them.
+LAZY_IMPORTS = {
+    "bulk_import_entries": "entry_import",
+    "read_entries_csv": "entry_import",
+    "EntryImportError": "entry_import",
+    "generate_qr_image": "timesheets",
+    "render_event_timesheets": "timesheets",
+    "render_all_timesheets": "timesheets",
+    "render_timesheet_pdfs": "timesheets",
+    "rebuild_database_from_timesheets": "timesheet_recovery",
+}
+
+def __getattr__(name: str):
+    if name in LAZY_IMPORTS:
+        value = getattr(importlib.import_module(LAZY_IMPORTS[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+web_ui_procs = {}
+
+# A crashed web worker is restarted after a wait that doubles from the first
+# value to the second; a worker that stayed up WEB_UI_HEALTHY_AFTER seconds
+# starts again from the shortest wait.
+WEB_UI_RESTART_BACKOFF = (1.0, 30.0)
+WEB_UI_HEALTHY_AFTER = 60.0
+
+# Caps for each value in variables.txt, so a dump mid-meet stays small and quick
+DUMP_REPR_CHARS = 2000
+_dump_repr = reprlib.Repr()
+_dump_repr.maxlevel = 4
+_dump_repr.maxlist = _dump_repr.maxtuple = _dump_repr.maxset = _dump_repr.maxdict = 25
+_dump_repr.maxstring = _dump_repr.maxother = 300
+
+def _capped_repr(val) -> str:
+    try:
+        text = _dump_repr.repr(val)
+    except Exception as e:
+        return f"<UNPRINTABLE: {e}>"
+    if len(text) > DUMP_REPR_CHARS:
+        text = text[:DUMP_REPR_CHARS] + f"... ({len(text) - DUMP_REPR_CHARS} more chars)"
+    return text
+def _capture_variables(frame, timestamp: str) -> str:
+    """Capped reprs of the caller's globals and every stack frame's locals, taken on the calling thread."""
+    lines = [f"===== Variable Dump @ {timestamp} =====\n", "-- GLOBAL VARIABLES --"]
+    for var, val in list(frame.f_globals.items()):
+        if var.startswith("__"):
+            continue
+        lines.append(f"{var} = {_capped_repr(val)}")
+
+    lines.append("\n-- STACK FRAME LOCALS --")
+    i = 0
+    while frame is not None:
+        lines.append(f"\nFrame {i}: {frame.f_code.co_name} (Line {frame.f_lineno})")
+        for var, val in list(frame.f_locals.items()):
+            lines.append(f"{var} = {_capped_repr(val)}")
+        frame = frame.f_back
+        i += 1
+    lines.append("\n===== End of Variable Dump =====\n")
+    return "\n".join(lines)
+def _dump_tables(conn: sqlite3.Connection, out):
+    """Streams every table a row at a time into out (virtual tables' internals are skipped)."""
+    tables = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY rowid").fetchall()
+    virtual = [name for name, sql in tables if sql and sql.upper().startswith("CREATE VIRTUAL TABLE")]
+    for name, _ in tables:
+        if name.startswith("sqlite_") or name in virtual or any(name.startswith(v + "_") for v in virtual):
+            continue
+        out.write(f"\n==== TABLE: {name} ====\n")
+        try:
+            cursor = conn.execute(f'SELECT * FROM "{name}"')
+            out.write(" | ".join(desc[0] for desc in cursor.description) + "\n")
+            for row in cursor:
+                out.write(" | ".join(str(cell) for cell in row) + "\n")
+        except Exception as e:
+            out.write(f"[ERROR] Could not dump table '{name}': {e}\n")
+def _write_state_dump(zip_output_path: str, db_path: str, variables: str, base_dir: str, metrics: str):
+    with zipfile.ZipFile(zip_output_path, "w", zipfile.ZIP_DEFLATED) as zipf:
+        zipf.writestr("variables.txt", variables)
+        zipf.writestr("metrics.json", metrics)
+
+        # ===== Consistent database snapshot =====
+        # The online backup API copies one committed state of the database
+        # (WAL included) while the time desk keeps writing; the table dump is
+        # read back from that snapshot so both entries agree.
+        with tempfile.TemporaryDirectory() as temp_dir:
+            snapshot_path = os.path.join(temp_dir, os.path.basename(db_path))
+            with zipf.open("swimmers.txt", "w") as raw, io.TextIOWrapper(raw, encoding="utf-8") as f:
+                if not os.path.exists(db_path):
+                    f.write(f"[ERROR] Database file not found at {db_path}\n")
+                    snapshot_path = None
+                else:
+                    try:
+                        source = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+                        snapshot = sqlite3.connect(snapshot_path)
+                        try:
+                            source.backup(snapshot)
+                            _dump_tables(snapshot, f)
+                        finally:
+                            snapshot.close()
+                            source.close()
+                    except Exception as e:
+                        f.write(f"[ERROR] Unable to dump swimmer data: {e}\n")
+                        snapshot_path = None
+            if snapshot_path is not None:
+                zipf.write(snapshot_path, os.path.basename(db_path))
+
+        # ===== Full Active_meet directory =====
+        active_meet_path = os.path.join(base_dir, "Active_meet")
+        if os.path.exists(active_meet_path):
+            for root, _, files in os.walk(active_meet_path):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    arcname = os.path.relpath(file_path, base_dir)
+                    zipf.write(file_path, arcname)
 
-web_ui_proc = None
+    print(f" Full debug dump written to:\n{zip_output_path}")
 
-def full_state_dump(db_path: str, tag: str = ""):
+def full_state_dump(db_path: str, tag: str = "", background: bool = False):
+    """
+    Zips the caller's variables, the metrics snapshot (see meet_metrics), every
+    table, a snapshot of the database and Active_meet into app_data/debug and
+    returns the zip path.
+
+    Only the capped variable reprs are taken on the calling thread. With
+    background=True the database snapshot and the zip are written on a
+    separate thread and the started thread is returned instead, so a dump in
+    the middle of a meet doesn't hold up time entry; join() it to wait.
+    """
     # Timestamp and safe filename
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     safe_tag = tag.replace(" ", "_").strip("_")
@@ -42,383 +165,168 @@ def full_state_dump(db_path: str, tag: str = ""):
     zip_output_path = os.path.abspath(os.path.join(base_dir, "../app_data/debug", zip_filename))
     os.makedirs(os.path.dirname(zip_output_path), exist_ok=True)
 
-    # Temporary workspace
-    with tempfile.TemporaryDirectory() as temp_dir:
-
-        # ===== 1. Variable Dump =====
-        var_log_path = os.path.join(temp_dir, "variables.txt")
-        with open(var_log_path, "w", encoding="utf-8") as f:
-            f.write(f"===== Variable Dump @ {timestamp} =====\n\n")
-
-            # Globals
-            frame = inspect.currentframe()
-            caller_globals = frame.f_back.f_globals
-            f.write("-- GLOBAL VARIABLES --\n")
-            for var, val in caller_globals.items():
-                if var.startswith("__"):
-                    continue
-                try:
-                    f.write(f"{var} = {pprint.pformat(val)}\n")
-                except Exception as e:
-                    f.write(f"{var} = <UNPRINTABLE: {e}>\n")
-
-            # Stack locals
-            f.write("\n-- STACK FRAME LOCALS --\n")
-            for i, frame_info in enumerate(inspect.stack()):
-                f.write(f"\nFrame {i}: {frame_info.function} (Line {frame_info.lineno})\n")
-                for var, val in frame_info.frame.f_locals.items():
-                    try:
-                        f.write(f"{var} = {pprint.pformat(val)}\n")
-                    except Exception as e:
-                        f.write(f"{var} = <UNPRINTABLE: {e}>\n")
-
-            f.write("\n===== End of Variable Dump =====\n")
-
-        # ===== 2. Swimmer / Database Dump =====
-        swimmer_log_path = os.path.join(temp_dir, "swimmers.txt")
-        try:
-            conn = sqlite3.connect(db_path)
-            cursor = conn.cursor()
-
-            with open(swimmer_log_path, "w", encoding="utf-8") as f:
-                def dump_table(name):
-                    f.write(f"\n==== TABLE: {name} ====\n")
-                    try:
-                        cursor.execute(f"SELECT * FROM {name}")
-                        rows = cursor.fetchall()
-                        col_names = [desc[0] for desc in cursor.description]
-                        f.write(" | ".join(col_names) + "\n")
-                        for row in rows:
-                            f.write(" | ".join(str(cell) for cell in row) + "\n")
-                    except Exception as e:
-                        f.write(f"[ERROR] Could not dump table '{name}': {e}\n")
-
-                for table in ['events', 'heats', 'lanes']:
-                    dump_table(table)
-
-            conn.close()
-        except Exception as e:
-            with open(swimmer_log_path, "w", encoding="utf-8") as f:
-                f.write(f"[ERROR] Unable to dump swimmer data: {e}\n")
-
-        # ===== 3. Copy DB file =====
-        if os.path.exists(db_path):
-            shutil.copy2(db_path, os.path.join(temp_dir, os.path.basename(db_path)))
-        else:
-            with open(var_log_path, "a", encoding="utf-8") as f:
-                f.write(f"\n[WARNING] Database file not found at {db_path}\n")
-
-        # ===== 4. Add Everything to ZIP =====
-        with zipfile.ZipFile(zip_output_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-            # Add the variable + swimmer logs + db copy
-            for root, _, files in os.walk(temp_dir):
-                for file in files:
-                    path = os.path.join(root, file)
-                    arcname = os.path.relpath(path, temp_dir)
-                    zipf.write(path, arcname)
-
-            # Add full Active_meet directory
-            active_meet_path = os.path.join(base_dir, "Active_meet")
-            if os.path.exists(active_meet_path):
-                for root, _, files in os.walk(active_meet_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.relpath(file_path, base_dir)
-                        zipf.write(file_path, arcname)
-
-    print(f" Full debug dump written to:\n{zip_output_path}")                  
+    variables = _capture_variables(sys._getframe(1), timestamp)
+    metrics = json.dumps(meet_metrics.collect(), indent=1)
+    if not background:
+        _write_state_dump(zip_output_path, db_path, variables, base_dir, metrics)
+        return zip_output_path
+    thread = threading.Thread(target=_write_state_dump, args=(zip_output_path, db_path, variables, base_dir, metrics),
+                              name="state-dump")
+    thread.start()
+    return thread
 
 def generate_time_based_id(input_text: str) -> str:
     timestamp = str(time.time())
     combined = input_text + timestamp
     return hashlib.sha256(combined.encode('utf-8')).hexdigest()[:16]
-def generate_qr_image(data: str) -> Image.Image:
-    qr = qrcode.QRCode(
-        version=5,
-        error_correction=ERROR_CORRECT_H,
-        box_size=2,
-        border=4,
-    )
-    qr.add_data(data)
-    qr.make(fit=True)
-    return qr.make_image(fill_color="black", back_color="white").convert("RGBA")
 def initialize_database_at_path(db_path: str):
-    os.makedirs(os.path.dirname(db_path), exist_ok=True)
-    
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS events (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        gender TEXT NOT NULL CHECK(gender IN ('Boys', 'Girls')),
-        age_min INTEGER NOT NULL,
-        age_max INTEGER NOT NULL,
-        distance INTEGER NOT NULL,
-        stroke TEXT NOT NULL
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS heats (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        event_id INTEGER NOT NULL,
-        heat_num INTEGER NOT NULL,
-        FOREIGN KEY (event_id) REFERENCES events(id)
-    );
-    """)
-
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS lanes (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        heat_id INTEGER NOT NULL,
-        lane_num INTEGER NOT NULL CHECK(lane_num BETWEEN 1 AND 8),
-        swimmer_name TEXT NOT NULL,
-        timer1_time REAL ,
-        timer2_time REAL ,
-        timer3_time REAL ,
-        total_time REAL ,
-        FOREIGN KEY (heat_id) REFERENCES heats(id)
-    );
-    """)
-
-    conn.commit()
-    conn.close()
+    get_store(db_path).initialize_schema()
 def create_event(db_path: str, gender: str, age_min: int, age_max: int, distance: int, stroke: str) -> int:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO events (gender, age_min, age_max, distance, stroke)
-        VALUES (?, ?, ?, ?, ?)
-    """, (gender, age_min, age_max, distance, stroke))
-    conn.commit()
-    event_id = cursor.lastrowid
-    conn.close()
-
-
-    return event_id
+    return get_store(db_path).create_event(gender, age_min, age_max, distance, stroke)
 def add_heat(db_path: str, event_id: int, heat_num: int) -> int:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO heats (event_id, heat_num)
-        VALUES (?, ?)
-    """, (event_id, heat_num))
-    conn.commit()
-    heat_id = cursor.lastrowid
-    conn.close()
-
-    return heat_id
+    return get_store(db_path).add_heat(event_id, heat_num)
 def add_swimmer_to_lane(db_path: str, heat_id: int, lane_num: int, swimmer_name: str) -> int:
-    # No timers provided yet, so set to None (which inserts NULL in SQLite)
-    timer1 = timer2 = timer3 = total_time = None
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO lanes (heat_id, lane_num, swimmer_name, timer1_time, timer2_time, timer3_time, total_time)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (heat_id, lane_num, swimmer_name, timer1, timer2, timer3, total_time))
-    conn.commit()
-    lane_id = cursor.lastrowid
-    conn.close()
-
-    return lane_id
-def update_lane_times(db_path: str, lane_id: int, timer1: float, timer2: float, timer3: float):
-    total_time = round((timer1 + timer2 + timer3) / 3, 3)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        UPDATE lanes
-        SET timer1_time = ?, timer2_time = ?, timer3_time = ?, total_time = ?
-        WHERE id = ?
-    """, (timer1, timer2, timer3, total_time, lane_id))
-    conn.commit()
-    conn.close()
-def save_teams_to_json(team_one, team_two, file_path="Active_meet/meta_data.json"):
-    """
-    Appends the team names to a JSON file at the specified file path.
-    
-    Args:
-        team_one (str): Name of the first team.
-        team_two (str): Name of the second team.
-        file_path (str): Path (including filename) where JSON should be saved.
+    return get_store(db_path).add_swimmer_to_lane(heat_id, lane_num, swimmer_name)
+def update_lane_times(db_path: str, lane_id: int, timer1: float | None, timer2: float | None, timer3: float | None):
+    get_store(db_path).update_lane_times(lane_id, timer1, timer2, timer3)
+def update_heat_times(db_path: str, heat_id: int, lane_times: dict, disagreement_threshold: float = DEFAULT_DISAGREEMENT_THRESHOLD) -> dict:
+    return get_store(db_path).update_heat_times(heat_id, lane_times, disagreement_threshold)
+def get_heat_standings(db_path: str, heat_id: int):
+    return get_store(db_path).get_heat_standings(heat_id)
+def save_teams_to_json(team_one, team_two, file_path="Active_meet/meta_data.json", db_path: str | None = None):
     """
-    # Make sure the directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    Records team_one vs team_two as the meet's dual meet (see MeetStore.set_dual_meet).
 
-    # Load existing data if the file exists and contains valid JSON
+    The names used to be appended to the JSON file at file_path; they now go
+    into the meet database, by default the swim_meet.db next to file_path, in
+    one transaction. Anything still in that file is imported first.
+    """
+    if db_path is None:
+        db_path = os.path.join(os.path.dirname(file_path), "swim_meet.db")
+    store = get_store(db_path)
+    store.initialize_schema()
     if os.path.exists(file_path):
-        try:
-            with open(file_path, 'r') as f:
-                existing_data = json.load(f)
-                if not isinstance(existing_data, list):
-                    existing_data = [existing_data]
-        except (json.JSONDecodeError, IOError):
-            existing_data = []
-    else:
-        existing_data = []
-
-    # Append the new entry
-    new_entry = {
-        "team_one": team_one,
-        "team_two": team_two
-    }
-    existing_data.append(new_entry)
-
-    # Write updated data back to the file
-    with open(file_path, 'w') as f:
-        json.dump(existing_data, f, indent=4)
-
-    print(f"Appended team names to: {file_path}")
+        import_legacy_metadata(db_path, file_path)
+    store.set_dual_meet(team_one, team_two)
+    print(f"Saved teams {team_one} vs {team_two} to: {db_path}")
+def import_legacy_metadata(db_path: str, json_path: str) -> int:
+    """
+    Moves a meta_data.json written by the old save_teams_to_json into the meet
+    database and returns the number of entries read. Every team is added and
+    the last pair becomes the dual meet; other keys that name a meet setting
+    are set, the rest kept as plain metadata. The file is then renamed to
+    <json_path>.imported so it's only read once.
+
+    A file that isn't valid JSON raises ValueError and is left as it is
+    (the old code started a fresh list, losing everything in it).
+    """
+    try:
+        with open(json_path, 'r') as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{json_path} is not valid JSON ({e}); nothing was imported") from None
+    entries = data if isinstance(data, list) else [data]
+    store = get_store(db_path)
+    with store.transaction():
+        for number, entry in enumerate(entries, start=1):
+            if not isinstance(entry, dict):
+                raise ValueError(f"{json_path} entry {number} is not an object: {entry!r}")
+            entry = dict(entry)
+            teams = (entry.pop("team_one", None), entry.pop("team_two", None))
+            if any(teams):
+                store.set_dual_meet(*teams)
+            settings = {key: entry.pop(key) for key in list(entry) if key in MEET_SETTINGS}
+            store.set_settings(settings)
+            store.set_metadata(entry)
+    os.replace(json_path, json_path + ".imported")
+    print(f"Imported {len(entries)} metadata entries from {json_path} into {db_path}")
+    return len(entries)
+def get_meet_settings(db_path: str) -> dict:
+    return get_store(db_path).get_settings()
+def get_meet_setting(db_path: str, name: str):
+    return get_store(db_path).get_setting(name)
+def set_meet_settings(db_path: str, settings: dict):
+    get_store(db_path).set_settings(settings)
+def get_meet_metadata(db_path: str, key: str, default=None):
+    return get_store(db_path).get_metadata(key, default)
+def set_meet_metadata(db_path: str, values: dict):
+    get_store(db_path).set_metadata(values)
 
 def get_all_events(db_path: str):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM events")
-    events = cursor.fetchall()
-    conn.close()
-    return events
+    return get_store(db_path).get_all_events()
+def get_event(db_path: str, event_id: int):
+    return get_store(db_path).get_event(event_id)
 def get_heats_for_event(db_path: str, event_id: int):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM heats WHERE event_id = ?", (event_id,))
-    heats = cursor.fetchall()
-    conn.close()
-    return heats
+    return get_store(db_path).get_heats_for_event(event_id)
 def get_swimmers_in_heat(db_path: str, heat_id: int):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT lane_num, swimmer_name, timer1_time, timer2_time, timer3_time, total_time
-        FROM lanes
-        WHERE heat_id = ?
-        ORDER BY lane_num
-    """, (heat_id,))
-    swimmers = cursor.fetchall()
-    conn.close()
-    return swimmers
+    return get_store(db_path).get_swimmers_in_heat(heat_id)
 
 def get_fastest_swimmer_in_event(db_path: str, event_id: int):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT swimmer_name, total_time, heats.heat_num, lanes.lane_num,
-               timer1_time, timer2_time, timer3_time
-        FROM lanes
-        JOIN heats ON lanes.heat_id = heats.id
-        WHERE heats.event_id = ? AND total_time IS NOT NULL
-        ORDER BY total_time ASC
-        LIMIT 1
-    """, (event_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result
+    return get_store(db_path).get_fastest_swimmer_in_event(event_id)
 def list_all_swimmers(db_path: str):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT swimmer_name, heats.heat_num, lanes.lane_num, events.id AS event_id,
-               events.stroke, timer1_time, timer2_time, timer3_time, total_time
-        FROM lanes
-        JOIN heats ON lanes.heat_id = heats.id
-        JOIN events ON heats.event_id = events.id
-        ORDER BY event_id, heats.heat_num, lanes.lane_num
-    """)
-    swimmers = cursor.fetchall()
-    conn.close()
-    return swimmers
+    return get_store(db_path).list_all_swimmers()
 def list_swimmers_in_event(db_path: str, event_id: int):
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT swimmer_name, heats.heat_num, lanes.lane_num,
-               timer1_time, timer2_time, timer3_time, total_time
-        FROM lanes
-        JOIN heats ON lanes.heat_id = heats.id
-        WHERE heats.event_id = ?
-        ORDER BY heats.heat_num, lanes.lane_num
-    """, (event_id,))
-    swimmers = cursor.fetchall()
-    conn.close()
-    return swimmers
+    return get_store(db_path).list_swimmers_in_event(event_id)
 def get_event_results(db_path: str, event_id: int):
-
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT swimmer_name, heats.heat_num, lanes.lane_num,
-               timer1_time, timer2_time, timer3_time, total_time
-        FROM lanes
-        JOIN heats ON lanes.heat_id = heats.id
-        WHERE heats.event_id = ? AND total_time IS NOT NULL
-        ORDER BY total_time ASC
-    """, (event_id,))
-    results = cursor.fetchall()
-    conn.close()
-    return results
+    return get_store(db_path).get_event_results(event_id)
+def get_event_standings(db_path: str, event_id: int):
+    return get_store(db_path).get_event_standings(event_id)
+def rebuild_standings(db_path: str, event_id: int | None = None):
+    get_store(db_path).rebuild_standings(event_id)
+def check_standings(db_path: str) -> list:
+    return get_store(db_path).check_standings()
+def get_changes_since(db_path: str, seq: int):
+    return get_store(db_path).get_changes_since(seq)
+def add_team(db_path: str, name: str) -> int:
+    return get_store(db_path).add_team(name)
+def set_lane_team(db_path: str, lane_id: int, team_id: int | None):
+    get_store(db_path).set_lane_teams({lane_id: team_id})
+def set_points_table(db_path: str, points):
+    get_store(db_path).set_points_table(points)
+def get_team_scores(db_path: str):
+    return get_store(db_path).get_team_scores()
+def get_team_event_points(db_path: str, event_id: int):
+    return get_store(db_path).get_team_event_points(event_id)
+def rebuild_team_scores(db_path: str):
+    get_store(db_path).rebuild_team_scores()
+def check_team_scores(db_path: str) -> list:
+    return get_store(db_path).check_team_scores()
+def search_swimmers(db_path: str, text: str, after_lane_id: int = 0, limit: int = 25) -> tuple:
+    return get_store(db_path).search(text, after_lane_id, limit)
+def rebuild_search_index(db_path: str) -> bool:
+    return get_store(db_path).rebuild_search_index()
+def enable_journal(db_path: str, journal_dir: str | None = None, **options):
+    import meet_journal
+    return meet_journal.enable_journal(db_path, journal_dir, **options)
+def enable_metrics(db_path: str | None = None, metrics_dir: str | None = None):
+    """Turns on call, SQL and render metrics; with a meet, they are shared with its web UI workers."""
+    meet_metrics.enable(metrics_dir or (meet_metrics.default_metrics_dir(db_path) if db_path else None))
+def get_metrics() -> dict:
+    return meet_metrics.collect()
+def replay_journal(journal_dir: str, new_db_path: str, until_time: float | None = None, until_seq: int | None = None) -> dict:
+    import meet_journal
+    return meet_journal.replay_journal(journal_dir, new_db_path, until_time, until_seq)
 
 def get_lane_id_by_heat_and_lane(db_path: str, heat_id: int, lane_num: int) -> int | None:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT id FROM lanes WHERE heat_id = ? AND lane_num = ?
-    """, (heat_id, lane_num))
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result else None
+    return get_store(db_path).get_lane_id_by_heat_and_lane(heat_id, lane_num)
 def get_event_id_from_heat(db_path: str, heat_id: int) -> int | None:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT event_id FROM heats
-        WHERE id = ?
-    """, (heat_id,))
-    result = cursor.fetchone()
-    conn.close()
-
-    return result[0] if result else None
+    return get_store(db_path).get_event_id_from_heat(heat_id)
 def get_swimmer_name_from_lane(db_path: str, lane_id: int) -> str | None:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT swimmer_name FROM lanes
-        WHERE id = ?
-    """, (lane_id,))
-    result = cursor.fetchone()
-    conn.close()
-
-    return result[0] if result else None
+    return get_store(db_path).get_swimmer_name_from_lane(lane_id)
+def get_swimmer_id(db_path: str, swimmer_name: str) -> int | None:
+    return get_store(db_path).get_swimmer_id(swimmer_name)
+def list_swimmers(db_path: str):
+    return get_store(db_path).list_swimmers()
+def get_swimmer_entries(db_path: str, swimmer_id: int):
+    return get_store(db_path).get_swimmer_entries(swimmer_id)
 def get_heat_number_from_id(db_path: str, heat_id: int) -> int | None:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT heat_num FROM heats
-        WHERE id = ?
-    """, (heat_id,))
-    result = cursor.fetchone()
-    conn.close()
-
-    return result[0] if result else None
+    return get_store(db_path).get_heat_number_from_id(heat_id)
 def get_number_of_heats_for_event(db_path: str, event_id: int) -> int:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(*) FROM heats
-        WHERE event_id = ?
-    """, (event_id,))
-    result = cursor.fetchone()
-    conn.close()
-
-    return result[0] if result else 0
+    return get_store(db_path).get_number_of_heats_for_event(event_id)
 def get_total_number_of_events(db_path: str) -> int:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM events")
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result else 0
+    return get_store(db_path).get_total_number_of_events()
 def list_all_info(db_path: str):
+    y = get_total_number_of_events(db_path)
     for x in range(1, y + 1):
         print(f"Event {x}:")
         print(get_heats_for_event(db_path, x))
@@ -431,72 +339,15 @@ def list_all_info(db_path: str):
     for swimmer in swimmers:
         print(swimmer)
 
-def rendered_a_timesheets(db_path: str, event_id: int): 
-    qr_size = 125
-    bg_width = 1000
-    bg_height = 400
-
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
-    font_path = os.path.join(base_dir, 'app_resources', 'arial.ttf')
-
-    try:
-        font = ImageFont.truetype(font_path, 30)
-    except IOError:
-        font = ImageFont.load_default()
-        print("Warning: 'arial.ttf' font not found, using default font.")
-
-    margin_left = 30
-    margin_top = 20
-    line_spacing = 50
-
-    for heat in get_heats_for_event(db_path, event_id):
-        heat_id = heat[0]
-        heat_num = heat[2]
-
-        swimmers = get_swimmers_in_heat(db_path, heat_id)
-
-        for lane_num in range(1, 9):
-            swimmer = next((s for s in swimmers if s[0] == lane_num), None)
-
-            if swimmer:
-                _, swimmer_name, t1, t2, t3, total = swimmer
-                lane_id = get_lane_id_by_heat_and_lane(db_path, heat_id, lane_num)
-            else:
-                swimmer_name = "Empty Lane"
-                lane_id = None
-
-            background = Image.new("RGBA", (bg_width, bg_height), (255, 255, 255, 255))
-            draw = ImageDraw.Draw(background)
-
-            if lane_id:
-                qr_code_data = json.dumps({"event_id": event_id,"heat_id": heat_id,"heat_num": heat_num,"lane_id": lane_id,"lane_num": lane_num,"swimmer_name": swimmer_name})
-                qr_img = generate_qr_image(qr_code_data).resize((qr_size, qr_size))
-                background.paste(qr_img, (15, 15), qr_img)
-
-            margin_left_2 = margin_left + qr_size
-            draw.text((margin_left_2, margin_top), f"Swimmer: {swimmer_name}", fill=(0, 0, 0), font=font)
-            draw.text((margin_left_2, margin_top + line_spacing), f"Event: {event_id} | Heat: {heat_num} | Lane: {lane_num}", fill=(0, 0, 0), font=font)
-
-            line_y = margin_top + line_spacing * 2 - 10
-            times_start_y = line_y + 30
-            draw.text((margin_left, times_start_y), "Timer 1: ____________________", fill=(0, 0, 0), font=font)
-            draw.text((margin_left, times_start_y + line_spacing), "Timer 2: ____________________", fill=(0, 0, 0), font=font)
-            draw.text((margin_left, times_start_y + 2 * line_spacing), "Timer 3: ____________________", fill=(0, 0, 0), font=font)
-            draw.text((margin_left, times_start_y + 3 * line_spacing), "Total:   ____________________", fill=(0, 0, 0), font=font)
-
-            output_dir = f"Active_meet/Time_sheets/{event_id}/{heat_num}"
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, f"lane_{lane_num}_timesheet.png")
-            background.save(output_path)
-def rendered_all_timesheets(db_path: str):
-    number_of_events = get_total_number_of_events(db_path)
-    x = number_of_events
-    for i in range(1, x + 1):
-        rendered_a_timesheets(db_path,i)
-        percent = (i / (number_of_events))  # Calculate percentage of completion
-        percent = round(percent * 100, 2)
-        print(f"Rendering timesheets for event {i} of {number_of_events}:")
-        print(f"{percent} %")
+def rendered_a_timesheets(db_path: str, event_id: int):
+    from timesheets import render_event_timesheets
+    render_event_timesheets(db_path, event_id)
+def rendered_all_timesheets(db_path: str, workers: int = 1, incremental: bool = True):
+    from timesheets import render_all_timesheets
+    return render_all_timesheets(db_path, workers=workers, incremental=incremental)
+def rendered_timesheet_pdfs(db_path: str, pdf_scope: str = "event", skip_empty: bool = False):
+    from timesheets import render_timesheet_pdfs
+    return render_timesheet_pdfs(db_path, pdf_scope=pdf_scope, skip_empty=skip_empty)
 
 def random_swimmer_name():
     first_names = [
@@ -508,24 +359,20 @@ def random_swimmer_name():
         "Garcia", "Miller", "Davis", "Wilson", "Martinez", "Lee", "Clark"
     ]
     return f"{random.choice(first_names)} {random.choice(last_names)}"
-def generate_realistic_test_data(db_path: str, num_events=10):
+def generate_realistic_test_entries(num_events=10):
     genders = ["Boys", "Girls"]
     strokes = ["freestyle", "backstroke", "breaststroke", "butterfly"]
     age_ranges = [(9, 10), (11, 12), (13, 14)]
     distances = [25, 50, 100]
 
-    for _ in range(num_events):
+    for event_num in range(1, num_events + 1):
         gender = random.choice(genders)
         age_min, age_max = random.choice(age_ranges)
         distance = random.choice(distances)
         stroke = random.choice(strokes)
 
-        event_id = create_event(db_path, gender, age_min, age_max, distance, stroke)
-
         num_heats = random.randint(1, 7)
         for heat_num in range(1, num_heats + 1):
-            heat_id = add_heat(db_path, event_id, heat_num)
-
             # More empty lanes in the last heat
             if heat_num < num_heats:
                 num_lanes = random.randint(6, 8)
@@ -533,164 +380,146 @@ def generate_realistic_test_data(db_path: str, num_events=10):
                 num_lanes = random.randint(1, 5)
 
             used_lanes = random.sample(range(1, 9), num_lanes)
-            assigned_lanes = {}  # lane_num: swimmer_name
 
             for lane_num in sorted(used_lanes):
-                swimmer_name = random_swimmer_name()
-                add_swimmer_to_lane(db_path, heat_id, lane_num, swimmer_name)
-                assigned_lanes[lane_num] = swimmer_name
-
+                yield {
+                    "event": event_num,
+                    "gender": gender,
+                    "age_min": age_min,
+                    "age_max": age_max,
+                    "distance": distance,
+                    "stroke": stroke,
+                    "heat_num": heat_num,
+                    "lane_num": lane_num,
+                    "swimmer_name": random_swimmer_name(),
+                }
+def generate_realistic_test_data(db_path: str, num_events=10):
+    from entry_import import bulk_import_entries
+    bulk_import_entries(db_path, generate_realistic_test_entries(num_events))
 
     print(f"{num_events} realistic events generated without timing data.")
+def generate_synthetic_meet(db_path: str, size: str = "league", seed: int = 0, timed: bool = True) -> dict:
+    from synthetic_meet import build_synthetic_meet
+    return build_synthetic_meet(db_path, size, seed, timed)
+def seed_meet(db_path: str, entries, pool_size: int | None = None, method: str = "timed_finals") -> dict:
+    from entry_import import MAX_LANES
+    from seeding import import_seeded_entries
+    return import_seeded_entries(db_path, entries, pool_size or MAX_LANES, method)
+def close_meet(db_path: str, archive_dir: str | None = None, name: str | None = None,
+               meet_date: str | None = None) -> dict:
+    import season_archive
+    return season_archive.close_meet(db_path, archive_dir or season_archive.DEFAULT_ARCHIVE_DIR, name, meet_date)
+def rebuild_season_index(archive_dir: str | None = None) -> int:
+    import season_archive
+    return season_archive.rebuild_season_index(archive_dir or season_archive.DEFAULT_ARCHIVE_DIR)
+def check_season_index(archive_dir: str | None = None) -> list:
+    import season_archive
+    return season_archive.check_season_index(archive_dir or season_archive.DEFAULT_ARCHIVE_DIR)
+def get_archived_meets(archive_dir: str | None = None) -> list:
+    import season_archive
+    return season_archive.archived_meets(archive_dir or season_archive.DEFAULT_ARCHIVE_DIR)
+def get_season_best_times(archive_dir: str, distance: int, stroke: str, gender: str | None = None,
+                          age_group: tuple | None = None, course: str = "SCM", limit: int = 25) -> list:
+    import season_archive
+    return season_archive.season_best_times(archive_dir, distance, stroke, gender, age_group, course, limit)
+def get_season_seed_times(archive_dir: str, entries, course: str = "SCM", before: str | None = None) -> list:
+    import season_archive
+    return season_archive.season_seed_times(archive_dir, entries, course, before)
+def get_swimmer_season_history(archive_dir: str, swimmer_name: str) -> list:
+    import season_archive
+    return season_archive.swimmer_season_history(archive_dir, swimmer_name)
+
+def start_WEB_UI(script_relative_path=os.path.join('..', 'web_ui', 'web_ui.py'), max_retries=None,
+                 host=None, port=None, workers=None, db_path=None):
+    """
+    Serves the web UI from several worker processes and restarts any that die.
 
-def start_WEB_UI(script_relative_path=os.path.join('..', 'web_ui', 'web_ui.py'), max_retries=1):
+    host, port, workers and db_path default to the WEB_UI_HOST, WEB_UI_PORT,
+    WEB_UI_WORKERS and SWIM_MEET_DB environment variables. The socket is bound
+    once and inherited by every worker. max_retries caps restarts per worker.
+    """
     base_dir = os.path.dirname(os.path.abspath(__file__))
     script_path = os.path.join(base_dir, script_relative_path)
-
-    def run_script():
-        global web_ui_proc
+    host = host or os.environ.get("WEB_UI_HOST", "0.0.0.0")
+    port = int(port if port is not None else os.environ.get("WEB_UI_PORT", 5000))
+    workers = int(workers or os.environ.get("WEB_UI_WORKERS", 2))
+    db_path = db_path or os.environ.get("SWIM_MEET_DB", "Active_meet/swim_meet.db")
+
+    get_store(db_path).initialize_schema()
+    listener = socket.create_server((host, port), backlog=1024)
+    listener.set_inheritable(True)
+    env = dict(os.environ, SWIM_MEET_DB=os.path.abspath(db_path))
+    if meet_metrics.enabled:
+        # Workers export their metrics next to ours, so /metrics covers the whole meet
+        if meet_metrics.export_dir is None:
+            meet_metrics.enable(meet_metrics.default_metrics_dir(db_path))
+        env.update(SWIM_MEET_METRICS="1", SWIM_MEET_METRICS_DIR=meet_metrics.export_dir)
+    command = [sys.executable, script_path, "--host", host, "--fd", str(listener.fileno())]
+    stopping = threading.Event()
+
+    def run_worker(worker_num):
         retries = 0
-        while retries < max_retries:
+        delay = WEB_UI_RESTART_BACKOFF[0]
+        while not stopping.is_set():
+            started = time.monotonic()
             try:
-                print(f"[WEB_UI] Launching: {script_path}")
+                print(f"[WEB_UI] Launching worker {worker_num}: {script_path}")
                 # Start subprocess in new process group
-                web_ui_proc = subprocess.Popen(
-                    ["python3", script_path],
-                    preexec_fn=os.setsid
-                )
-                web_ui_proc.wait()
-                print(f"[WEB_UI] UI exited with code {web_ui_proc.returncode}")
-                if web_ui_proc.returncode == 0:
+                proc = subprocess.Popen(command, env=env, pass_fds=(listener.fileno(),), start_new_session=True)
+                web_ui_procs[worker_num] = proc
+                proc.wait()
+                print(f"[WEB_UI] Worker {worker_num} exited with code {proc.returncode}")
+                if proc.returncode == 0 or stopping.is_set():
                     break
             except Exception as e:
                 print(f"[WEB_UI] Error: {e}")
+            if time.monotonic() - started >= WEB_UI_HEALTHY_AFTER:
+                delay = WEB_UI_RESTART_BACKOFF[0]
             retries += 1
-            if retries < max_retries:
-                time.sleep(2)
-                print(f"[WEB_UI] Restarting (attempt {retries + 1}/{max_retries})...")
-            else:
-                print("[WEB_UI] Max retries reached. Not restarting.")
-
-    thread = threading.Thread(target=run_script, daemon=True)
-    thread.start()
+            if max_retries is not None and retries > max_retries:
+                print(f"[WEB_UI] Max retries reached. Not restarting worker {worker_num}.")
+                break
+            print(f"[WEB_UI] Restarting worker {worker_num} in {delay:.0f}s (restart {retries})...")
+            if stopping.wait(delay):
+                break
+            delay = min(delay * 2, WEB_UI_RESTART_BACKOFF[1])
+
+    for worker_num in range(1, workers + 1):
+        threading.Thread(target=run_worker, args=(worker_num,), name=f"web-ui-{worker_num}", daemon=True).start()
+    print(f"[WEB_UI] Serving on http://{host}:{listener.getsockname()[1]} with {workers} workers")
 
     def cleanup():
-        global web_ui_proc
-        if web_ui_proc and web_ui_proc.poll() is None:  # Still running
-            print("[WEB_UI] Terminating subprocess...")
-            # Kill the entire process group
-            os.killpg(os.getpgid(web_ui_proc.pid), signal.SIGTERM)
+        if stopping.is_set():
+            return
+        stopping.set()
+        for proc in web_ui_procs.values():
+            if proc.poll() is None:  # Still running
+                print("[WEB_UI] Terminating subprocess...")
+                # Kill the entire process group
+                os.killpg(os.getpgid(proc.pid), signal.SIGTERM)
+        listener.close()
 
     atexit.register(cleanup)
+    return cleanup
 
+def run_demo(db_path: str = "Active_meet/swim_meet.db"):
+    """The walkthrough this module used to run on import: a random meet, its timesheets and a state dump."""
+    initialize_database_at_path(db_path)
 
-    """
-    Rebuilds a new SQLite database from available sources:
-    - Salvageable data in the damaged database
-    - QR codes in the timesheet images in `timesheet_dir`
-    """
-
-    print("Starting database rebuild process...")
-
-    # Backup the damaged database if it exists
-    if os.path.exists(damaged_db_path):
-        backup_path = damaged_db_path + ".bak"
-        shutil.copy(damaged_db_path, backup_path)
-        print(f"Backed up damaged database to: {backup_path}")
-    else:
-        print("No damaged database found. Rebuilding from scratch.")
-
-    # Step 1: Initialize new database
-    initialize_database_at_path(new_db_path)
-    print(f"Initialized new database at {new_db_path}")
-
-    # Step 2: Extract QR code data from timesheets
-    recovered_qr_data: List[dict] = []
-
-    print(f"Scanning timesheet directory: {timesheet_dir}")
-    for filename in os.listdir(timesheet_dir):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            image_path = os.path.join(timesheet_dir, filename)
-            try:
-                img = Image.open(image_path)
-                decoded = decode(img)
-                for item in decoded:
-                    raw_data = item.data.decode('utf-8')
-                    try:
-                        qr_dict = json.loads(raw_data)
-                        recovered_qr_data.append(qr_dict)
-                        print(f"Recovered from {filename}: {qr_dict}")
-                    except json.JSONDecodeError:
-                        print(f"Failed to decode JSON in {filename}")
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
-
-    print(f"Total recovered swimmers: {len(recovered_qr_data)}")
-
-    # Step 3: Insert recovered data into the new database
-    conn = sqlite3.connect(new_db_path)
-    cursor = conn.cursor()
-
-    # Track inserted IDs to avoid duplicates
-    event_cache = {}
-    heat_cache = {}
-
-    for entry in recovered_qr_data:
-        gender = entry.get("gender", "Unknown")
-        min_age = entry.get("min_age", 0)
-        max_age = entry.get("max_age", 99)
-        distance = entry.get("distance", 50)
-        stroke = entry.get("stroke", "freestyle")
-        event_id = entry["event_id"]
-        heat_num = entry["heat_num"]
-        lane_num = entry["lane_num"]
-        swimmer_name = entry["swimmer_name"]
-
-        # Insert event if not already inserted
-        if event_id not in event_cache:
-            cursor.execute("""
-                INSERT INTO events (id, gender, min_age, max_age, distance, stroke)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (event_id, gender, min_age, max_age, distance, stroke))
-            event_cache[event_id] = True
-
-        # Insert heat if not already inserted
-        heat_key = (event_id, heat_num)
-        if heat_key not in heat_cache:
-            cursor.execute("""
-                INSERT INTO heats (event_id, heat_num)
-                VALUES (?, ?)
-            """, (event_id, heat_num))
-            heat_id = cursor.lastrowid
-            heat_cache[heat_key] = heat_id
-        else:
-            heat_id = heat_cache[heat_key]
-
-        # Insert lane
-        cursor.execute("""
-            INSERT INTO lanes (heat_id, lane_num, swimmer_name)
-            VALUES (?, ?, ?)
-        """, (heat_id, lane_num, swimmer_name))
-
-    conn.commit()
-    conn.close()
-
-    print(f"Database rebuild complete. New database written to: {new_db_path}")
-
-#start_WEB_UI()
-
-db_path = "Active_meet/swim_meet.db"
-
-initialize_database_at_path(db_path)
+    save_teams_to_json("example team, one", "example team two",
+                       os.path.join(os.path.dirname(db_path), "meta_data.json"), db_path)
 
-save_teams_to_json("example team, one", "example team two")
+    generate_realistic_test_data(db_path)
 
-generate_realistic_test_data(db_path)
+    rendered_all_timesheets(db_path)
 
-rendered_all_timesheets(db_path)
+    get_all_events(db_path)
 
-y = get_total_number_of_events(db_path)
+    full_state_dump(db_path, "done executing script")
 
-get_all_events(db_path)
+# Count and time every API call while metrics are on. full_state_dump reads
+# its caller's frame and start_WEB_UI only launches processes, so both stay as they are.
+meet_metrics.instrument_module(globals(), exclude={"full_state_dump", "start_WEB_UI"})
 
-full_state_dump(db_path,"done executing script")
+if __name__ == "__main__":
+    run_demo()
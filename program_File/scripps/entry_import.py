@@ -0,0 +1,187 @@
+import csv
+from typing import Iterable, Iterator
+
+from meet_store import SQL_GET_TEAM_ID, SQL_INTERN_SWIMMER, SQL_SET_LANE_TEAM, SQL_SWIMMER_ID_FOR_NAME, get_store
+
+
+MAX_LANES = 8  # lanes.lane_num CHECK in schema_migrations
+ENTRY_FIELDS = ["event", "gender", "age_min", "age_max", "distance", "stroke", "heat_num", "lane_num", "swimmer_name",
+                "team"]
+
+SQL_INSERT_EVENT_WITH_ID = """
+    INSERT INTO events (id, gender, age_min, age_max, distance, stroke)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_INSERT_HEAT_WITH_ID = """
+    INSERT INTO heats (id, event_id, heat_num)
+    VALUES (?, ?, ?)
+"""
+SQL_INSERT_LANE_WITH_ID = f"""
+    INSERT INTO lanes (id, heat_id, lane_num, swimmer_id, timer1_time, timer2_time, timer3_time, total_time)
+    VALUES (?, ?, ?, {SQL_SWIMMER_ID_FOR_NAME}, NULL, NULL, NULL, NULL)
+"""
+SQL_INSERT_TEAM_WITH_ID = "INSERT INTO teams (id, name) VALUES (?, ?)"
+
+
+class EntryImportError(ValueError):
+    """Raised for an entry that can't be imported; nothing from the import is kept."""
+
+    def __init__(self, entry_number: int, message: str):
+        super().__init__(f"entry {entry_number}: {message}")
+        self.entry_number = entry_number
+
+
+def read_entries_csv(csv_path: str) -> Iterator[dict]:
+    """
+    Streams entries from a CSV entry file, one dict per row.
+
+    The header must contain gender, age_min, age_max, distance, stroke,
+    heat_num, lane_num and swimmer_name. An optional event column groups rows
+    into events; without it rows with the same description share an event. An
+    optional team column enters the swimmer for that team.
+    For seeding.seed_entries a seed_time column replaces heat_num and lane_num.
+    """
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield row
+
+
+def _next_id(conn, table: str) -> int:
+    # AUTOINCREMENT never reuses an id, so start past both the live rows and sqlite_sequence
+    max_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)).fetchone()
+    return max(max_id, seq[0] if seq else 0) + 1
+
+
+def _as_int(entry: dict, field: str, entry_number: int) -> int:
+    value = entry.get(field)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise EntryImportError(entry_number, f"{field} must be a whole number, got {value!r}") from None
+
+
+def _validate(entry: dict, entry_number: int):
+    gender = str(entry.get("gender", "")).strip()
+    if gender not in ("Boys", "Girls"):
+        raise EntryImportError(entry_number, f"gender must be 'Boys' or 'Girls', got {gender!r}")
+    age_min = _as_int(entry, "age_min", entry_number)
+    age_max = _as_int(entry, "age_max", entry_number)
+    if age_min > age_max:
+        raise EntryImportError(entry_number, f"age_min {age_min} is above age_max {age_max}")
+    distance = _as_int(entry, "distance", entry_number)
+    stroke = str(entry.get("stroke", "")).strip()
+    if not stroke:
+        raise EntryImportError(entry_number, "stroke is missing")
+    heat_num = _as_int(entry, "heat_num", entry_number)
+    if heat_num < 1:
+        raise EntryImportError(entry_number, f"heat_num must be 1 or more, got {heat_num}")
+    lane_num = _as_int(entry, "lane_num", entry_number)
+    if not 1 <= lane_num <= MAX_LANES:
+        raise EntryImportError(entry_number, f"lane_num must be between 1 and {MAX_LANES}, got {lane_num}")
+    swimmer_name = str(entry.get("swimmer_name") or "").strip()
+    if not swimmer_name:
+        raise EntryImportError(entry_number, "swimmer_name is missing")
+
+    team = str(entry.get("team") or "").strip() or None
+
+    description = (gender, age_min, age_max, distance, stroke)
+    event_key = entry.get("event")
+    if event_key in (None, ""):
+        event_key = description
+    return event_key, description, heat_num, lane_num, swimmer_name, team
+
+
+def bulk_import_entries(db_path: str, entries: Iterable[dict], batch_size: int = 500) -> dict:
+    """
+    Writes a whole entry list (dicts with the ENTRY_FIELDS keys) in one transaction.
+
+    Returns the assigned ids as {"events": {event_key: id}, "heats": {(event_key,
+    heat_num): id}, "lanes": {(event_key, heat_num, lane_num): id}}. Any invalid
+    entry raises EntryImportError and rolls back the whole import.
+    """
+    store = get_store(db_path)
+    event_ids = {}
+    event_descriptions = {}
+    heat_ids = {}
+    lane_ids = {}
+    team_ids = {}
+
+    with store.transaction() as conn:
+        next_event_id = _next_id(conn, "events")
+        next_heat_id = _next_id(conn, "heats")
+        next_lane_id = _next_id(conn, "lanes")
+        next_team_id = None
+        event_rows, heat_rows, lane_rows, team_rows, lane_team_rows = [], [], [], [], []
+
+        def flush():
+            # Parents first so a batch never references a row that isn't written yet
+            if team_rows:
+                conn.executemany(SQL_INSERT_TEAM_WITH_ID, team_rows)
+                store.journal_rows("teams", team_rows)
+                team_rows.clear()
+            if event_rows:
+                conn.executemany(SQL_INSERT_EVENT_WITH_ID, event_rows)
+                store.journal_rows("events", event_rows)
+                event_rows.clear()
+            if heat_rows:
+                conn.executemany(SQL_INSERT_HEAT_WITH_ID, heat_rows)
+                store.journal_rows("heats", heat_rows)
+                heat_rows.clear()
+            if lane_rows:
+                conn.executemany(SQL_INTERN_SWIMMER, [(name, name) for _, _, _, name in lane_rows])
+                conn.executemany(SQL_INSERT_LANE_WITH_ID, lane_rows)
+                store.journal_rows("lanes", lane_rows)
+                lane_rows.clear()
+            if lane_team_rows:
+                conn.executemany(SQL_SET_LANE_TEAM, [(team_id, lane_id) for lane_id, team_id in lane_team_rows])
+                store.journal_rows("lane_teams", lane_team_rows)
+                lane_team_rows.clear()
+
+        for entry_number, entry in enumerate(entries, start=1):
+            event_key, description, heat_num, lane_num, swimmer_name, team = _validate(entry, entry_number)
+
+            event_id = event_ids.get(event_key)
+            if event_id is None:
+                event_id = next_event_id
+                next_event_id += 1
+                event_ids[event_key] = event_id
+                event_descriptions[event_key] = description
+                event_rows.append((event_id, *description))
+            elif event_descriptions[event_key] != description:
+                raise EntryImportError(entry_number, f"event {event_key!r} is described differently by an earlier entry")
+
+            heat_key = (event_key, heat_num)
+            heat_id = heat_ids.get(heat_key)
+            if heat_id is None:
+                heat_id = next_heat_id
+                next_heat_id += 1
+                heat_ids[heat_key] = heat_id
+                heat_rows.append((heat_id, event_id, heat_num))
+
+            lane_key = (event_key, heat_num, lane_num)
+            if lane_key in lane_ids:
+                raise EntryImportError(entry_number, f"lane {lane_num} of heat {heat_num} in event {event_key!r} is already taken")
+            lane_ids[lane_key] = next_lane_id
+            lane_rows.append((next_lane_id, heat_id, lane_num, swimmer_name))
+            if team is not None:
+                team_id = team_ids.get(team)
+                if team_id is None:
+                    team_id = conn.execute(SQL_GET_TEAM_ID, (team,)).fetchone()
+                    if team_id is not None:
+                        team_id = team_id[0]
+                    else:
+                        if next_team_id is None:
+                            next_team_id = _next_id(conn, "teams")
+                        team_id = next_team_id
+                        next_team_id += 1
+                        team_rows.append((team_id, team))
+                    team_ids[team] = team_id
+                lane_team_rows.append((next_lane_id, team_id))
+            next_lane_id += 1
+
+            if len(lane_rows) >= batch_size:
+                flush()
+        flush()
+
+    return {"events": event_ids, "heats": heat_ids, "lanes": lane_ids}
@@ -0,0 +1,354 @@
+import argparse
+import atexit
+import datetime
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import urllib.parse
+
+from entry_import import SQL_INSERT_EVENT_WITH_ID, SQL_INSERT_HEAT_WITH_ID, SQL_INSERT_LANE_WITH_ID, SQL_INSERT_TEAM_WITH_ID
+from meet_store import SQL_INTERN_SWIMMER, MeetStore, get_store
+
+
+# A journal directory holds append-only segments and database checkpoints:
+#
+#     journal-<n>.jsonl         one JSON array per line: [seq, unix_time, op, rows]
+#     checkpoint-<seq>.db       online backup of the meet, taken at journal record <seq>
+#
+# ops are row-level so replay doesn't depend on how a change was made:
+#
+#     events        [[id, gender, age_min, age_max, distance, stroke], ...]
+#     heats         [[id, event_id, heat_num], ...]
+#     lanes         [[id, heat_id, lane_num, swimmer_name], ...]   (names are interned into swimmers on replay)
+#     lane_times    [[lane_id, timer1, timer2, timer3]]
+#     heat_times    [[heat_id, lane_num, timer1, timer2, timer3], ...]
+#     teams         [[id, name], ...]
+#     lane_teams    [[lane_id, team_id], ...]
+#     points_table  [[points for 1st, 2nd, ...]]
+#     metadata      [[key, value], ...]
+#
+# Every record is written by the transaction that made the change, together
+# with journal_state.seq, so a checkpoint (or any copy of the database) knows
+# exactly which records it already contains. seq numbers are increasing but
+# may have gaps where a transaction rolled back.
+SEGMENT_PATTERN = re.compile(r"journal-(\d+)\.jsonl$")
+CHECKPOINT_PATTERN = re.compile(r"checkpoint-(\d+)\.db$")
+COMPACTED_MARKER = "compacted_through"
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_KEEP_CHECKPOINTS = 3
+REPLAY_BATCH = 500
+
+
+def default_journal_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "journal")
+
+def _segments(journal_dir: str) -> list:
+    found = []
+    for name in os.listdir(journal_dir):
+        match = SEGMENT_PATTERN.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(journal_dir, name)))
+    return sorted(found)
+def _checkpoints(journal_dir: str) -> list:
+    """(seq, recorded_at, path) of every checkpoint, oldest first."""
+    found = []
+    for name in os.listdir(journal_dir):
+        match = CHECKPOINT_PATTERN.match(name)
+        if match:
+            path = os.path.join(journal_dir, name)
+            conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True)
+            try:
+                seq, recorded_at = conn.execute("SELECT seq, recorded_at FROM journal_state WHERE id = 1").fetchone()
+            finally:
+                conn.close()
+            found.append((seq, recorded_at, path))
+    return sorted(found)
+def read_records(journal_dir: str) -> list:
+    """Every record in the journal, in seq order. A torn last line from a crash is ignored."""
+    records = {}
+    for _, path in _segments(journal_dir):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[record[0]] = record
+    return [records[seq] for seq in sorted(records)]
+def _compacted_through(journal_dir: str) -> int:
+    try:
+        with open(os.path.join(journal_dir, COMPACTED_MARKER), "r") as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+class MeetJournal:
+    """
+    Append-only, fsync-batched journal of every change made through a MeetStore.
+
+    A flusher thread writes and fsyncs committed records every flush_interval
+    seconds, and every checkpoint_every records takes a checkpoint and compacts
+    the journal down to keep_checkpoints checkpoints.
+    """
+
+    def __init__(self, journal_dir: str, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 checkpoint_every: int | None = 5000, keep_checkpoints: int = DEFAULT_KEEP_CHECKPOINTS):
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.keep_checkpoints = keep_checkpoints
+        self.db_path = None
+        self._seq = 0
+        self._seq_lock = threading.Lock()
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._file = None
+        self._since_checkpoint = 0
+        self._stop = threading.Event()
+        self._thread = None
+        os.makedirs(journal_dir, exist_ok=True)
+
+    def attach(self, db_path: str, db_seq: int):
+        """Called by MeetStore.attach_journal; continues numbering after the database and the journal."""
+        self.db_path = db_path
+        last = read_records(self.journal_dir)
+        with self._seq_lock:
+            self._seq = max(self._seq, db_seq, last[-1][0] if last else 0)
+        if self._thread is None:
+            self._open_segment()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="meet-journal", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # ----- write path -----
+
+    def make_record(self, op: str, rows: list) -> list:
+        with self._seq_lock:
+            self._seq += 1
+            return [self._seq, time.time(), op, rows]
+
+    def extend(self, records: list):
+        with self._buffer_lock:
+            self._buffer.extend(records)
+
+    def _open_segment(self):
+        # Segments are numbered in creation order; the records inside carry their own seq
+        existing = _segments(self.journal_dir)
+        number = existing[-1][0] + 1 if existing else 1
+        path = os.path.join(self.journal_dir, f"journal-{number:06d}.jsonl")
+        self._file = open(path, "a", encoding="utf-8")
+
+    def flush(self):
+        """Writes and fsyncs everything handed over so far."""
+        with self._write_lock:
+            with self._buffer_lock:
+                records, self._buffer = self._buffer, []
+            if not records or self._file is None:
+                return
+            self._file.write("".join(json.dumps(r, separators=(",", ":")) + "\n" for r in records))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._since_checkpoint += len(records)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.checkpoint_every and self._since_checkpoint >= self.checkpoint_every:
+                    self.checkpoint()
+            except Exception as e:
+                print(f"[JOURNAL] Error writing {self.journal_dir}: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ----- checkpoints -----
+
+    def checkpoint(self) -> str:
+        """Backs up the meet into the journal directory, starts a new segment and compacts. Returns the checkpoint path."""
+        self.flush()
+        temp_path = os.path.join(self.journal_dir, f"checkpoint.tmp-{os.getpid()}")
+        source = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro", uri=True)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target)
+            # A checkpoint is a single self-contained file, not a WAL database
+            target.execute("PRAGMA journal_mode=DELETE")
+            seq = target.execute("SELECT seq FROM journal_state WHERE id = 1").fetchone()[0]
+        finally:
+            target.close()
+            source.close()
+        path = os.path.join(self.journal_dir, f"checkpoint-{seq:010d}.db")
+        os.replace(temp_path, path)
+
+        with self._write_lock:
+            self._since_checkpoint = 0
+            if self._file is not None:
+                self._file.close()
+                self._open_segment()
+        compact_journal(self.journal_dir, self.keep_checkpoints)
+        print(f"[JOURNAL] Checkpoint at record {seq}: {path}")
+        return path
+
+
+def compact_journal(journal_dir: str, keep_checkpoints: int = DEFAULT_KEEP_CHECKPOINTS) -> dict:
+    """
+    Keeps the newest keep_checkpoints checkpoints and deletes the older ones,
+    plus every closed segment whose records are all covered by the oldest
+    checkpoint kept. Returns what was removed.
+    """
+    checkpoints = _checkpoints(journal_dir)
+    removed = {"checkpoints": 0, "segments": 0}
+    if not checkpoints:
+        return removed
+    for _, _, path in checkpoints[:-keep_checkpoints]:
+        os.remove(path)
+        removed["checkpoints"] += 1
+    oldest_kept = checkpoints[-keep_checkpoints:][0][0]
+
+    segments = _segments(journal_dir)
+    # The newest segment may still be open for writing
+    for _, path in segments[:-1]:
+        with open(path, "r", encoding="utf-8") as f:
+            seqs = [json.loads(line)[0] for line in f if line.strip()]
+        if not seqs or max(seqs) <= oldest_kept:
+            os.remove(path)
+            removed["segments"] += 1
+    if removed["segments"]:
+        with open(os.path.join(journal_dir, COMPACTED_MARKER), "w") as f:
+            f.write(str(max(oldest_kept, _compacted_through(journal_dir))))
+    return removed
+
+
+def _apply(store: MeetStore, conn: sqlite3.Connection, op: str, rows: list):
+    if op == "events":
+        conn.executemany(SQL_INSERT_EVENT_WITH_ID, rows)
+    elif op == "heats":
+        conn.executemany(SQL_INSERT_HEAT_WITH_ID, rows)
+    elif op == "lanes":
+        conn.executemany(SQL_INTERN_SWIMMER, [(name, name) for _, _, _, name in rows])
+        conn.executemany(SQL_INSERT_LANE_WITH_ID, rows)
+    elif op == "lane_times":
+        for lane_id, timer1, timer2, timer3 in rows:
+            store.update_lane_times(lane_id, timer1, timer2, timer3)
+    elif op == "heat_times":
+        by_heat = {}
+        for heat_id, lane_num, timer1, timer2, timer3 in rows:
+            by_heat.setdefault(heat_id, {})[lane_num] = (timer1, timer2, timer3)
+        for heat_id, lane_times in by_heat.items():
+            store.update_heat_times(heat_id, lane_times)
+    elif op == "teams":
+        conn.executemany(SQL_INSERT_TEAM_WITH_ID, rows)
+    elif op == "lane_teams":
+        store.set_lane_teams(dict(rows))
+    elif op == "points_table":
+        store.set_points_table(rows[0])
+    elif op == "metadata":
+        store.set_metadata(dict(rows))
+    else:
+        raise ValueError(f"Unknown journal op {op!r}")
+
+def replay_journal(journal_dir: str, new_db_path: str, until_time: float | None = None,
+                   until_seq: int | None = None) -> dict:
+    """
+    Rebuilds a meet database at new_db_path as it stood at until_time (unix
+    seconds) or after record until_seq, or as of the last record by default.
+
+    Starts from the newest checkpoint at or before that point and applies the
+    journal records after it, using the same store methods as the time desk so
+    standings, change log and search index come out identical. Raises
+    FileExistsError if new_db_path exists and ValueError if the requested
+    point is older than the oldest checkpoint left after compaction.
+    """
+    if os.path.exists(new_db_path):
+        raise FileExistsError(f"Refusing to overwrite existing database: {new_db_path}")
+
+    def wanted(seq: int, recorded_at: float) -> bool:
+        return (until_seq is None or seq <= until_seq) and (until_time is None or recorded_at <= until_time)
+
+    base = None
+    for seq, recorded_at, path in _checkpoints(journal_dir):
+        if wanted(seq, recorded_at):
+            base = (seq, path)
+    start_seq = base[0] if base else 0
+    if start_seq < _compacted_through(journal_dir):
+        raise ValueError(f"The journal was compacted through record {_compacted_through(journal_dir)}; "
+                         "that point in time can no longer be rebuilt")
+
+    directory = os.path.dirname(new_db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    if base:
+        source = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(base[1]))}?mode=ro", uri=True)
+        target = sqlite3.connect(new_db_path)
+        source.backup(target)
+        target.close()
+        source.close()
+
+    store = MeetStore(new_db_path)
+    store.initialize_schema()
+    applied = 0
+    last = (start_seq, 0.0)
+    try:
+        records = [r for r in read_records(journal_dir) if r[0] > start_seq and wanted(r[0], r[1])]
+        for i in range(0, len(records), REPLAY_BATCH):
+            with store.transaction() as conn:
+                for seq, recorded_at, op, rows in records[i:i + REPLAY_BATCH]:
+                    _apply(store, conn, op, rows)
+                    last = (seq, recorded_at)
+                    applied += 1
+                store.set_journal_state(*last)
+    finally:
+        store.close()
+
+    summary = {"checkpoint": base[1] if base else None, "records_applied": applied, "last_seq": last[0],
+               "last_recorded_at": last[1]}
+    print(f"[JOURNAL] Rebuilt {new_db_path} from {summary['checkpoint'] or 'an empty meet'} "
+          f"plus {applied} journal records (through record {last[0]})")
+    return summary
+
+
+def enable_journal(db_path: str, journal_dir: str | None = None, **options) -> MeetJournal:
+    """Starts journaling every change made through get_store(db_path); the journal lives next to the meet by default."""
+    journal = MeetJournal(journal_dir or default_journal_dir(db_path), **options)
+    get_store(db_path).attach_journal(journal)
+    return journal
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Meet journal tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay = commands.add_parser("replay", help="rebuild a meet database from the journal")
+    replay.add_argument("journal_dir")
+    replay.add_argument("new_db")
+    replay.add_argument("--until", help="local time, e.g. 2025-08-06T10:42:00")
+    replay.add_argument("--seq", type=int, help="last journal record to apply")
+    checkpoint = commands.add_parser("checkpoint", help="checkpoint a meet and compact its journal")
+    checkpoint.add_argument("db")
+    checkpoint.add_argument("journal_dir", nargs="?")
+    checkpoint.add_argument("--keep", type=int, default=DEFAULT_KEEP_CHECKPOINTS)
+    args = parser.parse_args()
+
+    if args.command == "replay":
+        until = datetime.datetime.fromisoformat(args.until).timestamp() if args.until else None
+        replay_journal(args.journal_dir, args.new_db, until_time=until, until_seq=args.seq)
+    else:
+        journal = MeetJournal(args.journal_dir or default_journal_dir(args.db), checkpoint_every=None,
+                              keep_checkpoints=args.keep)
+        journal.db_path = args.db
+        journal.checkpoint()
+    sys.exit(0)
@@ -0,0 +1,368 @@
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+# Counters and latency histograms for the meet's hot paths.
+#
+# Off by default; switch on with enable() or SWIM_MEET_METRICS=1. While off,
+# an instrumented function costs one global check, the store installs no
+# SQLite trace callback and nothing is locked or allocated.
+#
+# Metrics live in the process that recorded them. With an export_dir every
+# process (the time desk and each web worker) also writes its snapshot to
+# <export_dir>/<pid>-<start>.json every few seconds, and collect() adds them
+# all up, so the web UI's /metrics shows the whole meet. The start stamp keeps
+# a reused pid from overwriting an exited worker's totals; exited workers'
+# snapshots are folded into retired.json so the directory doesn't grow.
+enabled = os.environ.get("SWIM_MEET_METRICS", "") not in ("", "0")
+export_dir = None
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+EXPORT_INTERVAL = 5.0
+RETIRED_NAME = "retired.json"
+RETIRE_LOCK_NAME = "retire.lock"
+RETIRE_LOCK_TIMEOUT = 60.0  # a lock older than this was left by a process that died holding it
+METRICS = {
+    "swim_meet_calls_total": ("counter", "Meet API calls"),
+    "swim_meet_call_duration_seconds": ("histogram", "Meet API call latency"),
+    "swim_meet_sql_statements_total": ("counter", "SQLite statements executed, by the API call or request that ran them"),
+    "swim_meet_sql_rows_total": ("counter", "Rows returned by meet store queries"),
+    "swim_meet_timesheet_render_seconds": ("histogram", "Time to draw and save one timesheet"),
+    "swim_meet_http_requests_total": ("counter", "Web UI requests"),
+    "swim_meet_http_request_duration_seconds": ("histogram", "Web UI request latency, up to the first byte"),
+}
+
+_lock = threading.Lock()
+_counters = {}      # (name, labels) -> value
+_histograms = {}    # (name, labels) -> [count per bucket..., +Inf count, sum]
+class _CallContext(threading.local):
+    call = None  # a class default, so reading it never goes through AttributeError
+
+
+_local = _CallContext()
+_exporter = None
+_identity = None    # (pid, start stamp) that names this process's snapshot file
+
+
+def enable(directory: str | None = None):
+    """Starts recording; with directory, also exports this process's snapshot there."""
+    global enabled, export_dir, _exporter
+    enabled = True
+    if directory:
+        export_dir = os.path.abspath(directory)
+        os.makedirs(export_dir, exist_ok=True)
+        if _exporter is None:
+            _exporter = threading.Thread(target=_export_loop, name="metrics-export", daemon=True)
+            _exporter.start()
+            atexit.register(_export)
+
+def enable_from_env():
+    """For worker processes: honours SWIM_MEET_METRICS and SWIM_MEET_METRICS_DIR set by the parent."""
+    if enabled:
+        enable(os.environ.get("SWIM_MEET_METRICS_DIR"))
+
+def disable():
+    """Stops recording and exporting; what was recorded so far is kept."""
+    global enabled, export_dir
+    enabled = False
+    export_dir = None
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def default_metrics_dir(db_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(db_path)), "metrics")
+
+# ----- recording -----
+
+def _labels(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+def inc(name: str, amount: float = 1, **labels):
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name: str, seconds: float, **labels):
+    if not enabled:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                histogram[i] += 1
+                break
+        else:
+            histogram[len(LATENCY_BUCKETS)] += 1
+        histogram[-1] += seconds
+
+def current_call() -> str:
+    """The API call or web endpoint running on this thread, for attributing SQL work."""
+    return _local.call or "other"
+
+def begin_call(name: str) -> tuple:
+    """Attributes SQL statements on this thread to name until end_call(); returns the token for it."""
+    previous = _local.call
+    _local.call = name
+    return previous, time.perf_counter()
+
+def end_call(token: tuple, metric: str, **labels) -> float:
+    previous, start = token
+    _local.call = previous
+    elapsed = time.perf_counter() - start
+    observe(metric, elapsed, **labels)
+    return elapsed
+
+@contextmanager
+def call(name: str, metric: str = "swim_meet_call_duration_seconds", **labels):
+    """Times the block into metric and attributes SQL statements run inside it to name."""
+    if not enabled:
+        yield
+        return
+    token = begin_call(name)
+    try:
+        yield
+    finally:
+        end_call(token, metric, **labels)
+
+def _add(name: str, amount: float):
+    # Fast path for the per-statement and per-row counters: one label, no sorting
+    key = (name, (("function", _local.call or "other"),))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def count_statement(sql: str):
+    # SQLite trace callback; statements run by triggers arrive as "-- TRIGGER ..." and are part of their caller
+    if enabled and not sql.startswith("--"):
+        _add("swim_meet_sql_statements_total", 1)
+
+def count_rows(rows: int):
+    if enabled:
+        _add("swim_meet_sql_rows_total", rows)
+
+def instrument(function):
+    """Counts and times every call of function while metrics are on."""
+    name = function.__name__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not enabled:
+            return function(*args, **kwargs)
+        inc("swim_meet_calls_total", function=name)
+        with call(name, function=name):
+            return function(*args, **kwargs)
+    return wrapper
+
+_CO_GENERATOR = 0x20  # inspect.CO_GENERATOR
+
+def instrument_module(namespace: dict, exclude=()):
+    """Instruments every public, non-generator function defined in the module whose globals() is namespace."""
+    module = namespace["__name__"]
+    for name, value in list(namespace.items()):
+        # types rather than inspect, which would add a good part of create_meet_api's import time
+        if (isinstance(value, types.FunctionType) and value.__module__ == module and not name.startswith("_")
+                and name not in exclude and not value.__code__.co_flags & _CO_GENERATOR):
+            namespace[name] = instrument(value)
+
+# ----- snapshots -----
+
+def snapshot() -> dict:
+    """This process's metrics as plain JSON-able data."""
+    with _lock:
+        counters = [[name, dict(labels), value] for (name, labels), value in _counters.items()]
+        histograms = [[name, dict(labels), list(values)] for (name, labels), values in _histograms.items()]
+    return {"pid": os.getpid(), "enabled": enabled, "taken_at": time.time(), "buckets": list(LATENCY_BUCKETS),
+            "counters": counters, "histograms": histograms}
+
+def _snapshot_name() -> str:
+    global _identity
+    # A forked child gets a new pid, and so a name of its own
+    if _identity is None or _identity[0] != os.getpid():
+        _identity = (os.getpid(), time.time_ns())
+    return f"{_identity[0]}-{_identity[1]}.json"
+
+def _snapshot_pid(name: str) -> int | None:
+    try:
+        return int(name[:-len(".json")].split("-")[0])
+    except ValueError:
+        return None
+
+def _process_alive(pid: int) -> bool:
+    if os.name == "nt":
+        return True  # os.kill would terminate it; snapshots are just never retired there
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+def _write_json(path: str, data: dict):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+def _read_json(path: str) -> dict | None:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def write_snapshot():
+    if export_dir is None:
+        return
+    _write_json(os.path.join(export_dir, _snapshot_name()), snapshot())
+    retire_exited(export_dir)
+
+def retire_exited(directory: str) -> int:
+    """
+    Folds the snapshots of processes that have exited into retired.json and
+    deletes them; returns how many. One process does it at a time (the others
+    skip the round), and retired.json names the files it already holds, so a
+    crash between writing it and deleting them never counts them twice.
+    """
+    lock_path = os.path.join(directory, RETIRE_LOCK_NAME)
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock_path) > RETIRE_LOCK_TIMEOUT:
+                os.remove(lock_path)
+        except OSError:
+            pass
+        return 0
+    try:
+        os.close(fd)
+        retired_path = os.path.join(directory, RETIRED_NAME)
+        retired = _read_json(retired_path) or {"pid": None, "buckets": list(LATENCY_BUCKETS),
+                                               "counters": [], "histograms": [], "retired": []}
+        present = set(os.listdir(directory))
+        exited = []
+        for name in sorted(present):
+            pid = _snapshot_pid(name) if name.endswith(".json") and name != RETIRED_NAME else None
+            if pid is not None and name not in retired["retired"] and not _process_alive(pid):
+                snap = _read_json(os.path.join(directory, name))
+                if snap is not None and snap.get("buckets") == retired["buckets"]:
+                    exited.append((name, snap))
+        if not exited:
+            return 0
+        counters, histograms = _merge([retired] + [snap for _, snap in exited])
+        retired.update(counters=_listed(counters), histograms=_listed(histograms), taken_at=time.time(),
+                       retired=[n for n in retired["retired"] if n in present] + [name for name, _ in exited])
+        _write_json(retired_path, retired)
+        for name, _ in exited:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+        return len(exited)
+    finally:
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+def _export():
+    try:
+        write_snapshot()
+    except OSError as e:
+        print(f"[METRICS] Could not write snapshot to {export_dir}: {e}")
+def _export_loop():
+    while True:
+        time.sleep(EXPORT_INTERVAL)
+        _export()
+
+def collect(directory: str | None = None) -> dict:
+    """
+    Adds up this process's live metrics and every other process's snapshot
+    in directory (export_dir by default). Processes that have exited keep
+    their last snapshot, so totals never go backwards when a worker restarts.
+    """
+    own = snapshot()
+    snapshots = [own]
+    directory = directory or export_dir
+    if directory and os.path.isdir(directory):
+        own_name = _snapshot_name()
+        found = {}
+        for name in os.listdir(directory):
+            if name.endswith(".json") and name not in (own_name, RETIRED_NAME):
+                snap = _read_json(os.path.join(directory, name))
+                if snap is not None:
+                    found[name] = snap
+        # Read last: a snapshot retired meanwhile is either still listed here or already gone
+        retired = _read_json(os.path.join(directory, RETIRED_NAME))
+        if retired is not None:
+            snapshots.append(retired)
+            found = {name: snap for name, snap in found.items() if name not in retired.get("retired", ())}
+        snapshots.extend(found.values())
+
+    counters, histograms = _merge([snap for snap in snapshots if snap.get("buckets") == own["buckets"]])
+    return {"enabled": enabled, "taken_at": own["taken_at"],
+            "processes": [s["pid"] for s in snapshots if s.get("pid") is not None],
+            "buckets": own["buckets"], "counters": _listed(counters), "histograms": _listed(histograms)}
+
+def _merge(snapshots: list) -> tuple:
+    counters = {}
+    histograms = {}
+    for snap in snapshots:
+        for name, labels, value in snap["counters"]:
+            key = (name, _labels(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snap["histograms"]:
+            key = (name, _labels(labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                total[i] += value
+    return counters, histograms
+
+def _listed(merged: dict) -> list:
+    return [[name, dict(labels), value] for (name, labels), value in sorted(merged.items())]
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+def _format_value(value) -> str:
+    # Exact, unlike :g, which turns a counter of 1234567 into 1.23457e+06
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+def prometheus_text(data: dict | None = None) -> str:
+    """Prometheus text exposition (format 0.0.4) of collect()."""
+    data = data or collect()
+    samples = {}
+    for name, labels, value in data["counters"]:
+        samples.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for name, labels, values in data["histograms"]:
+        lines = samples.setdefault(name, [])
+        cumulative = 0
+        for bound, count in zip([*data["buckets"], "+Inf"], values[:-1]):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': f'{bound:g}' if bound != '+Inf' else bound})} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(values[-1])}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+    out = []
+    for name in sorted(samples):
+        kind, description = METRICS.get(name, ("untyped", name))
+        out.append(f"# HELP {name} {description}")
+        out.append(f"# TYPE {name} {kind}")
+        out.extend(samples[name])
+    return "\n".join(out) + "\n"
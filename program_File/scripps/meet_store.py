@@ -0,0 +1,898 @@
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import meet_metrics
+from schema_migrations import LATEST_VERSION, create_search_index, get_schema_version, migrate, swimmer_key
+
+
+# Every statement lives here as a constant string so sqlite3's per-connection
+# statement cache (keyed on the SQL text) hands back the already prepared
+# statement on every call after the first one.
+SQL_CREATE_EVENT = """
+    INSERT INTO events (gender, age_min, age_max, distance, stroke)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_ADD_HEAT = """
+    INSERT INTO heats (event_id, heat_num)
+    VALUES (?, ?)
+"""
+# Swimmers are interned: a lane stores the id of its swimmer, and a name that
+# folds to the same swimmer_key as one already entered (case, extra spaces)
+# is the same swimmer under the first spelling seen.
+SQL_INTERN_SWIMMER = """
+    INSERT INTO swimmers (name, name_key) VALUES (?, swimmer_key(?))
+    ON CONFLICT(name_key) DO NOTHING
+"""
+SQL_SWIMMER_ID_FOR_NAME = "(SELECT id FROM swimmers WHERE name_key = swimmer_key(?))"
+SQL_ADD_SWIMMER_TO_LANE = f"""
+    INSERT INTO lanes (heat_id, lane_num, swimmer_id, timer1_time, timer2_time, timer3_time, total_time)
+    VALUES (?, ?, {SQL_SWIMMER_ID_FOR_NAME}, ?, ?, ?, ?)
+"""
+SQL_GET_SWIMMER_ID = "SELECT id FROM swimmers WHERE name_key = ?"
+SQL_GET_SWIMMER = "SELECT id, name FROM swimmers WHERE id = ?"
+SQL_LIST_SWIMMERS = "SELECT id, name FROM swimmers ORDER BY name_key"
+SQL_GET_SWIMMER_ENTRIES = """
+    SELECT lanes.id, heats.event_id, heats.heat_num, lanes.lane_num, lanes.total_time, event_standings.place
+    FROM lanes
+    JOIN heats ON lanes.heat_id = heats.id
+    LEFT JOIN event_standings ON event_standings.lane_id = lanes.id
+    WHERE lanes.swimmer_id = ?
+    ORDER BY heats.event_id, heats.heat_num
+"""
+SQL_UPDATE_LANE_TIMES = """
+    UPDATE lanes
+    SET timer1_time = ?, timer2_time = ?, timer3_time = ?, total_time = ?
+    WHERE id = ?
+"""
+SQL_UPDATE_LANE_TIMES_IN_HEAT = """
+    UPDATE lanes
+    SET timer1_time = ?, timer2_time = ?, timer3_time = ?, total_time = ?
+    WHERE heat_id = ? AND lane_num = ?
+"""
+SQL_GET_LANE_NUMS_IN_HEAT = "SELECT lane_num FROM lanes WHERE heat_id = ?"
+SQL_GET_HEAT_STANDINGS = """
+    SELECT RANK() OVER (ORDER BY total_time) AS place, lane_num, swimmers.name, total_time
+    FROM lanes
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE heat_id = ? AND total_time IS NOT NULL
+    ORDER BY place, lane_num
+"""
+SQL_GET_ALL_EVENTS = "SELECT * FROM events"
+SQL_GET_EVENT = "SELECT * FROM events WHERE id = ?"
+SQL_GET_HEATS_FOR_EVENT = "SELECT * FROM heats WHERE event_id = ?"
+SQL_GET_SWIMMERS_IN_HEAT = """
+    SELECT lane_num, swimmers.name, timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE heat_id = ?
+    ORDER BY lane_num
+"""
+SQL_GET_FASTEST_SWIMMER_IN_EVENT = """
+    SELECT swimmers.name, event_standings.total_time, heat_num, event_standings.lane_num,
+           event_standings.timer1_time, event_standings.timer2_time, event_standings.timer3_time
+    FROM event_standings
+    JOIN lanes ON lanes.id = event_standings.lane_id
+    JOIN swimmers ON swimmers.id = lanes.swimmer_id
+    WHERE event_standings.event_id = ?
+    ORDER BY position
+    LIMIT 1
+"""
+SQL_LIST_ALL_SWIMMERS = """
+    SELECT swimmers.name, heats.heat_num, lanes.lane_num, events.id AS event_id,
+           events.stroke, timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    JOIN heats ON lanes.heat_id = heats.id
+    JOIN events ON heats.event_id = events.id
+    ORDER BY event_id, heats.heat_num, lanes.lane_num
+"""
+SQL_LIST_SWIMMERS_IN_EVENT = """
+    SELECT swimmers.name, heats.heat_num, lanes.lane_num,
+           timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes
+    JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    JOIN heats ON lanes.heat_id = heats.id
+    WHERE heats.event_id = ?
+    ORDER BY heats.heat_num, lanes.lane_num
+"""
+SQL_GET_EVENT_RESULTS = """
+    SELECT swimmers.name, heat_num, event_standings.lane_num,
+           event_standings.timer1_time, event_standings.timer2_time, event_standings.timer3_time,
+           event_standings.total_time
+    FROM event_standings
+    JOIN lanes ON lanes.id = event_standings.lane_id
+    JOIN swimmers ON swimmers.id = lanes.swimmer_id
+    WHERE event_standings.event_id = ?
+    ORDER BY position
+"""
+SQL_GET_EVENT_STANDINGS = """
+    SELECT place, swimmers.name, heat_num, event_standings.lane_num, event_standings.total_time
+    FROM event_standings
+    JOIN lanes ON lanes.id = event_standings.lane_id
+    JOIN swimmers ON swimmers.id = lanes.swimmer_id
+    WHERE event_standings.event_id = ?
+    ORDER BY position
+"""
+SQL_GET_EVENT_LANE_LAYOUT = """
+    SELECT heats.id, heats.heat_num, lanes.lane_num, lanes.id, swimmers.name
+    FROM heats
+    LEFT JOIN lanes ON lanes.heat_id = heats.id
+    LEFT JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE heats.event_id = ?
+    ORDER BY heats.heat_num, lanes.lane_num
+"""
+SQL_GET_LANE_ID_BY_HEAT_AND_LANE = "SELECT id FROM lanes WHERE heat_id = ? AND lane_num = ?"
+SQL_GET_EVENT_ID_FROM_HEAT = "SELECT event_id FROM heats WHERE id = ?"
+SQL_GET_EVENT_ID_FROM_LANE = "SELECT heats.event_id FROM lanes JOIN heats ON lanes.heat_id = heats.id WHERE lanes.id = ?"
+SQL_GET_SWIMMER_NAME_FROM_LANE = "SELECT swimmers.name FROM lanes JOIN swimmers ON lanes.swimmer_id = swimmers.id WHERE lanes.id = ?"
+SQL_GET_HEAT_NUMBER_FROM_ID = "SELECT heat_num FROM heats WHERE id = ?"
+SQL_GET_NUMBER_OF_HEATS_FOR_EVENT = "SELECT COUNT(*) FROM heats WHERE event_id = ?"
+SQL_GET_TOTAL_NUMBER_OF_EVENTS = "SELECT COUNT(*) FROM events"
+
+# event_standings is recomputed from lanes one event at a time, in the same
+# transaction as the time write that changed it. The live ranking is also what
+# check_standings() compares the materialized rows against. Names are not kept
+# here; readers join swimmers through the lane.
+STANDINGS_COLUMNS = """event_id, position, place, lane_id, heat_num, lane_num,
+    timer1_time, timer2_time, timer3_time, total_time"""
+SQL_LIVE_STANDINGS = """
+    SELECT heats.event_id,
+           ROW_NUMBER() OVER (PARTITION BY heats.event_id ORDER BY total_time, heats.heat_num, lanes.lane_num),
+           RANK() OVER (PARTITION BY heats.event_id ORDER BY total_time),
+           lanes.id, heats.heat_num, lanes.lane_num,
+           timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes
+    JOIN heats ON lanes.heat_id = heats.id
+    WHERE total_time IS NOT NULL
+"""
+SQL_LIVE_EVENT_STANDINGS = SQL_LIVE_STANDINGS + "    AND heats.event_id = ?\n"
+SQL_CLEAR_EVENT_STANDINGS = "DELETE FROM event_standings WHERE event_id = ?"
+SQL_REFRESH_EVENT_STANDINGS = f"INSERT INTO event_standings ({STANDINGS_COLUMNS})" + SQL_LIVE_EVENT_STANDINGS
+SQL_CLEAR_ALL_STANDINGS = "DELETE FROM event_standings"
+SQL_REFRESH_ALL_STANDINGS = f"INSERT INTO event_standings ({STANDINGS_COLUMNS})" + SQL_LIVE_STANDINGS
+SQL_LOG_EVENT_CHANGE = """
+    INSERT INTO change_log (event_id, seq, changed_at)
+    VALUES (?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), ?)
+    ON CONFLICT(event_id) DO UPDATE SET seq = excluded.seq, changed_at = excluded.changed_at
+"""
+SQL_LOG_ALL_EVENT_CHANGES = """
+    INSERT INTO change_log (event_id, seq, changed_at)
+    SELECT id, (SELECT COALESCE(MAX(seq), 0) FROM change_log) + ROW_NUMBER() OVER (ORDER BY id), ?
+    FROM events WHERE true
+    ON CONFLICT(event_id) DO UPDATE SET seq = excluded.seq, changed_at = excluded.changed_at
+"""
+SQL_GET_CHANGES_SINCE = "SELECT event_id, seq, changed_at FROM change_log WHERE seq > ? ORDER BY seq"
+SQL_SEARCH = """
+    SELECT lanes.id, swimmers.name, heats.event_id, search_index.event_name,
+           heats.heat_num, lanes.lane_num, lanes.total_time, event_standings.place
+    FROM search_index
+    JOIN lanes ON lanes.id = search_index.rowid
+    JOIN swimmers ON swimmers.id = lanes.swimmer_id
+    JOIN heats ON lanes.heat_id = heats.id
+    LEFT JOIN event_standings ON event_standings.lane_id = lanes.id
+    WHERE search_index MATCH ? AND search_index.rowid > ?
+    ORDER BY search_index.rowid
+    LIMIT ?
+"""
+SQL_GET_JOURNAL_STATE = "SELECT seq, recorded_at FROM journal_state WHERE id = 1"
+SQL_SET_JOURNAL_STATE = "UPDATE journal_state SET seq = ?, recorded_at = ? WHERE id = 1"
+SQL_GET_MATERIALIZED_STANDINGS = f"SELECT {STANDINGS_COLUMNS} FROM event_standings ORDER BY event_id, position"
+
+# Team points come from event_standings, so they move with it. Swimmers tied
+# for a place share the points of the places they cover (a tie for 2nd with
+# 5-3-1 scoring gives each (3 + 1) / 2). After each event refresh the event's
+# old contribution is taken off team_scores and the new one added, so a time
+# write costs one event's rows, not a pass over the meet.
+SQL_LIVE_TEAM_POINTS = """
+    WITH placed AS (
+        SELECT event_standings.event_id, event_standings.place, lanes.team_id,
+               COUNT(*) OVER (PARTITION BY event_standings.event_id, event_standings.place) AS tied
+        FROM event_standings
+        JOIN lanes ON lanes.id = event_standings.lane_id
+        {where}
+    )
+    SELECT event_id, team_id,
+           SUM((SELECT COALESCE(SUM(points), 0) FROM scoring_points
+                WHERE scoring_points.place BETWEEN placed.place AND placed.place + placed.tied - 1) / tied)
+    FROM placed
+    WHERE team_id IS NOT NULL
+    GROUP BY event_id, team_id
+"""
+SQL_LIVE_ALL_TEAM_POINTS = SQL_LIVE_TEAM_POINTS.format(where="")
+SQL_LIVE_EVENT_TEAM_POINTS = SQL_LIVE_TEAM_POINTS.format(where="WHERE event_standings.event_id = ?")
+SQL_ADD_EVENT_TEAM_POINTS = """
+    INSERT INTO team_scores (team_id, points)
+    SELECT team_id, ? * points FROM team_event_points WHERE event_id = ?
+    ON CONFLICT(team_id) DO UPDATE SET points = points + excluded.points
+"""
+SQL_CLEAR_EVENT_TEAM_POINTS = "DELETE FROM team_event_points WHERE event_id = ?"
+SQL_REFRESH_EVENT_TEAM_POINTS = "INSERT INTO team_event_points (event_id, team_id, points)" + SQL_LIVE_EVENT_TEAM_POINTS
+SQL_CLEAR_ALL_TEAM_POINTS = "DELETE FROM team_event_points"
+SQL_REFRESH_ALL_TEAM_POINTS = "INSERT INTO team_event_points (event_id, team_id, points)" + SQL_LIVE_ALL_TEAM_POINTS
+SQL_CLEAR_TEAM_SCORES = "DELETE FROM team_scores"
+SQL_REFRESH_TEAM_SCORES = """
+    INSERT INTO team_scores (team_id, points)
+    SELECT team_id, SUM(points) FROM team_event_points GROUP BY team_id
+"""
+SQL_GET_MATERIALIZED_TEAM_POINTS = "SELECT event_id, team_id, points FROM team_event_points"
+SQL_GET_TEAM_ID = "SELECT id FROM teams WHERE name = ?"
+SQL_ADD_TEAM = "INSERT INTO teams (name) VALUES (?)"
+SQL_SET_LANE_TEAM = "UPDATE lanes SET team_id = ? WHERE id = ?"
+SQL_GET_EVENT_IDS_FOR_TIMED_LANES = """
+    SELECT DISTINCT heats.event_id FROM lanes JOIN heats ON lanes.heat_id = heats.id
+    WHERE lanes.id IN ({placeholders}) AND lanes.total_time IS NOT NULL
+"""
+SQL_GET_TEAM_SCORES = """
+    SELECT teams.id, teams.name, COALESCE(team_scores.points, 0)
+    FROM teams
+    LEFT JOIN team_scores ON team_scores.team_id = teams.id
+    ORDER BY 3 DESC, teams.name
+"""
+SQL_GET_TEAM_EVENT_POINTS = """
+    SELECT teams.id, teams.name, team_event_points.points
+    FROM team_event_points
+    JOIN teams ON teams.id = team_event_points.team_id
+    WHERE team_event_points.event_id = ?
+    ORDER BY team_event_points.points DESC, teams.name
+"""
+SQL_GET_POINTS_TABLE = "SELECT points FROM scoring_points ORDER BY place"
+SQL_CLEAR_POINTS_TABLE = "DELETE FROM scoring_points"
+SQL_SET_POINTS = "INSERT INTO scoring_points (place, points) VALUES (?, ?)"
+
+# Metadata values are stored as JSON text. Writing a key stamps it with the
+# next metadata version, so one index read of the highest version tells
+# a reader (the results feed) whether to reload it.
+SQL_GET_METADATA = "SELECT value FROM meet_metadata WHERE key = ?"
+SQL_GET_ALL_METADATA = "SELECT key, value FROM meet_metadata"
+SQL_GET_METADATA_VERSION = "SELECT version, updated_at FROM meet_metadata ORDER BY version DESC LIMIT 1"
+SQL_SET_METADATA = """
+    INSERT INTO meet_metadata (key, value, version, updated_at)
+    VALUES (?, ?, (SELECT COALESCE(MAX(version), 0) + 1 FROM meet_metadata), ?)
+    ON CONFLICT(key) DO UPDATE SET value = excluded.value, version = excluded.version, updated_at = excluded.updated_at
+"""
+
+# Timers further apart than this (seconds) are flagged for the referee
+DEFAULT_DISAGREEMENT_THRESHOLD = 0.30
+
+
+def compute_total_time(timer1: float | None, timer2: float | None, timer3: float | None) -> float | None:
+    """
+    Official time for a lane: the average of whichever watches recorded a time.
+
+    With all three watches this is the same three-way average as always; with
+    one or two it is the average of those, and with none it is None.
+    """
+    times = [t for t in (timer1, timer2, timer3) if t is not None]
+    for t in times:
+        if t <= 0:
+            raise ValueError(f"Timer values must be positive seconds, got {t}")
+    if not times:
+        return None
+    return round(sum(times) / len(times), 3)
+def search_match_query(text: str) -> str | None:
+    """
+    FTS5 query for what someone typed: every word must match the start of a
+    word in the swimmer or event name ("jo free" finds "John ... freestyle").
+    Each word is quoted, so punctuation can't break the query syntax.
+    """
+    words = re.findall(r"\w+", text)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+def timer_spread(timer1: float | None, timer2: float | None, timer3: float | None) -> float:
+    times = [t for t in (timer1, timer2, timer3) if t is not None]
+    return round(max(times) - min(times), 3) if len(times) > 1 else 0.0
+
+
+def _setting_text(value) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"expected text, got {value!r}")
+    return value.strip()
+
+def _setting_date(value) -> str:
+    # Stored as an ISO date so it sorts and compares as text
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return datetime.date.fromisoformat(_setting_text(value)).isoformat()
+
+def _setting_course(value) -> str:
+    course = _setting_text(value).upper()
+    if course not in COURSES:
+        raise ValueError(f"expected one of {', '.join(COURSES)}, got {value!r}")
+    return course
+
+def _setting_pool_size(value) -> int:
+    if isinstance(value, bool) or int(value) != value or not 1 <= value <= POOL_MAX_LANES:
+        raise ValueError(f"expected a whole number of lanes from 1 to {POOL_MAX_LANES}, got {value!r}")
+    return int(value)
+
+def _setting_qr_format(value) -> str:
+    qr_format = _setting_text(value).lower()
+    if qr_format not in QR_FORMATS:
+        raise ValueError(f"expected one of {', '.join(QR_FORMATS)}, got {value!r}")
+    return qr_format
+
+def _setting_team_pair(value) -> list:
+    teams = [_setting_text(team) for team in value] if isinstance(value, (list, tuple)) else []
+    if len(teams) != 2 or not all(teams) or teams[0] == teams[1]:
+        raise ValueError(f"expected two different team names, got {value!r}")
+    return teams
+
+COURSES = ("SCY", "SCM", "LCM")
+# "legacy" is the original JSON lane payload that existing scanners read;
+# "compact" is the shorter SM1 payload from qr_payload, opted into per meet
+QR_FORMATS = ("legacy", "compact")
+POOL_MAX_LANES = 8  # lanes.lane_num CHECK in schema_migrations
+# Typed meet settings kept in meet_metadata: name -> (default, check). check
+# returns the value to store or raises ValueError; None puts back the default.
+MEET_SETTINGS = {
+    "meet_name": ("", _setting_text),
+    "venue": ("", _setting_text),
+    "meet_date": (None, _setting_date),
+    "course": ("SCM", _setting_course),
+    "pool_size": (POOL_MAX_LANES, _setting_pool_size),
+    "dual_meet": (None, _setting_team_pair),
+    "qr_format": ("legacy", _setting_qr_format),
+}
+
+
+class MeetStore:
+    """
+    Owns the SQLite connections for one meet database: one long-lived WAL
+    connection per thread, autocommit unless inside transaction(). A read_only
+    store opens with mode=ro and never migrates, so it can't take the write lock.
+    """
+
+    def __init__(self, db_path: str, cached_statements: int = 128, timeout: float = 30.0, read_only: bool = False):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.timeout = timeout
+        self.read_only = read_only
+        self.journal = None
+        self._lock = threading.Lock()
+        self._reset_pool()
+
+    def _reset_pool(self):
+        self._pid = os.getpid()
+        self._local = threading.local()
+        self._connections = []
+        self._migrated = False
+
+    def _open_connection(self) -> sqlite3.Connection:
+        if self.read_only:
+            # WAL mode is stored in the file, so a read-only connection picks it up as is
+            conn = sqlite3.connect(
+                f"file:{urllib.parse.quote(os.path.abspath(self.db_path))}?mode=ro",
+                uri=True,
+                timeout=self.timeout,
+                isolation_level=None,
+                cached_statements=self.cached_statements,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA query_only=ON")
+            conn.create_function("swimmer_key", 1, swimmer_key, deterministic=True)
+            return conn
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            isolation_level=None,
+            cached_statements=self.cached_statements,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("swimmer_key", 1, swimmer_key, deterministic=True)
+        return conn
+
+    def _prepare_schema(self, conn: sqlite3.Connection):
+        if not self.read_only:
+            migrate(conn)
+        elif get_schema_version(conn) < LATEST_VERSION:
+            raise RuntimeError(f"{self.db_path} is at schema version {get_schema_version(conn)}, "
+                               f"expected {LATEST_VERSION}; open it read-write once to upgrade it")
+
+    def connection(self) -> sqlite3.Connection:
+        # A forked child (e.g. a process pool worker) must not reuse the
+        # parent's connections, so start a fresh pool in the new process.
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset_pool()
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open_connection()
+            with self._lock:
+                # Older meet files are upgraded in place the first time they are opened
+                if not self._migrated:
+                    try:
+                        self._prepare_schema(conn)
+                    except Exception:
+                        conn.close()
+                        raise
+                    self._migrated = True
+                self._connections.append(conn)
+            self._local.conn = conn
+            self._local.depth = 0
+            self._local.traced = False
+        if self._local.traced is not meet_metrics.enabled:
+            # The trace callback is only installed while metrics are on, so it costs nothing otherwise
+            conn.set_trace_callback(meet_metrics.count_statement if meet_metrics.enabled else None)
+            self._local.traced = meet_metrics.enabled
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Groups every statement in the block into one write transaction (nestable)."""
+        conn = self.connection()
+        depth = self._local.depth
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.pending = []
+        else:
+            # A nested block that fails is undone on its own, without the outer block's work
+            conn.execute(f"SAVEPOINT sp_{depth}")
+        mark = len(self._local.pending)
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            del self._local.pending[mark:]
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO sp_{depth}")
+                conn.execute(f"RELEASE sp_{depth}")
+            raise
+        else:
+            self._local.depth -= 1
+            if depth > 0:
+                conn.execute(f"RELEASE sp_{depth}")
+                return
+            pending = self._local.pending
+            if pending:
+                conn.execute(SQL_SET_JOURNAL_STATE, (pending[-1][0], pending[-1][1]))
+            conn.execute("COMMIT")
+            if pending:
+                # Only committed changes reach the journal
+                self._local.pending = []
+                self.journal.extend(pending)
+
+    def close(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                for conn in self._connections:
+                    try:
+                        conn.close()
+                    except sqlite3.ProgrammingError:
+                        pass
+            self._reset_pool()
+
+    def attach_journal(self, journal):
+        """Records every change made through this store in journal (a meet_journal.MeetJournal) from now on."""
+        if self.read_only:
+            raise RuntimeError("A read-only store has nothing to journal")
+        seq, _ = self._fetchone(SQL_GET_JOURNAL_STATE)
+        journal.attach(self.db_path, seq)
+        self.journal = journal
+
+    def journal_rows(self, op: str, rows):
+        """
+        Journals rows written directly by the caller (e.g. a bulk import) inside
+        transaction(); op names the table, see meet_journal.
+        """
+        if self.journal is not None:
+            self._local.pending.append(self.journal.make_record(op, [list(row) for row in rows]))
+
+    def get_journal_state(self) -> tuple:
+        """(seq, recorded_at) of the last journal record applied to this database."""
+        return self._fetchone(SQL_GET_JOURNAL_STATE)
+
+    def set_journal_state(self, seq: int, recorded_at: float):
+        self.connection().execute(SQL_SET_JOURNAL_STATE, (seq, recorded_at))
+
+    def checkpoint(self):
+        """Folds the WAL back into the main database file (used before copying it)."""
+        self.connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def _fetchall(self, sql: str, params=()):
+        rows = self.connection().execute(sql, params).fetchall()
+        if meet_metrics.enabled:
+            meet_metrics.count_rows(len(rows))
+        return rows
+
+    def _fetchone(self, sql: str, params=()):
+        row = self.connection().execute(sql, params).fetchone()
+        if meet_metrics.enabled and row is not None:
+            meet_metrics.count_rows(1)
+        return row
+
+    def _scalar(self, sql: str, params=()):
+        result = self._fetchone(sql, params)
+        return result[0] if result else None
+
+    # ----- schema -----
+
+    def initialize_schema(self):
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection()
+
+    # ----- writes -----
+
+    def create_event(self, gender: str, age_min: int, age_max: int, distance: int, stroke: str) -> int:
+        with self.transaction() as conn:
+            event_id = conn.execute(SQL_CREATE_EVENT, (gender, age_min, age_max, distance, stroke)).lastrowid
+            self.journal_rows("events", [(event_id, gender, age_min, age_max, distance, stroke)])
+        return event_id
+
+    def add_heat(self, event_id: int, heat_num: int) -> int:
+        with self.transaction() as conn:
+            heat_id = conn.execute(SQL_ADD_HEAT, (event_id, heat_num)).lastrowid
+            self.journal_rows("heats", [(heat_id, event_id, heat_num)])
+        return heat_id
+
+    def add_swimmer_to_lane(self, heat_id: int, lane_num: int, swimmer_name: str) -> int:
+        # No timers provided yet, so set to None (which inserts NULL in SQLite)
+        with self.transaction() as conn:
+            conn.execute(SQL_INTERN_SWIMMER, (swimmer_name, swimmer_name))
+            lane_id = conn.execute(
+                SQL_ADD_SWIMMER_TO_LANE, (heat_id, lane_num, swimmer_name, None, None, None, None)
+            ).lastrowid
+            # Journaled by name; replaying interns the same names in the same order, so ids come back the same
+            self.journal_rows("lanes", [(lane_id, heat_id, lane_num, swimmer_name)])
+        return lane_id
+
+    def update_lane_times(self, lane_id: int, timer1: float | None, timer2: float | None, timer3: float | None):
+        total_time = compute_total_time(timer1, timer2, timer3)
+        with self.transaction() as conn:
+            conn.execute(SQL_UPDATE_LANE_TIMES, (timer1, timer2, timer3, total_time, lane_id))
+            self.journal_rows("lane_times", [(lane_id, timer1, timer2, timer3)])
+            event_id = self._scalar(SQL_GET_EVENT_ID_FROM_LANE, (lane_id,))
+            if event_id is not None:
+                self._refresh_event_standings(conn, event_id)
+
+    def update_heat_times(self, heat_id: int, lane_times: dict,
+                          disagreement_threshold: float = DEFAULT_DISAGREEMENT_THRESHOLD) -> dict:
+        """
+        Saves a whole heat's times, {lane_num: (timer1, timer2, timer3)} with None
+        for a failed watch, in one transaction; a bad lane leaves the heat untouched.
+        Returns {"standings": get_heat_standings(heat_id), "disagreements":
+        [(lane_num, spread), ...]} for watches more than disagreement_threshold apart.
+        """
+        with self.transaction() as conn:
+            # Read under the write lock, so the lanes can't change before the writes
+            known_lanes = {row[0] for row in conn.execute(SQL_GET_LANE_NUMS_IN_HEAT, (heat_id,))}
+            rows = []
+            disagreements = []
+            for lane_num, timers in sorted(lane_times.items()):
+                if lane_num not in known_lanes:
+                    raise ValueError(f"Heat {heat_id} has no swimmer in lane {lane_num}")
+                timer1, timer2, timer3 = timers
+                rows.append((timer1, timer2, timer3, compute_total_time(timer1, timer2, timer3), heat_id, lane_num))
+                spread = timer_spread(timer1, timer2, timer3)
+                if spread > disagreement_threshold:
+                    disagreements.append((lane_num, spread))
+            conn.executemany(SQL_UPDATE_LANE_TIMES_IN_HEAT, rows)
+            self.journal_rows("heat_times", [(heat_id, lane_num, t1, t2, t3) for t1, t2, t3, _, heat_id, lane_num in rows])
+            event_id = self._scalar(SQL_GET_EVENT_ID_FROM_HEAT, (heat_id,))
+            if event_id is not None:
+                self._refresh_event_standings(conn, event_id)
+        return {"standings": self.get_heat_standings(heat_id), "disagreements": disagreements}
+
+    # ----- standings -----
+
+    def _refresh_event_standings(self, conn: sqlite3.Connection, event_id: int):
+        conn.execute(SQL_CLEAR_EVENT_STANDINGS, (event_id,))
+        conn.execute(SQL_REFRESH_EVENT_STANDINGS, (event_id,))
+        conn.execute(SQL_ADD_EVENT_TEAM_POINTS, (-1, event_id))
+        conn.execute(SQL_CLEAR_EVENT_TEAM_POINTS, (event_id,))
+        conn.execute(SQL_REFRESH_EVENT_TEAM_POINTS, (event_id,))
+        conn.execute(SQL_ADD_EVENT_TEAM_POINTS, (1, event_id))
+        conn.execute(SQL_LOG_EVENT_CHANGE, (event_id, time.time()))
+
+    def rebuild_standings(self, event_id: int | None = None):
+        """Recomputes event_standings from lanes, for one event or (by default) the whole meet."""
+        with self.transaction() as conn:
+            if event_id is not None:
+                self._refresh_event_standings(conn, event_id)
+            else:
+                conn.execute(SQL_CLEAR_ALL_STANDINGS)
+                conn.execute(SQL_REFRESH_ALL_STANDINGS)
+                self._refresh_team_scores(conn)
+                conn.execute(SQL_LOG_ALL_EVENT_CHANGES, (time.time(),))
+
+    def check_standings(self) -> list:
+        """Event ids whose materialized standings don't match a fresh ranking of lanes (empty when consistent)."""
+        expected = {}
+        for row in self._fetchall(SQL_LIVE_STANDINGS):
+            expected.setdefault(row[0], set()).add(tuple(row))
+        actual = {}
+        for row in self._fetchall(SQL_GET_MATERIALIZED_STANDINGS):
+            actual.setdefault(row[0], set()).add(tuple(row))
+        return sorted(e for e in expected.keys() | actual.keys() if expected.get(e) != actual.get(e))
+
+    # ----- team scores -----
+
+    def _refresh_team_scores(self, conn: sqlite3.Connection):
+        conn.execute(SQL_CLEAR_ALL_TEAM_POINTS)
+        conn.execute(SQL_REFRESH_ALL_TEAM_POINTS)
+        conn.execute(SQL_CLEAR_TEAM_SCORES)
+        conn.execute(SQL_REFRESH_TEAM_SCORES)
+
+    def add_team(self, name: str) -> int:
+        """Id of the team called name, creating it if it's new."""
+        with self.transaction() as conn:
+            team_id = self._scalar(SQL_GET_TEAM_ID, (name,))
+            if team_id is None:
+                team_id = conn.execute(SQL_ADD_TEAM, (name,)).lastrowid
+                self.journal_rows("teams", [(team_id, name)])
+        return team_id
+
+    def set_lane_teams(self, lane_teams: dict):
+        """
+        Sets the team of each lane in {lane_id: team_id} (None for no team)
+        and rescores the events where any of those lanes already has a time.
+        """
+        rows = [(team_id, lane_id) for lane_id, team_id in lane_teams.items()]
+        with self.transaction() as conn:
+            conn.executemany(SQL_SET_LANE_TEAM, rows)
+            self.journal_rows("lane_teams", [(lane_id, team_id) for team_id, lane_id in rows])
+            lane_ids = list(lane_teams)
+            # In chunks, to stay under SQLite's limit on bound parameters
+            for i in range(0, len(lane_ids), 500):
+                chunk = lane_ids[i:i + 500]
+                sql = SQL_GET_EVENT_IDS_FOR_TIMED_LANES.format(placeholders=", ".join("?" * len(chunk)))
+                for (event_id,) in conn.execute(sql, chunk).fetchall():
+                    self._refresh_event_standings(conn, event_id)
+
+    def set_points_table(self, points):
+        """
+        Scores 1st, 2nd, 3rd... with points[0], points[1], points[2]...; lower
+        places score nothing. Every event is rescored.
+        """
+        points = [float(p) for p in points]
+        if any(p < 0 for p in points):
+            raise ValueError(f"points can't be negative: {points}")
+        with self.transaction() as conn:
+            conn.execute(SQL_CLEAR_POINTS_TABLE)
+            conn.executemany(SQL_SET_POINTS, enumerate(points, start=1))
+            self.journal_rows("points_table", [points])
+            self._refresh_team_scores(conn)
+            # Every event's contribution may have changed; readers see it as a change to each event
+            conn.execute(SQL_LOG_ALL_EVENT_CHANGES, (time.time(),))
+
+    def get_points_table(self) -> list:
+        return [row[0] for row in self._fetchall(SQL_GET_POINTS_TABLE)]
+
+    def rebuild_team_scores(self):
+        """Recomputes team_event_points and team_scores from event_standings for the whole meet."""
+        with self.transaction() as conn:
+            self._refresh_team_scores(conn)
+
+    def check_team_scores(self) -> list:
+        """Team ids whose cached per-event points or total don't match a fresh scoring (empty when consistent)."""
+        expected = {}
+        totals = {}
+        for event_id, team_id, points in self._fetchall(SQL_LIVE_ALL_TEAM_POINTS):
+            expected[(event_id, team_id)] = round(points, 6)
+            totals[team_id] = totals.get(team_id, 0) + points
+        actual = {(event_id, team_id): round(points, 6)
+                  for event_id, team_id, points in self._fetchall(SQL_GET_MATERIALIZED_TEAM_POINTS)}
+        wrong = {key[1] for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key)}
+        for team_id, _, points in self._fetchall(SQL_GET_TEAM_SCORES):
+            if round(points, 6) != round(totals.get(team_id, 0), 6):
+                wrong.add(team_id)
+        return sorted(wrong)
+
+    def get_team_scores(self):
+        """(team_id, name, points) for every team, highest score first."""
+        return self._fetchall(SQL_GET_TEAM_SCORES)
+
+    def get_team_event_points(self, event_id: int):
+        """(team_id, name, points) each team scored in the event."""
+        return self._fetchall(SQL_GET_TEAM_EVENT_POINTS, (event_id,))
+
+    # ----- meet metadata -----
+
+    def set_metadata(self, values: dict):
+        """Writes every {key: JSON-serializable value} in one transaction, so readers see all of them or none."""
+        if not values:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in values.items()]
+        with self.transaction() as conn:
+            conn.executemany(SQL_SET_METADATA, rows)
+            self.journal_rows("metadata", [(key, value) for key, value in values.items()])
+
+    def get_metadata(self, key: str, default=None):
+        value = self._scalar(SQL_GET_METADATA, (key,))
+        return default if value is None else json.loads(value)
+
+    def get_all_metadata(self) -> dict:
+        return {key: json.loads(value) for key, value in self._fetchall(SQL_GET_ALL_METADATA)}
+
+    def get_metadata_version(self) -> tuple:
+        """(version, updated_at) of the latest metadata write; (0, 0) before the first."""
+        return self._fetchone(SQL_GET_METADATA_VERSION) or (0, 0)
+
+    def set_settings(self, settings: dict):
+        """
+        Checks and writes meet settings (see MEET_SETTINGS) together; a bad
+        name or value writes nothing. Setting dual_meet adds either team if
+        it's new.
+        """
+        checked = {}
+        for name, value in settings.items():
+            if name not in MEET_SETTINGS:
+                raise ValueError(f"Unknown meet setting {name!r}; expected one of {', '.join(MEET_SETTINGS)}")
+            try:
+                checked[name] = None if value is None else MEET_SETTINGS[name][1](value)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Meet setting {name}: {e}") from None
+        with self.transaction():
+            # The dual meet's teams are scored like any other, so they must exist
+            for team in checked.get("dual_meet") or ():
+                self.add_team(team)
+            self.set_metadata(checked)
+
+    def get_settings(self) -> dict:
+        """Every meet setting, with its default where it was never set."""
+        stored = self.get_all_metadata()
+        settings = {}
+        for name, (default, _) in MEET_SETTINGS.items():
+            value = stored.get(name)
+            settings[name] = default if value is None else value
+        return settings
+
+    def get_setting(self, name: str):
+        default = MEET_SETTINGS[name][0]
+        value = self.get_metadata(name)
+        return default if value is None else value
+
+    def set_dual_meet(self, team_one: str, team_two: str) -> tuple:
+        """Makes team_one vs team_two the meet's dual meet and returns their team ids."""
+        with self.transaction():
+            self.set_settings({"dual_meet": [team_one, team_two]})
+            return self.add_team(team_one.strip()), self.add_team(team_two.strip())
+
+    def get_changes_since(self, seq: int):
+        """(event_id, seq, changed_at) for every event whose results changed after seq, oldest first."""
+        return self._fetchall(SQL_GET_CHANGES_SINCE, (seq,))
+
+    # ----- search -----
+
+    def search(self, text: str, after_lane_id: int = 0, limit: int = 25) -> tuple:
+        """
+        Swimmers whose name or event matches text, by word prefix.
+
+        Returns (rows, next_after) where each row is (lane_id, swimmer_name,
+        event_id, event_name, heat_num, lane_num, total_time, place) in lane id
+        order. Pass next_after back as after_lane_id for the next page; it is
+        None on the last page. Paging on lane id keeps every page an index seek
+        however deep the user scrolls.
+        """
+        query = search_match_query(text)
+        if query is None:
+            return [], None
+        try:
+            rows = self._fetchall(SQL_SEARCH, (query, after_lane_id, limit + 1))
+        except sqlite3.OperationalError as e:
+            if "search_index" in str(e):
+                raise RuntimeError("Swimmer search needs an SQLite build with FTS5") from e
+            raise
+        if len(rows) > limit:
+            return rows[:limit], rows[limit - 1][0]
+        return rows, None
+
+    def rebuild_search_index(self) -> bool:
+        """Recreates the search index from lanes and events; False if FTS5 is unavailable."""
+        with self.transaction() as conn:
+            return create_search_index(conn)
+
+    # ----- reads -----
+
+    def get_all_events(self):
+        return self._fetchall(SQL_GET_ALL_EVENTS)
+
+    def get_event(self, event_id: int):
+        return self._fetchone(SQL_GET_EVENT, (event_id,))
+
+    def get_heats_for_event(self, event_id: int):
+        return self._fetchall(SQL_GET_HEATS_FOR_EVENT, (event_id,))
+
+    def get_swimmers_in_heat(self, heat_id: int):
+        return self._fetchall(SQL_GET_SWIMMERS_IN_HEAT, (heat_id,))
+
+    def get_heat_standings(self, heat_id: int):
+        """(place, lane_num, swimmer_name, total_time) for the timed lanes of a heat; ties share a place."""
+        return self._fetchall(SQL_GET_HEAT_STANDINGS, (heat_id,))
+
+    def get_fastest_swimmer_in_event(self, event_id: int):
+        return self._fetchone(SQL_GET_FASTEST_SWIMMER_IN_EVENT, (event_id,))
+
+    def list_all_swimmers(self):
+        return self._fetchall(SQL_LIST_ALL_SWIMMERS)
+
+    def list_swimmers_in_event(self, event_id: int):
+        return self._fetchall(SQL_LIST_SWIMMERS_IN_EVENT, (event_id,))
+
+    def get_event_results(self, event_id: int):
+        return self._fetchall(SQL_GET_EVENT_RESULTS, (event_id,))
+
+    def get_event_standings(self, event_id: int):
+        """(place, swimmer_name, heat_num, lane_num, total_time) fastest first; ties share a place."""
+        return self._fetchall(SQL_GET_EVENT_STANDINGS, (event_id,))
+
+    def get_event_lane_layout(self, event_id: int):
+        """(heat_id, heat_num, lane_num, lane_id, swimmer_name) for every lane of the event; lane columns are None for a heat with no swimmers."""
+        return self._fetchall(SQL_GET_EVENT_LANE_LAYOUT, (event_id,))
+
+    def get_lane_id_by_heat_and_lane(self, heat_id: int, lane_num: int) -> int | None:
+        return self._scalar(SQL_GET_LANE_ID_BY_HEAT_AND_LANE, (heat_id, lane_num))
+
+    def get_event_id_from_heat(self, heat_id: int) -> int | None:
+        return self._scalar(SQL_GET_EVENT_ID_FROM_HEAT, (heat_id,))
+
+    def get_swimmer_name_from_lane(self, lane_id: int) -> str | None:
+        return self._scalar(SQL_GET_SWIMMER_NAME_FROM_LANE, (lane_id,))
+
+    # ----- swimmers -----
+
+    def get_swimmer_id(self, swimmer_name: str) -> int | None:
+        """Id of the swimmer entered under swimmer_name (any case or spacing), or None."""
+        return self._scalar(SQL_GET_SWIMMER_ID, (swimmer_key(swimmer_name),))
+
+    def get_swimmer(self, swimmer_id: int):
+        """(id, name) of a swimmer, or None."""
+        return self._fetchone(SQL_GET_SWIMMER, (swimmer_id,))
+
+    def list_swimmers(self):
+        """(id, name) of every swimmer in the meet, alphabetical."""
+        return self._fetchall(SQL_LIST_SWIMMERS)
+
+    def get_swimmer_entries(self, swimmer_id: int):
+        """(lane_id, event_id, heat_num, lane_num, total_time, place) for each of a swimmer's swims."""
+        return self._fetchall(SQL_GET_SWIMMER_ENTRIES, (swimmer_id,))
+
+    def get_heat_number_from_id(self, heat_id: int) -> int | None:
+        return self._scalar(SQL_GET_HEAT_NUMBER_FROM_ID, (heat_id,))
+
+    def get_number_of_heats_for_event(self, event_id: int) -> int:
+        return self._scalar(SQL_GET_NUMBER_OF_HEATS_FOR_EVENT, (event_id,)) or 0
+
+    def get_total_number_of_events(self) -> int:
+        return self._scalar(SQL_GET_TOTAL_NUMBER_OF_EVENTS) or 0
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(db_path: str, read_only: bool = False) -> MeetStore:
+    """Returns the shared MeetStore for db_path (read-write or read-only), creating it on first use."""
+    key = (os.path.abspath(db_path), read_only)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = MeetStore(db_path, read_only=read_only)
+                _stores[key] = store
+    return store
+
+
+def close_all_stores():
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
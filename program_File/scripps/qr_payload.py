@@ -0,0 +1,104 @@
+import json
+import unicodedata
+import zlib
+
+
+# Compact lane payload, version 1:
+#
+#     SM1.<event_id>.<heat_id>.<heat_num>.<lane_id>.<lane_num>[.<name hash>[.<name text>]]
+#
+# Every number is base 36 in upper case and the name hash is 4 base-36
+# characters, so the whole payload stays inside the QR alphanumeric character
+# set (0-9, A-Z and ". "). The name text is the first 12 characters of the
+# name folded into that set, so a meet rebuilt from sheets alone still has an
+# approximate name for every lane. A typical lane is about 33 characters,
+# against roughly 110 bytes for the original JSON payload, and still fits a
+# version 3 code at error correction H.
+COMPACT_PREFIX = "SM1"
+COMPACT_FIELDS = ["event_id", "heat_id", "heat_num", "lane_id", "lane_num"]
+NAME_HASH_LENGTH = 4
+NAME_TEXT_LENGTH = 12
+QR_ALPHANUMERIC = set("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:")
+
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def to_base36(number: int) -> str:
+    if number < 0:
+        raise ValueError(f"Can't encode negative id {number}")
+    digits = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        digits = _BASE36[remainder] + digits
+        if number == 0:
+            return digits
+def swimmer_name_hash(swimmer_name: str) -> str:
+    """4-character check value for a name; case and spacing differences don't change it."""
+    normalized = " ".join(swimmer_name.split()).casefold()
+    value = zlib.crc32(normalized.encode("utf-8")) % (36 ** NAME_HASH_LENGTH)
+    return to_base36(value).rjust(NAME_HASH_LENGTH, "0")
+
+def sheet_name_text(swimmer_name: str) -> str:
+    """
+    The name as the compact payload carries it: accents dropped, upper case,
+    anything outside the QR alphanumeric set (and the "." separator) turned
+    into a space, cut to NAME_TEXT_LENGTH characters.
+    """
+    folded = unicodedata.normalize("NFKD", swimmer_name)
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).upper()
+    folded = "".join(c if c in QR_ALPHANUMERIC and c != "." else " " for c in folded)
+    return " ".join(folded.split())[:NAME_TEXT_LENGTH].strip()
+
+def encode_lane_payload(event_id: int, heat_id: int, heat_num: int, lane_id: int, lane_num: int,
+                        swimmer_name: str | None = None) -> str:
+    parts = [COMPACT_PREFIX] + [to_base36(int(v)) for v in (event_id, heat_id, heat_num, lane_id, lane_num)]
+    if swimmer_name is not None:
+        parts.append(swimmer_name_hash(swimmer_name))
+        name_text = sheet_name_text(swimmer_name)
+        if name_text:
+            parts.append(name_text)
+    return ".".join(parts)
+def encode_legacy_lane_payload(event_id: int, heat_id: int, heat_num: int, lane_id: int, lane_num: int,
+                               swimmer_name: str) -> str:
+    return json.dumps({"event_id": event_id,"heat_id": heat_id,"heat_num": heat_num,"lane_id": lane_id,"lane_num": lane_num,"swimmer_name": swimmer_name})
+
+def decode_lane_payload(data: str | bytes) -> dict:
+    """
+    Reads a lane QR payload in either the compact or the original JSON format.
+
+    Returns a dict with version (0 for JSON), the five id fields, swimmer_name
+    (None for compact payloads), name_hash (None if the sheet had no name) and
+    name_text (the truncated upper-case name of a compact payload, else None).
+    Raises ValueError for anything that isn't a lane payload.
+    """
+    if isinstance(data, bytes):
+        data = data.decode("utf-8")
+    text = data.strip()
+
+    if text.startswith("{"):
+        try:
+            raw = json.loads(text)
+            payload = {field: int(raw[field]) for field in COMPACT_FIELDS}
+            swimmer_name = str(raw["swimmer_name"])
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Not a lane payload: {text[:60]!r}") from e
+        payload.update(version=0, swimmer_name=swimmer_name, name_hash=swimmer_name_hash(swimmer_name),
+                       name_text=None)
+        return payload
+
+    parts = text.upper().split(".")
+    if parts[0] != COMPACT_PREFIX or len(parts) not in (6, 7, 8):
+        raise ValueError(f"Not a lane payload: {text[:60]!r}")
+    try:
+        payload = {field: int(value, 36) for field, value in zip(COMPACT_FIELDS, parts[1:6])}
+    except ValueError as e:
+        raise ValueError(f"Not a lane payload: {text[:60]!r}") from e
+    name_hash = parts[6] if len(parts) >= 7 else None
+    if name_hash is not None and len(name_hash) != NAME_HASH_LENGTH:
+        raise ValueError(f"Bad name hash in lane payload: {text[:60]!r}")
+    name_text = (parts[7].strip() or None) if len(parts) == 8 else None
+    payload.update(version=1, swimmer_name=None, name_hash=name_hash, name_text=name_text)
+    return payload
+def payload_matches_name(payload: dict, swimmer_name: str) -> bool:
+    """True when the sheet's name check agrees with swimmer_name (or the sheet carries no name)."""
+    return payload.get("name_hash") is None or payload["name_hash"] == swimmer_name_hash(swimmer_name)
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+
+from meet_store import get_store
+
+
+def event_label(event) -> str:
+    """'Boys 9-10 50m freestyle' for an events row; an unknown gender reads 'Unknown'."""
+    _, gender, age_min, age_max, distance, stroke = event
+    return f"{gender or 'Unknown'} {age_min}-{age_max} {distance}m {stroke}"
+
+
+class ResultsFeed:
+    """
+    In-memory picture of which events' results have changed, fed from change_log.
+
+    One thread polls change_log every poll_interval seconds, so web requests and
+    streams share each event's JSON, built once per change, instead of querying SQLite.
+    """
+
+    def __init__(self, db_path: str, poll_interval: float = 0.5, read_only: bool = False):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.read_only = read_only
+        self.seq = 0
+        self.events = {}
+        self.versions = {}
+        self.started_at = time.time()
+        self.meet_changed_at = self.started_at
+        self._payloads = {}
+        self._team_payload = None
+        self.metadata_version = (0, 0)
+        self.settings = {}
+        self._settings_payload = None
+        self._changed = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ----- polling -----
+
+    def refresh(self) -> list:
+        """Picks up changes committed since the last call and wakes anyone waiting on them."""
+        store = get_store(self.db_path, self.read_only)
+        changes = store.get_changes_since(self.seq)
+        events = None
+        if store.get_total_number_of_events() != len(self.events):
+            events = {row[0]: row for row in store.get_all_events()}
+        settings = None
+        metadata_version = tuple(store.get_metadata_version())
+        if metadata_version != self.metadata_version or not self.settings:
+            settings = store.get_settings()
+        if not changes and events is None and settings is None:
+            return []
+
+        with self._changed:
+            if events is not None:
+                self.events = events
+            if settings is not None:
+                self.settings = settings
+                self.metadata_version = metadata_version
+                self.meet_changed_at = max(self.meet_changed_at, metadata_version[1])
+            for event_id, seq, changed_at in changes:
+                self.versions[event_id] = (seq, changed_at)
+            if changes:
+                self.seq = changes[-1][1]
+            self.meet_changed_at = max([self.meet_changed_at] + [c[2] for c in changes])
+            if events is not None:
+                self.meet_changed_at = max(self.meet_changed_at, time.time())
+            self._changed.notify_all()
+        return changes
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"[RESULTS] Could not read change_log: {e}")
+
+    def start(self):
+        self.refresh()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._poll, name="results-feed", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._changed:
+            self._changed.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait_for_changes(self, after_seq: int, timeout: float) -> tuple:
+        """
+        Blocks until results change after after_seq (or timeout) and returns
+        ([(event_id, seq), ...] oldest first, current seq).
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: self.seq > after_seq or self._stop.is_set(), timeout)
+            changed = sorted((seq, event_id) for event_id, (seq, _) in self.versions.items() if seq > after_seq)
+            return [(event_id, seq) for seq, event_id in changed], self.seq
+
+    # ----- validators and payloads -----
+
+    def event_version(self, event_id: int) -> tuple:
+        """(seq, changed_at) of an event's results; events without times yet are (0, feed start)."""
+        return self.versions.get(event_id, (0, self.started_at))
+
+    def meet_version(self) -> tuple:
+        return f"{self.seq}-{len(self.events)}-{self.metadata_version[0]}", self.meet_changed_at
+
+    def settings_payload(self) -> str:
+        """JSON text of the meet settings, rebuilt only when the metadata version moves on."""
+        version = self.metadata_version[0]
+        cached = self._settings_payload
+        if cached and cached[0] == version:
+            return cached[1]
+        self._settings_payload = (version, json.dumps({"version": version, "settings": self.settings}))
+        return self._settings_payload[1]
+
+    def event_results(self, event_id: int) -> dict | None:
+        """The event's results as a JSON-ready dict, or None for an unknown event."""
+        cached = self.event_payload(event_id)
+        return cached[0] if cached else None
+
+    def event_payload(self, event_id: int) -> tuple | None:
+        """(results dict, JSON text) for the event, rebuilt only when its seq moves on."""
+        event = self.events.get(event_id)
+        if event is None:
+            return None
+        # Read the version before the rows so a racing write can only make the
+        # cached body newer than its seq, never older.
+        seq, _ = self.event_version(event_id)
+        cached = self._payloads.get(event_id)
+        if cached and cached[0] == seq:
+            return cached[1]
+
+        results = {
+            "event_id": event_id,
+            "name": event_label(event),
+            "version": seq,
+            "results": [
+                {"place": place, "swimmer_name": swimmer_name, "heat_num": heat_num,
+                 "lane_num": lane_num, "total_time": total_time}
+                for place, swimmer_name, heat_num, lane_num, total_time
+                in get_store(self.db_path, self.read_only).get_event_standings(event_id)
+            ],
+        }
+        payload = (results, json.dumps(results))
+        self._payloads[event_id] = (seq, payload)
+        return payload
+
+    def team_scores_payload(self) -> str:
+        """JSON text of the team scoreboard, read from team_scores once per change to the meet's results."""
+        seq = self.seq
+        cached = self._team_payload
+        if cached and cached[0] == seq:
+            return cached[1]
+        scores = {
+            "version": seq,
+            "teams": [
+                {"team_id": team_id, "name": name, "points": points}
+                for team_id, name, points in get_store(self.db_path, self.read_only).get_team_scores()
+            ],
+        }
+        self._team_payload = (seq, json.dumps(scores))
+        return self._team_payload[1]
+
+    def meet_index(self) -> dict:
+        return {
+            "version": self.seq,
+            "events": [
+                {"event_id": event_id, "name": event_label(event), "version": self.event_version(event_id)[0]}
+                for event_id, event in sorted(self.events.items())
+            ],
+        }
@@ -0,0 +1,284 @@
+import datetime
+import hashlib
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from meet_store import get_store
+from qr_payload import payload_matches_name
+from timesheet_recovery import TIMESHEET_EXTENSIONS, decode_timesheet_qr
+
+
+SQL_LEDGER_HAS_FILE = "SELECT 1 FROM scanned_sheets WHERE file_hash = ?"
+SQL_LEDGER_LANE_SEEN = "SELECT 1 FROM scanned_sheets WHERE lane_id = ? AND status IN ('queued', 'entered')"
+SQL_LEDGER_RECORD = """
+    INSERT OR IGNORE INTO scanned_sheets (file_hash, file_name, lane_id, status, scanned_at)
+    VALUES (?, ?, ?, ?, ?)
+"""
+SQL_LEDGER_MARK_ENTERED = "UPDATE scanned_sheets SET status = 'entered' WHERE lane_id = ? AND status = 'queued'"
+SQL_LEDGER_PENDING = "SELECT file_name, lane_id FROM scanned_sheets WHERE status = 'queued' ORDER BY scanned_at"
+SQL_LANE_DETAILS = """
+    SELECT heats.event_id, heats.heat_num, lanes.lane_num, swimmers.name
+    FROM lanes JOIN heats ON lanes.heat_id = heats.id JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    WHERE lanes.id = ?
+"""
+
+_STOP = object()
+
+
+def file_content_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _decode_scan(path: str):
+    try:
+        return decode_timesheet_qr(path), None
+    except Exception as e:
+        return [], str(e)
+
+
+class ScanIngestService:
+    """
+    Watches a scan drop folder and queues every scanned timesheet for time entry.
+
+    Watcher, dispatcher (decoding on a process pool) and recorder threads are
+    joined by bounded queues, so a slow time-entry desk slows the scanner down.
+    The scanned_sheets ledger is keyed by file content, so no file is processed
+    twice, even across restarts; lanes queued but not entered are re-queued on start.
+    """
+
+    def __init__(self, db_path: str, drop_dir: str, workers: int = 2, max_pending_files: int = 64,
+                 max_in_flight: int | None = None, time_entry_queue_size: int = 256, poll_interval: float = 1.0):
+        self.db_path = db_path
+        self.drop_dir = drop_dir
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.file_queue = queue.Queue(maxsize=max_pending_files)
+        self.time_entry_queue = queue.Queue(maxsize=time_entry_queue_size)
+        # Never full: a decode holds its in-flight slot until the recorder is done with it
+        self._results = queue.Queue()
+        self._in_flight = threading.BoundedSemaphore(max_in_flight or workers * 2)
+        self._stop = threading.Event()
+        self._threads = []
+        self._pool = None
+        self._seen_files = {}
+        self.stats = {"queued": 0, "duplicate": 0, "mismatch": 0, "unreadable": 0, "skipped": 0}
+        os.makedirs(drop_dir, exist_ok=True)
+
+    # ----- ledger -----
+
+    def _record(self, file_hash: str, file_name: str, lane_id: int | None, status: str):
+        get_store(self.db_path).connection().execute(
+            SQL_LEDGER_RECORD,
+            (file_hash, file_name, lane_id, status, datetime.datetime.now().isoformat(timespec="seconds")),
+        )
+        self.stats[status] += 1
+
+    def already_processed(self, file_hash: str) -> bool:
+        return get_store(self.db_path).connection().execute(SQL_LEDGER_HAS_FILE, (file_hash,)).fetchone() is not None
+
+    def pending_time_entries(self) -> list:
+        """Lanes that were scanned but haven't had their times entered, oldest first."""
+        return get_store(self.db_path).connection().execute(SQL_LEDGER_PENDING).fetchall()
+
+    def mark_entered(self, lane_id: int):
+        """Call once a queued lane's times are saved so it isn't re-queued after a restart."""
+        get_store(self.db_path).connection().execute(SQL_LEDGER_MARK_ENTERED, (lane_id,))
+
+    # ----- stages -----
+
+    def scan_drop_folder(self) -> list:
+        """New, fully written sheet files in the drop folder since the last call."""
+        ready = []
+        seen = {}
+        for entry in os.scandir(self.drop_dir):
+            if not entry.is_file() or not entry.name.lower().endswith(TIMESHEET_EXTENSIONS):
+                continue
+            stat = entry.stat()
+            signature = (stat.st_size, stat.st_mtime_ns)
+            previous = self._seen_files.get(entry.path)
+            # Wait one more poll if the scanner may still be writing the file
+            if previous == (signature, False):
+                seen[entry.path] = (signature, True)
+                ready.append(entry.path)
+            elif previous == (signature, True):
+                seen[entry.path] = previous
+            else:
+                seen[entry.path] = (signature, False)
+        # Files that left the folder are forgotten
+        self._seen_files = seen
+        return ready
+
+    def _hash_if_new(self, path: str) -> str | None:
+        try:
+            file_hash = file_content_hash(path)
+        except OSError as e:
+            print(f"[SCAN] Could not read {path}: {e}")
+            return None
+        if self.already_processed(file_hash):
+            self.stats["skipped"] += 1
+            return None
+        return file_hash
+
+    def handle_decoded(self, path: str, file_hash: str, payloads: list, error: str | None):
+        """Checks a decoded sheet against the meet, records it and queues it for time entry."""
+        file_name = os.path.basename(path)
+        if error or not payloads:
+            print(f"[SCAN] No lane QR code found in {file_name}" + (f": {error}" if error else ""))
+            self._record(file_hash, file_name, None, "unreadable")
+            return
+
+        if len({payload["lane_id"] for payload in payloads}) > 1:
+            print(f"[SCAN] {file_name} shows more than one lane; scan each sheet on its own")
+            self._record(file_hash, file_name, None, "mismatch")
+            return
+        payload = payloads[0]
+        lane_id = payload["lane_id"]
+        store = get_store(self.db_path)
+        lane = store.connection().execute(SQL_LANE_DETAILS, (lane_id,)).fetchone()
+        if lane is None or lane[0] != payload["event_id"] or not payload_matches_name(payload, lane[3]):
+            print(f"[SCAN] {file_name} doesn't match lane {lane_id} of this meet")
+            self._record(file_hash, file_name, lane_id, "mismatch")
+            return
+
+        if store.connection().execute(SQL_LEDGER_LANE_SEEN, (lane_id,)).fetchone():
+            self._record(file_hash, file_name, lane_id, "duplicate")
+            return
+
+        self._record(file_hash, file_name, lane_id, "queued")
+        self._offer_time_entry(lane_id, lane, file_name)
+
+    def _offer_time_entry(self, lane_id: int, lane: tuple, file_name: str):
+        # Blocks while the time-entry desk is behind, but not past stop(): the
+        # lane is already 'queued' in the ledger and is re-queued on the next start
+        event_id, heat_num, lane_num, swimmer_name = lane
+        entry = {
+            "lane_id": lane_id, "event_id": event_id, "heat_num": heat_num,
+            "lane_num": lane_num, "swimmer_name": swimmer_name, "file_name": file_name,
+        }
+        while True:
+            try:
+                self.time_entry_queue.put(entry, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    return
+
+    def process_once(self) -> dict:
+        """
+        Decodes everything currently in the drop folder in this process and returns the stats.
+
+        Meant for tests and one-off runs; it does not wait for files to settle.
+        """
+        for entry in sorted(os.scandir(self.drop_dir), key=lambda e: e.name):
+            if not entry.is_file() or not entry.name.lower().endswith(TIMESHEET_EXTENSIONS):
+                continue
+            stat = entry.stat()
+            self._seen_files[entry.path] = ((stat.st_size, stat.st_mtime_ns), True)
+            file_hash = self._hash_if_new(entry.path)
+            if file_hash is not None:
+                self.handle_decoded(entry.path, file_hash, *_decode_scan(entry.path))
+        return dict(self.stats)
+
+    def _watch(self):
+        while not self._stop.is_set():
+            try:
+                for path in self.scan_drop_folder():
+                    # Blocks while the dispatcher is behind
+                    while not self._stop.is_set():
+                        try:
+                            self.file_queue.put(path, timeout=self.poll_interval)
+                            break
+                        except queue.Full:
+                            continue
+            except OSError as e:
+                print(f"[SCAN] Error watching {self.drop_dir}: {e}")
+            self._stop.wait(self.poll_interval)
+        self.file_queue.put(_STOP)
+
+    def _dispatch(self):
+        while True:
+            path = self.file_queue.get()
+            if path is _STOP:
+                break
+            file_hash = self._hash_if_new(path)
+            if file_hash is None:
+                continue
+            self._in_flight.acquire()
+            future = self._pool.submit(_decode_scan, path)
+            future.add_done_callback(lambda f, p=path, h=file_hash: self._on_decoded(f, p, h))
+        self._pool.shutdown(wait=True)
+        self._results.put(_STOP)
+
+    def _on_decoded(self, future, path: str, file_hash: str):
+        # Runs on the pool's own thread, so it must never block
+        try:
+            payloads, error = future.result()
+        except Exception as e:
+            payloads, error = [], str(e)
+        self._results.put_nowait((path, file_hash, payloads, error))
+
+    def _record_results(self):
+        # Lanes that were queued before a restart go back on the queue first
+        for file_name, lane_id in self.pending_time_entries():
+            lane = get_store(self.db_path).connection().execute(SQL_LANE_DETAILS, (lane_id,)).fetchone()
+            if lane:
+                self._offer_time_entry(lane_id, lane, file_name)
+        while True:
+            item = self._results.get()
+            if item is _STOP:
+                break
+            try:
+                self.handle_decoded(*item)
+            except Exception as e:
+                print(f"[SCAN] Failed to record {item[0]}: {e}")
+            finally:
+                self._in_flight.release()
+
+    # ----- lifecycle -----
+
+    def start(self):
+        self._stop.clear()
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        self._threads = [
+            threading.Thread(target=target, name=f"scan-{target.__name__.strip('_')}", daemon=True)
+            for target in (self._watch, self._dispatch, self._record_results)
+        ]
+        for thread in self._threads:
+            thread.start()
+        print(f"[SCAN] Watching {self.drop_dir} with {self.workers} decode workers")
+
+    def stop(self, timeout: float | None = None):
+        """
+        Stops watching and finishes decoding and recording everything already
+        picked up, waiting at most timeout seconds in all. Lanes that no longer
+        fit on a full time_entry_queue stay queued in the ledger for the next start.
+        """
+        self._stop.set()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        if self._threads:
+            print(f"[SCAN] Still finishing after {timeout}s: {', '.join(thread.name for thread in self._threads)}")
+        print(f"[SCAN] Stopped: {self.stats}")
+
+
+if __name__ == "__main__":
+    db = sys.argv[1] if len(sys.argv) > 1 else "Active_meet/swim_meet.db"
+    drop = sys.argv[2] if len(sys.argv) > 2 else "Active_meet/Scans"
+    service = ScanIngestService(db, drop)
+    service.start()
+    try:
+        while True:
+            entry = service.time_entry_queue.get()
+            print(f"[SCAN] Ready for time entry: event {entry['event_id']} heat {entry['heat_num']} "
+                  f"lane {entry['lane_num']} - {entry['swimmer_name']} (lane_id {entry['lane_id']})")
+    except KeyboardInterrupt:
+        service.stop()
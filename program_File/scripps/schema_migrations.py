@@ -0,0 +1,504 @@
+import datetime
+import sqlite3
+import sys
+
+
+# Each migration is (version, description, function). They run in order, each
+# inside its own transaction, and the applied version is recorded in
+# schema_version so an existing meet database is upgraded in place.
+
+def _v1_base_tables(conn: sqlite3.Connection):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        gender TEXT NOT NULL CHECK(gender IN ('Boys', 'Girls')),
+        age_min INTEGER NOT NULL,
+        age_max INTEGER NOT NULL,
+        distance INTEGER NOT NULL,
+        stroke TEXT NOT NULL
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS heats (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        event_id INTEGER NOT NULL,
+        heat_num INTEGER NOT NULL,
+        FOREIGN KEY (event_id) REFERENCES events(id)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS lanes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        heat_id INTEGER NOT NULL,
+        lane_num INTEGER NOT NULL CHECK(lane_num BETWEEN 1 AND 8),
+        swimmer_name TEXT NOT NULL,
+        timer1_time REAL ,
+        timer2_time REAL ,
+        timer3_time REAL ,
+        total_time REAL ,
+        FOREIGN KEY (heat_id) REFERENCES heats(id)
+    );
+    """)
+def _v2_lookup_indexes(conn: sqlite3.Connection):
+    # heats(event_id, heat_num) also carries the rowid, so "SELECT * FROM heats
+    # WHERE event_id = ?" and the event -> heat side of every JOIN never touch the table.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_heats_event_heat ON heats(event_id, heat_num)")
+
+    duplicates = conn.execute("""
+        SELECT heat_id, lane_num, COUNT(*) FROM lanes
+        GROUP BY heat_id, lane_num HAVING COUNT(*) > 1
+    """).fetchall()
+    if duplicates:
+        # Don't throw away entries from an old meet; keep the lookup fast and
+        # leave the clean-up to the meet director.
+        print(f"[MIGRATION] Warning: {len(duplicates)} heat/lane pairs hold more than one swimmer; "
+              "creating a non-unique lanes index instead.")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_lanes_heat_lane ON lanes(heat_id, lane_num)")
+    else:
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_lanes_heat_lane ON lanes(heat_id, lane_num)")
+
+def _v3_scanned_sheets(conn: sqlite3.Connection):
+    # Ledger for the scan drop folder: one row per distinct scanned file, keyed
+    # by content hash so a restart or a re-copied file is never processed twice.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS scanned_sheets (
+        file_hash TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        lane_id INTEGER,
+        status TEXT NOT NULL CHECK(status IN ('queued', 'entered', 'duplicate', 'mismatch', 'unreadable')),
+        scanned_at TEXT NOT NULL
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scanned_sheets_lane ON scanned_sheets(lane_id, status)")
+
+def _v4_event_standings(conn: sqlite3.Connection):
+    # Materialized results: one row per timed lane, clustered by (event, position)
+    # so an event's results are a single range read with no join or sort.
+    # place is RANK() (ties share a place); position breaks ties by heat and lane.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS event_standings (
+        event_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        place INTEGER NOT NULL,
+        lane_id INTEGER NOT NULL,
+        heat_num INTEGER NOT NULL,
+        lane_num INTEGER NOT NULL,
+        swimmer_name TEXT NOT NULL,
+        timer1_time REAL,
+        timer2_time REAL,
+        timer3_time REAL,
+        total_time REAL NOT NULL,
+        PRIMARY KEY (event_id, position)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("DELETE FROM event_standings")
+    conn.execute("""
+        INSERT INTO event_standings (event_id, position, place, lane_id, heat_num, lane_num, swimmer_name,
+                                     timer1_time, timer2_time, timer3_time, total_time)
+        SELECT heats.event_id,
+               ROW_NUMBER() OVER (PARTITION BY heats.event_id ORDER BY total_time, heats.heat_num, lanes.lane_num),
+               RANK() OVER (PARTITION BY heats.event_id ORDER BY total_time),
+               lanes.id, heats.heat_num, lanes.lane_num, swimmer_name,
+               timer1_time, timer2_time, timer3_time, total_time
+        FROM lanes
+        JOIN heats ON lanes.heat_id = heats.id
+        WHERE total_time IS NOT NULL
+    """)
+
+def _v5_change_log(conn: sqlite3.Connection):
+    # One row per event whose results changed. seq is a meet-wide counter, so
+    # a reader catches up with "WHERE seq > last_seen" and an event's seq is a
+    # ready-made HTTP validator for its results.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS change_log (
+        event_id INTEGER PRIMARY KEY,
+        seq INTEGER NOT NULL,
+        changed_at REAL NOT NULL
+    );
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_seq ON change_log(seq)")
+    conn.execute("""
+        INSERT OR IGNORE INTO change_log (event_id, seq, changed_at)
+        SELECT event_id, ROW_NUMBER() OVER (ORDER BY event_id), CAST(strftime('%s', 'now') AS REAL)
+        FROM (SELECT DISTINCT event_id FROM event_standings)
+    """)
+
+# Same text as results_feed.event_label, e.g. "Boys 9-10 50m freestyle"
+EVENT_NAME_SQL = "COALESCE(events.gender, 'Unknown') || ' ' || events.age_min || '-' || events.age_max || ' ' || events.distance || 'm ' || events.stroke"
+
+def swimmer_key(name: str) -> str:
+    """
+    The name a swimmer is known by for dedupe: case and runs of spaces don't
+    matter (the same folding as qr_payload.swimmer_name_hash). Registered as
+    an SQL function of the same name on every meet connection.
+    """
+    return " ".join(str(name).split()).casefold()
+
+def create_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    (Re)builds the search_index FTS5 table over swimmer names and event names
+    and the triggers that keep it in step with lanes, heats and events. The rowid of
+    every entry is its lane id. Returns False, leaving search unavailable, when
+    this SQLite was built without FTS5.
+    """
+    try:
+        conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            swimmer_name, event_name,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '1 2 3'
+        );
+        """)
+    except sqlite3.OperationalError as e:
+        print(f"[MIGRATION] Warning: full-text search unavailable ({e}); swimmer search is disabled.")
+        return False
+
+    event_name_for_heat = f"(SELECT {EVENT_NAME_SQL} FROM heats JOIN events ON heats.event_id = events.id WHERE heats.id = NEW.heat_id)"
+    # Until v10 moves names into swimmers (while an old meet is being migrated) the name is on the lane
+    normalized = "swimmer_id" in [row[1] for row in conn.execute("PRAGMA table_info(lanes)")]
+    if normalized:
+        name_for_lane = "(SELECT name FROM swimmers WHERE swimmers.id = NEW.swimmer_id)"
+        name_column, swimmer_join = "swimmer_id", "JOIN swimmers ON lanes.swimmer_id = swimmers.id"
+        lane_name = "swimmers.name"
+    else:
+        name_for_lane, name_column, swimmer_join, lane_name = "NEW.swimmer_name", "swimmer_name", "", "lanes.swimmer_name"
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS lanes_search_insert AFTER INSERT ON lanes BEGIN
+        INSERT INTO search_index (rowid, swimmer_name, event_name)
+        VALUES (NEW.id, {name_for_lane}, {event_name_for_heat});
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS lanes_search_update AFTER UPDATE OF {name_column}, heat_id ON lanes BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id;
+        INSERT INTO search_index (rowid, swimmer_name, event_name)
+        VALUES (NEW.id, {name_for_lane}, {event_name_for_heat});
+    END;
+    """)
+    if normalized:
+        conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS swimmers_search_update AFTER UPDATE OF name ON swimmers BEGIN
+            UPDATE search_index SET swimmer_name = NEW.name
+            WHERE rowid IN (SELECT id FROM lanes WHERE swimmer_id = NEW.id);
+        END;
+        """)
+    conn.execute("""
+    CREATE TRIGGER IF NOT EXISTS lanes_search_delete AFTER DELETE ON lanes BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id;
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS heats_search_update AFTER UPDATE OF event_id ON heats BEGIN
+        UPDATE search_index SET event_name = (SELECT {EVENT_NAME_SQL} FROM events WHERE events.id = NEW.event_id)
+        WHERE rowid IN (SELECT id FROM lanes WHERE heat_id = NEW.id);
+    END;
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS events_search_update AFTER UPDATE ON events BEGIN
+        UPDATE search_index SET event_name = (SELECT {EVENT_NAME_SQL} FROM events WHERE events.id = NEW.id)
+        WHERE rowid IN (SELECT lanes.id FROM lanes JOIN heats ON lanes.heat_id = heats.id WHERE heats.event_id = NEW.id);
+    END;
+    """)
+    conn.execute("DELETE FROM search_index")
+    conn.execute(f"""
+        INSERT INTO search_index (rowid, swimmer_name, event_name)
+        SELECT lanes.id, {lane_name}, {EVENT_NAME_SQL}
+        FROM lanes
+        {swimmer_join}
+        JOIN heats ON lanes.heat_id = heats.id
+        JOIN events ON heats.event_id = events.id
+    """)
+    return True
+
+def _fts5_available(conn: sqlite3.Connection) -> bool:
+    return "ENABLE_FTS5" in {row[0] for row in conn.execute("PRAGMA compile_options")}
+
+def _has_search_index(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_index'").fetchone() is not None
+
+def _v6_search_index(conn: sqlite3.Connection):
+    create_search_index(conn)
+    # Lets a search hit pick up its place without scanning the event's standings
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_event_standings_lane ON event_standings(lane_id)")
+
+def _v7_journal_state(conn: sqlite3.Connection):
+    # Last journal record applied to this database, written in the same
+    # transaction as the change itself, so any copy of the file says exactly
+    # where journal replay has to pick up from.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS journal_state (
+        id INTEGER PRIMARY KEY CHECK(id = 1),
+        seq INTEGER NOT NULL,
+        recorded_at REAL NOT NULL
+    );
+    """)
+    conn.execute("INSERT OR IGNORE INTO journal_state (id, seq, recorded_at) VALUES (1, 0, 0)")
+
+# Points for 1st, 2nd, 3rd... in an individual dual meet event; see MeetStore.set_points_table
+DEFAULT_POINTS_TABLE = (5, 3, 1)
+
+def _v8_team_scores(conn: sqlite3.Connection):
+    # Team membership is per entry (a lane), so a swimmer can guest for another
+    # team in one event. team_event_points caches each event's contribution to
+    # each team and team_scores their sum, so a scoreboard is a read of one
+    # row per team; both are updated with event_standings.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS teams (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE
+    );
+    """)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(lanes)")]
+    if "team_id" not in columns:
+        conn.execute("ALTER TABLE lanes ADD COLUMN team_id INTEGER REFERENCES teams(id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS scoring_points (
+        place INTEGER PRIMARY KEY CHECK(place >= 1),
+        points REAL NOT NULL CHECK(points >= 0)
+    );
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS team_event_points (
+        event_id INTEGER NOT NULL,
+        team_id INTEGER NOT NULL,
+        points REAL NOT NULL,
+        PRIMARY KEY (event_id, team_id)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS team_scores (
+        team_id INTEGER PRIMARY KEY,
+        points REAL NOT NULL
+    );
+    """)
+    if conn.execute("SELECT COUNT(*) FROM scoring_points").fetchone()[0] == 0:
+        conn.executemany("INSERT INTO scoring_points (place, points) VALUES (?, ?)",
+                         enumerate(DEFAULT_POINTS_TABLE, start=1))
+
+def _v9_meet_metadata(conn: sqlite3.Connection):
+    # Meet settings and other metadata, one JSON value per key, replacing the
+    # read-modify-write of meta_data.json. version increases with every write,
+    # so MAX(version) tells a reader whether anything changed since it looked.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS meet_metadata (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        updated_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    """)
+    # The next version and the latest write are both an index seek, however many keys there are
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_meet_metadata_version ON meet_metadata(version)")
+
+def _v10_swimmers(conn: sqlite3.Connection):
+    # One row per swimmer instead of a name on every lane. name_key (see
+    # swimmer_key) is unique, so entries spelled "Ava  Smith" and "ava smith"
+    # are the same swimmer, shown with the first spelling seen. lanes is
+    # rebuilt with swimmer_id in place of swimmer_name, keeping its ids.
+    # Swimmers are never deleted, and without AUTOINCREMENT a name that is
+    # already known doesn't use up an id on its way through ON CONFLICT.
+    # event_standings loses its copy of the name too and is re-ranked, so
+    # results show the merged swimmer's name straight away.
+    conn.create_function("swimmer_key", 1, swimmer_key, deterministic=True)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS swimmers (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        name_key TEXT NOT NULL UNIQUE
+    );
+    """)
+    conn.execute("""
+        INSERT INTO swimmers (name, name_key)
+        SELECT swimmer_name, swimmer_key(swimmer_name) FROM lanes WHERE true ORDER BY id
+        ON CONFLICT (name_key) DO NOTHING
+    """)
+
+    lane_index = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'idx_lanes_heat_lane'").fetchone()
+    lane_seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'lanes'").fetchone()
+    # The search triggers name lanes.swimmer_name or the lanes table; create_search_index puts them back
+    for trigger in ("lanes_search_insert", "lanes_search_update", "lanes_search_delete",
+                    "heats_search_update", "events_search_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("""
+    CREATE TABLE lanes_v10 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        heat_id INTEGER NOT NULL,
+        lane_num INTEGER NOT NULL CHECK(lane_num BETWEEN 1 AND 8),
+        swimmer_id INTEGER NOT NULL REFERENCES swimmers(id),
+        timer1_time REAL ,
+        timer2_time REAL ,
+        timer3_time REAL ,
+        total_time REAL ,
+        team_id INTEGER REFERENCES teams(id),
+        FOREIGN KEY (heat_id) REFERENCES heats(id)
+    );
+    """)
+    conn.execute("""
+        INSERT INTO lanes_v10 (id, heat_id, lane_num, swimmer_id, timer1_time, timer2_time, timer3_time,
+                               total_time, team_id)
+        SELECT lanes.id, lanes.heat_id, lanes.lane_num, swimmers.id, lanes.timer1_time, lanes.timer2_time,
+               lanes.timer3_time, lanes.total_time, lanes.team_id
+        FROM lanes
+        JOIN swimmers ON swimmers.name_key = swimmer_key(lanes.swimmer_name)
+    """)
+    conn.execute("DROP TABLE lanes")
+    conn.execute("ALTER TABLE lanes_v10 RENAME TO lanes")
+    if lane_seq is not None:
+        # Ids of deleted lanes stay retired, as they were before the rebuild
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'lanes'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('lanes', MAX(?, (SELECT COALESCE(MAX(id), 0) FROM lanes)))",
+                     (lane_seq[0],))
+    unique = "UNIQUE " if lane_index is None or "UNIQUE" in lane_index[0].upper() else ""
+    conn.execute(f"CREATE {unique}INDEX IF NOT EXISTS idx_lanes_heat_lane ON lanes(heat_id, lane_num)")
+    # A swimmer's entries are an index seek
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lanes_swimmer ON lanes(swimmer_id)")
+    if _has_search_index(conn):
+        create_search_index(conn)
+
+    conn.execute("DROP TABLE event_standings")
+    conn.execute("""
+    CREATE TABLE event_standings (
+        event_id INTEGER NOT NULL,
+        position INTEGER NOT NULL,
+        place INTEGER NOT NULL,
+        lane_id INTEGER NOT NULL,
+        heat_num INTEGER NOT NULL,
+        lane_num INTEGER NOT NULL,
+        timer1_time REAL,
+        timer2_time REAL,
+        timer3_time REAL,
+        total_time REAL NOT NULL,
+        PRIMARY KEY (event_id, position)
+    ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+        INSERT INTO event_standings (event_id, position, place, lane_id, heat_num, lane_num,
+                                     timer1_time, timer2_time, timer3_time, total_time)
+        SELECT heats.event_id,
+               ROW_NUMBER() OVER (PARTITION BY heats.event_id ORDER BY total_time, heats.heat_num, lanes.lane_num),
+               RANK() OVER (PARTITION BY heats.event_id ORDER BY total_time),
+               lanes.id, heats.heat_num, lanes.lane_num, timer1_time, timer2_time, timer3_time, total_time
+        FROM lanes
+        JOIN heats ON lanes.heat_id = heats.id
+        WHERE total_time IS NOT NULL
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_event_standings_lane ON event_standings(lane_id)")
+    # Names in published results may have changed, so every event counts as changed
+    conn.execute("""
+        INSERT INTO change_log (event_id, seq, changed_at)
+        SELECT id, (SELECT COALESCE(MAX(seq), 0) FROM change_log) + ROW_NUMBER() OVER (ORDER BY id),
+               CAST(strftime('%s', 'now') AS REAL)
+        FROM events WHERE true
+        ON CONFLICT(event_id) DO UPDATE SET seq = excluded.seq, changed_at = excluded.changed_at
+    """)
+
+def _v11_event_gender(conn: sqlite3.Connection):
+    # events.gender may be NULL: an event rebuilt from timesheets alone has no
+    # known gender, and its placeholder shouldn't claim one. The CHECK still
+    # holds any gender that is set. events is rebuilt keeping its ids.
+    event_seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'events'").fetchone()
+    # The search triggers name the events table; create_search_index puts them back
+    for trigger in ("lanes_search_insert", "lanes_search_update", "heats_search_update", "events_search_update"):
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("""
+    CREATE TABLE events_v11 (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        gender TEXT CHECK(gender IN ('Boys', 'Girls')),
+        age_min INTEGER NOT NULL,
+        age_max INTEGER NOT NULL,
+        distance INTEGER NOT NULL,
+        stroke TEXT NOT NULL
+    );
+    """)
+    conn.execute("""
+        INSERT INTO events_v11 (id, gender, age_min, age_max, distance, stroke)
+        SELECT id, gender, age_min, age_max, distance, stroke FROM events
+    """)
+    conn.execute("DROP TABLE events")
+    conn.execute("ALTER TABLE events_v11 RENAME TO events")
+    if event_seq is not None:
+        conn.execute("DELETE FROM sqlite_sequence WHERE name = 'events'")
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('events', MAX(?, (SELECT COALESCE(MAX(id), 0) FROM events)))",
+                     (event_seq[0],))
+    if _has_search_index(conn):
+        create_search_index(conn)
+
+MIGRATIONS = [
+    (1, "events, heats and lanes tables", _v1_base_tables),
+    (2, "heats(event_id, heat_num) and unique lanes(heat_id, lane_num) indexes", _v2_lookup_indexes),
+    (3, "scanned_sheets ledger for the scan drop folder", _v3_scanned_sheets),
+    (4, "materialized event_standings", _v4_event_standings),
+    (5, "change_log of result changes per event", _v5_change_log),
+    (6, "search_index full-text index over swimmer and event names", _v6_search_index),
+    (7, "journal_state position of the time-entry journal", _v7_journal_state),
+    (8, "teams, lanes.team_id, scoring_points and materialized team scores", _v8_team_scores),
+    (9, "meet_metadata key/value store for meet settings", _v9_meet_metadata),
+    (10, "swimmers table; lanes.swimmer_id replaces lanes.swimmer_name, also in event_standings", _v10_swimmers),
+    (11, "events.gender may be NULL for events recovered without a description", _v11_event_gender),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    table = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'"
+    ).fetchone()
+    if table is None:
+        return 0
+    result = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return result[0] or 0
+def migrate(conn: sqlite3.Connection, target_version: int = LATEST_VERSION) -> int:
+    """
+    Brings the database up to target_version and returns the version it ended at.
+
+    The connection must be in autocommit mode (isolation_level=None) so each
+    step can run in its own BEGIN IMMEDIATE transaction.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    version = get_schema_version(conn)
+    for step_version, description, upgrade in MIGRATIONS:
+        if step_version <= version or step_version > target_version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another process may have applied this step while we waited for the lock
+            if get_schema_version(conn) >= step_version:
+                conn.execute("COMMIT")
+                continue
+            upgrade(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)",
+                (step_version, description, datetime.datetime.now().isoformat(timespec="seconds")),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        version = step_version
+
+    # v6 is recorded even when this SQLite had no FTS5 to build the search index
+    # with; build it the first time the meet is opened by one that has
+    if version >= 6 and not _has_search_index(conn) and _fts5_available(conn):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if not _has_search_index(conn):
+                create_search_index(conn)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return version
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "Active_meet/swim_meet.db"
+    connection = sqlite3.connect(path, isolation_level=None)
+    before = get_schema_version(connection)
+    after = migrate(connection)
+    connection.close()
+    print(f"{path}: schema version {before} -> {after}")
@@ -0,0 +1,407 @@
+import datetime
+import os
+import re
+import sqlite3
+import tempfile
+import time
+import urllib.parse
+
+from meet_store import MeetStore, get_store
+from schema_migrations import swimmer_key
+from seeding import NO_TIME
+
+# A season archive keeps every finished meet as its own database, next to a
+# season index that answers cross-meet questions without opening them:
+#
+#     <archive>/meets/<date>-<name>.db   copy of the meet as it was closed
+#     <archive>/season.db                 meets, swims and personal_bests
+#
+#     close_meet("Active_meet/swim_meet.db", "Season_archive")
+#     season_best_times("Season_archive", 50, "freestyle", gender="Girls")
+#     season_seed_times("Season_archive", entries)   # for seeding.seed_entries
+#
+# swims holds every timed swim of every archived meet; personal_bests the
+# fastest per swimmer and event type (course, distance, stroke, gender, age
+# group) with the meet and date it was swum. Closing a meet inserts its swims
+# and upserts only the personal bests it improves, in one transaction, so the
+# cost depends on the size of that meet, not of the season. Times from
+# different courses (see the course meet setting) are never compared.
+DEFAULT_ARCHIVE_DIR = "Season_archive"
+SEASON_INDEX = "season.db"
+MEETS_DIR = "meets"
+SEASON_SCHEMA_VERSION = 1
+
+SEASON_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS meets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        file_name TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        meet_date TEXT NOT NULL,
+        course TEXT NOT NULL,
+        swims INTEGER NOT NULL,
+        closed_at REAL NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS swims (
+        meet_id INTEGER NOT NULL REFERENCES meets(id),
+        lane_id INTEGER NOT NULL,
+        swimmer_key TEXT NOT NULL,
+        swimmer_name TEXT NOT NULL,
+        course TEXT NOT NULL,
+        distance INTEGER NOT NULL,
+        stroke TEXT NOT NULL,
+        gender TEXT NOT NULL,
+        age_min INTEGER NOT NULL,
+        age_max INTEGER NOT NULL,
+        total_time REAL NOT NULL,
+        swum_on TEXT NOT NULL,
+        PRIMARY KEY (meet_id, lane_id)
+    ) WITHOUT ROWID
+    """,
+    # A swimmer's history in one stroke and distance, in date order
+    "CREATE INDEX IF NOT EXISTS idx_swims_swimmer ON swims(swimmer_key, course, distance, stroke, swum_on)",
+    """
+    CREATE TABLE IF NOT EXISTS personal_bests (
+        swimmer_key TEXT NOT NULL,
+        course TEXT NOT NULL,
+        distance INTEGER NOT NULL,
+        stroke TEXT NOT NULL,
+        gender TEXT NOT NULL,
+        age_min INTEGER NOT NULL,
+        age_max INTEGER NOT NULL,
+        swimmer_name TEXT NOT NULL,
+        best_time REAL NOT NULL,
+        meet_id INTEGER NOT NULL,
+        swum_on TEXT NOT NULL,
+        PRIMARY KEY (swimmer_key, course, distance, stroke, gender, age_min, age_max)
+    ) WITHOUT ROWID
+    """,
+    # "Best 50 free times this season" is a range read already in time order
+    "CREATE INDEX IF NOT EXISTS idx_personal_bests_event ON personal_bests(course, distance, stroke, best_time)",
+]
+
+SQL_GET_ARCHIVED_MEET = "SELECT id FROM meets WHERE file_name = ?"
+SQL_ADD_MEET = """
+    INSERT INTO meets (file_name, name, meet_date, course, swims, closed_at)
+    VALUES (?, ?, ?, ?, 0, ?)
+"""
+SQL_SET_MEET_SWIMS = "UPDATE meets SET swims = (SELECT COUNT(*) FROM swims WHERE meet_id = ?) WHERE id = ?"
+# Reads the closed meet through ATTACH, so its rows never pass through Python.
+# A meet archived before schema v10 has the name on the lane instead of in swimmers.
+# Events recovered without a gender (schema v11) can't be compared, so they're left out.
+SQL_ADD_MEET_SWIMS = """
+    INSERT INTO swims (meet_id, lane_id, swimmer_key, swimmer_name, course, distance, stroke,
+                       gender, age_min, age_max, total_time, swum_on)
+    SELECT ?, lanes.id, swimmers.name_key, swimmers.name, ?, events.distance,
+           lower(trim(events.stroke)), events.gender, events.age_min, events.age_max, lanes.total_time, ?
+    FROM meet.lanes AS lanes
+    JOIN meet.swimmers AS swimmers ON swimmers.id = lanes.swimmer_id
+    JOIN meet.heats AS heats ON heats.id = lanes.heat_id
+    JOIN meet.events AS events ON events.id = heats.event_id
+    WHERE lanes.total_time IS NOT NULL AND events.gender IS NOT NULL
+"""
+SQL_ADD_LEGACY_MEET_SWIMS = """
+    INSERT INTO swims (meet_id, lane_id, swimmer_key, swimmer_name, course, distance, stroke,
+                       gender, age_min, age_max, total_time, swum_on)
+    SELECT ?, lanes.id, swimmer_key(lanes.swimmer_name), lanes.swimmer_name, ?, events.distance,
+           lower(trim(events.stroke)), events.gender, events.age_min, events.age_max, lanes.total_time, ?
+    FROM meet.lanes AS lanes
+    JOIN meet.heats AS heats ON heats.id = lanes.heat_id
+    JOIN meet.events AS events ON events.id = heats.event_id
+    WHERE lanes.total_time IS NOT NULL AND events.gender IS NOT NULL
+"""
+# One row per swimmer and event type with its fastest swim (SQLite takes the
+# bare columns from the MIN row); an existing best is only replaced by a faster one.
+SQL_UPSERT_PERSONAL_BESTS = """
+    INSERT INTO personal_bests (swimmer_key, course, distance, stroke, gender, age_min, age_max,
+                                swimmer_name, best_time, meet_id, swum_on)
+    SELECT swimmer_key, course, distance, stroke, gender, age_min, age_max,
+           swimmer_name, MIN(total_time), meet_id, swum_on
+    FROM swims
+    WHERE {where}
+    GROUP BY swimmer_key, course, distance, stroke, gender, age_min, age_max
+    ON CONFLICT (swimmer_key, course, distance, stroke, gender, age_min, age_max) DO UPDATE
+    SET swimmer_name = excluded.swimmer_name, best_time = excluded.best_time,
+        meet_id = excluded.meet_id, swum_on = excluded.swum_on
+    WHERE excluded.best_time < personal_bests.best_time
+"""
+SQL_ADD_MEET_PERSONAL_BESTS = SQL_UPSERT_PERSONAL_BESTS.format(where="meet_id = ?")
+SQL_ADD_ALL_PERSONAL_BESTS = SQL_UPSERT_PERSONAL_BESTS.format(where="true")
+SQL_CLEAR_PERSONAL_BESTS = "DELETE FROM personal_bests"
+SQL_GET_PERSONAL_BESTS = """
+    SELECT swimmer_key, course, distance, stroke, gender, age_min, age_max, best_time
+    FROM personal_bests
+"""
+# A swimmer who moved up an age group has a best in each; grouping by swimmer
+# keeps the faster one, and SQLite takes the bare columns from that same row
+SQL_GET_SEASON_BEST_TIMES = """
+    SELECT pb.swimmer_name, MIN(pb.best_time), pb.gender, pb.age_min, pb.age_max, meets.name, pb.swum_on
+    FROM personal_bests AS pb
+    JOIN meets ON meets.id = pb.meet_id
+    WHERE pb.course = ?1 AND pb.distance = ?2 AND pb.stroke = ?3
+      AND (?4 IS NULL OR pb.gender = ?4) AND (?5 IS NULL OR (pb.age_min = ?5 AND pb.age_max = ?6))
+    GROUP BY pb.swimmer_key
+    ORDER BY 2
+    LIMIT ?7
+"""
+# Not MIN(best_time): SQLite would answer that by walking idx_personal_bests_event
+# in time order until it met the swimmer, instead of seeking the primary key
+SQL_GET_SEED_TIMES = """
+    SELECT best_time FROM personal_bests
+    WHERE swimmer_key = ? AND course = ? AND distance = ? AND stroke = ?
+"""
+SQL_GET_SEED_TIME_BEFORE = """
+    SELECT MIN(total_time) FROM swims
+    WHERE swimmer_key = ? AND course = ? AND distance = ? AND stroke = ? AND swum_on < ?
+"""
+SQL_GET_SWIMMER_HISTORY = """
+    SELECT swims.swum_on, meets.name, swims.course, swims.distance, swims.stroke, swims.total_time
+    FROM swims
+    JOIN meets ON meets.id = swims.meet_id
+    WHERE swims.swimmer_key = ?
+    ORDER BY swims.course, swims.distance, swims.stroke, swims.swum_on
+"""
+SQL_GET_ARCHIVED_MEETS = "SELECT id, file_name, name, meet_date, course, swims FROM meets ORDER BY meet_date, id"
+
+
+def season_index_path(archive_dir: str) -> str:
+    return os.path.join(archive_dir, SEASON_INDEX)
+
+def open_season_index(archive_dir: str, read_only: bool = False) -> sqlite3.Connection:
+    """A connection to the season index, creating it (read-write only) if it's missing."""
+    path = season_index_path(archive_dir)
+    if read_only:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No season archive at {archive_dir} (close a meet into it first)")
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(path))}?mode=ro", uri=True,
+                               isolation_level=None)
+    else:
+        os.makedirs(os.path.join(archive_dir, MEETS_DIR), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] < SEASON_SCHEMA_VERSION:
+            conn.execute("BEGIN IMMEDIATE")
+            for statement in SEASON_SCHEMA:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SEASON_SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+    conn.create_function("swimmer_key", 1, swimmer_key, deterministic=True)
+    return conn
+
+def _meet_file_name(meet_date: str, name: str) -> str:
+    slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "meet"
+    return f"{meet_date}-{slug}.db"
+
+def _iso_date(text) -> str | None:
+    try:
+        return datetime.date.fromisoformat(str(text)).isoformat()
+    except ValueError:
+        return None
+
+def _parse_meet_file_name(file_name: str) -> tuple:
+    """(meet_date, name) from a <date>-<name>.db file name; None for whatever it doesn't have."""
+    match = re.fullmatch(r"(\d{4}-\d{2}-\d{2})-(.+)\.db", file_name)
+    if match is None or _iso_date(match[1]) is None:
+        return None, None
+    return match[1], match[2]
+
+def _archived_meet_settings(meet_path: str) -> dict:
+    """
+    The settings of an archived meet file from any schema version. They are
+    read from a migrated copy, so the archived file stays as it was closed.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        copy_path = os.path.join(temp_dir, "meet.db")
+        source = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(meet_path))}?mode=ro", uri=True)
+        target = sqlite3.connect(copy_path)
+        try:
+            if source.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'lanes'").fetchone() is None:
+                raise sqlite3.DatabaseError("no lanes table")
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        store = MeetStore(copy_path)
+        try:
+            return store.get_settings()
+        finally:
+            store.close()
+
+def _index_meet(conn: sqlite3.Connection, meet_path: str, file_name: str, name: str, meet_date: str,
+                course: str) -> int:
+    conn.execute("ATTACH DATABASE ? AS meet", (os.path.abspath(meet_path),))
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            meet_id = conn.execute(SQL_ADD_MEET, (file_name, name, meet_date, course, time.time())).lastrowid
+            normalized = conn.execute("SELECT 1 FROM meet.sqlite_master WHERE name = 'swimmers'").fetchone()
+            conn.execute(SQL_ADD_MEET_SWIMS if normalized else SQL_ADD_LEGACY_MEET_SWIMS, (meet_id, course, meet_date))
+            conn.execute(SQL_ADD_MEET_PERSONAL_BESTS, (meet_id,))
+            conn.execute(SQL_SET_MEET_SWIMS, (meet_id, meet_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.execute("DETACH DATABASE meet")
+    return meet_id
+
+def close_meet(db_path: str, archive_dir: str = DEFAULT_ARCHIVE_DIR, name: str | None = None,
+               meet_date: str | None = None) -> dict:
+    """
+    Archives the meet at db_path into the season and adds it to the season
+    index. name, meet_date and the course come from the meet settings unless
+    given (the date defaults to today). Returns the archived meet's id, file
+    and number of timed swims.
+
+    The copy is an online backup, so the meet can stay open. Raises
+    FileExistsError if a meet with the same date and name is already archived.
+    """
+    store = get_store(db_path)
+    settings = store.get_settings()
+    name = name or settings["meet_name"] or os.path.splitext(os.path.basename(db_path))[0]
+    meet_date = datetime.date.fromisoformat(meet_date or settings["meet_date"]
+                                            or datetime.date.today().isoformat()).isoformat()
+    file_name = _meet_file_name(meet_date, name)
+    archived_path = os.path.join(archive_dir, MEETS_DIR, file_name)
+
+    conn = open_season_index(archive_dir)
+    try:
+        if conn.execute(SQL_GET_ARCHIVED_MEET, (file_name,)).fetchone():
+            raise FileExistsError(f"{name} on {meet_date} is already archived as {archived_path}")
+        # A copy left by a close that stopped before indexing is simply replaced
+        temp_path = archived_path + f".tmp-{os.getpid()}"
+        store.checkpoint()
+        source = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(db_path))}?mode=ro", uri=True)
+        target = sqlite3.connect(temp_path)
+        try:
+            source.backup(target)
+            # An archived meet is a single self-contained file, not a WAL database
+            target.execute("PRAGMA journal_mode=DELETE")
+        except BaseException:
+            target.close()
+            os.remove(temp_path)
+            raise
+        finally:
+            target.close()
+            source.close()
+        os.replace(temp_path, archived_path)
+        meet_id = _index_meet(conn, archived_path, file_name, name, meet_date, settings["course"])
+        swims = conn.execute("SELECT swims FROM meets WHERE id = ?", (meet_id,)).fetchone()[0]
+    finally:
+        conn.close()
+    print(f"[SEASON] Archived {name} ({meet_date}, {swims} swims) as {archived_path}")
+    return {"meet_id": meet_id, "path": archived_path, "swims": swims}
+
+def rebuild_season_index(archive_dir: str = DEFAULT_ARCHIVE_DIR) -> int:
+    """Recreates the season index from the archived meet files; returns the number of meets."""
+    path = season_index_path(archive_dir)
+    meets = []
+    if os.path.exists(path):
+        conn = open_season_index(archive_dir, read_only=True)
+        meets = [row[1:5] for row in conn.execute(SQL_GET_ARCHIVED_MEETS)]
+        conn.close()
+    known = {meet[0] for meet in meets}
+    for file_name in sorted(os.listdir(os.path.join(archive_dir, MEETS_DIR))):
+        if file_name.endswith(".db") and file_name not in known:
+            # A meet copied in by hand: its settings say what it was, then its
+            # file name, then the day the file was last written
+            meet_path = os.path.join(archive_dir, MEETS_DIR, file_name)
+            try:
+                settings = _archived_meet_settings(meet_path)
+            except (sqlite3.Error, RuntimeError) as e:
+                print(f"[SEASON] Warning: skipping {file_name}, which can't be read as a meet: {e}")
+                continue
+            file_date, file_meet_name = _parse_meet_file_name(file_name)
+            meet_date = (file_date or _iso_date(settings["meet_date"])
+                         or datetime.date.fromtimestamp(os.path.getmtime(meet_path)).isoformat())
+            name = settings["meet_name"] or file_meet_name or file_name[:-3]
+            meets.append((file_name, name, meet_date, settings["course"]))
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    conn = open_season_index(archive_dir)
+    try:
+        for file_name, name, meet_date, course in sorted(meets, key=lambda meet: meet[2]):
+            _index_meet(conn, os.path.join(archive_dir, MEETS_DIR, file_name), file_name, name, meet_date, course)
+    finally:
+        conn.close()
+    return len(meets)
+
+def check_season_index(archive_dir: str = DEFAULT_ARCHIVE_DIR) -> list:
+    """Personal bests that differ from a fresh pass over every archived swim (empty when consistent)."""
+    conn = open_season_index(archive_dir)
+    try:
+        actual = set(conn.execute(SQL_GET_PERSONAL_BESTS).fetchall())
+        conn.execute("BEGIN")
+        conn.execute(SQL_CLEAR_PERSONAL_BESTS)
+        conn.execute(SQL_ADD_ALL_PERSONAL_BESTS)
+        expected = set(conn.execute(SQL_GET_PERSONAL_BESTS).fetchall())
+        conn.execute("ROLLBACK")
+    finally:
+        conn.close()
+    return sorted(actual ^ expected)
+
+# ----- season queries (read the index only) -----
+
+def archived_meets(archive_dir: str = DEFAULT_ARCHIVE_DIR) -> list:
+    """(meet_id, file_name, name, meet_date, course, swims) for every archived meet, oldest first."""
+    conn = open_season_index(archive_dir, read_only=True)
+    try:
+        return conn.execute(SQL_GET_ARCHIVED_MEETS).fetchall()
+    finally:
+        conn.close()
+
+def season_best_times(archive_dir: str, distance: int, stroke: str, gender: str | None = None,
+                      age_group: tuple | None = None, course: str = "SCM", limit: int = 25) -> list:
+    """
+    The fastest swimmers of the season in one event type, one (personal best)
+    time each: (swimmer_name, best_time, gender, age_min, age_max, meet name,
+    date) fastest first. age_group is (age_min, age_max); without it a swimmer
+    who swam in two age groups is listed once, with the faster time.
+    """
+    age_min, age_max = age_group or (None, None)
+    conn = open_season_index(archive_dir, read_only=True)
+    try:
+        return conn.execute(SQL_GET_SEASON_BEST_TIMES, (course.upper(), distance, stroke.strip().lower(),
+                                                        gender, age_min, age_max, limit)).fetchall()
+    finally:
+        conn.close()
+
+def season_seed_times(archive_dir: str, entries, course: str = "SCM", before: str | None = None) -> list:
+    """
+    The entries (entry_import dicts) with seed_time filled in from each
+    swimmer's best time in the event's distance and stroke, in any age group,
+    or "NT" if they have none; entries that already have a seed_time keep it
+    (no time, "NT" or "NS", as seeding.NO_TIME, counts as none).
+    With before (an ISO date) only swims before that day count.
+
+    The result goes straight to seeding.seed_entries.
+    """
+    conn = open_season_index(archive_dir, read_only=True)
+    seeded = []
+    try:
+        for entry in entries:
+            entry = dict(entry)
+            if entry.get("seed_time") is None or str(entry["seed_time"]).strip().upper() in NO_TIME:
+                params = (swimmer_key(entry["swimmer_name"]), course.upper(), int(entry["distance"]),
+                          str(entry["stroke"]).strip().lower())
+                if before is None:
+                    best = min((row[0] for row in conn.execute(SQL_GET_SEED_TIMES, params)), default=None)
+                else:
+                    best = conn.execute(SQL_GET_SEED_TIME_BEFORE, params + (before,)).fetchone()[0]
+                entry["seed_time"] = "NT" if best is None else best
+            seeded.append(entry)
+    finally:
+        conn.close()
+    return seeded
+
+def swimmer_season_history(archive_dir: str, swimmer_name: str) -> list:
+    """(date, meet name, course, distance, stroke, total_time) for every archived swim of the swimmer."""
+    conn = open_season_index(archive_dir, read_only=True)
+    try:
+        return conn.execute(SQL_GET_SWIMMER_HISTORY, (swimmer_key(swimmer_name),)).fetchall()
+    finally:
+        conn.close()
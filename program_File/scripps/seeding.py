@@ -0,0 +1,152 @@
+import functools
+from typing import Iterable
+
+from entry_import import MAX_LANES, EntryImportError, bulk_import_entries
+
+# Assigns heats and lanes from seed times, so an entry list only needs each
+# swimmer's event and entry time:
+#
+#     seeded = seed_entries(entries, pool_size=8, method="timed_finals")
+#     import_seeded_entries("swim_meet.db", entries, method="circle")
+#
+# Entries are bulk_import_entries dicts with a seed_time instead of heat_num
+# and lane_num; seed_time is seconds, "1:05.32", or "NT" / empty for no time.
+#
+#   - Lanes: the fastest seed in a heat swims in the centre lane, then
+#     alternately either side of it (4 5 3 6 2 7 1 8 in an 8-lane pool).
+#   - timed_finals: the fastest swimmers are in the last heat, and any partial
+#     heat is swum first. That first heat gets at least MIN_FIRST_HEAT swimmers
+#     when the second heat can spare them, so nobody swims alone.
+#   - circle: the fastest circle_heats heats are filled in turn (1st seed to
+#     the last heat, 2nd to the one before, ...), the rest as timed finals.
+#
+# Swimmers without a seed time are seeded after the slowest time; ties keep
+# the order of the entry list.
+SEEDING_METHODS = ("timed_finals", "circle")
+MIN_FIRST_HEAT = 3
+DEFAULT_CIRCLE_HEATS = 3
+NO_TIME = ("", "NT", "NS")
+
+
+def parse_seed_time(value) -> float | None:
+    """Seconds from a seed time: 65.32, "65.32" or "1:05.32"; None for no time."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        text = str(value).strip().upper()
+        if text in NO_TIME:
+            return None
+        minutes, _, rest = text.rpartition(":")
+        seconds = float(rest) + 60 * int(minutes or 0)
+    if not seconds > 0:
+        raise ValueError(f"seed time must be positive, got {value!r}")
+    return seconds
+
+def lane_order(pool_size: int) -> list:
+    """Lane numbers from the fastest seed's to the slowest's: the centre, then alternately either side."""
+    centre = (pool_size + 1) // 2
+    return [centre + (i + 1) // 2 if i % 2 else centre - (i + 1) // 2 for i in range(pool_size)]
+
+def heat_sizes(swimmers: int, pool_size: int) -> list:
+    """Swimmers in each heat, first heat first; the partial heat, if any, comes first."""
+    heats = -(-swimmers // pool_size)
+    sizes = [pool_size] * heats
+    if heats:
+        sizes[0] = swimmers - pool_size * (heats - 1)
+    if heats > 1 and sizes[0] < MIN_FIRST_HEAT:
+        moved = min(MIN_FIRST_HEAT - sizes[0], sizes[1] - MIN_FIRST_HEAT)
+        if moved > 0:
+            sizes[0] += moved
+            sizes[1] -= moved
+    return sizes
+
+@functools.lru_cache(maxsize=None)
+def seeding_plan(swimmers: int, pool_size: int, method: str = "timed_finals",
+                 circle_heats: int = DEFAULT_CIRCLE_HEATS) -> tuple:
+    """
+    (heat_num, lane_num) for every seed, fastest first. It depends only on
+    the number of swimmers, so events of the same size share one plan.
+    """
+    sizes = heat_sizes(swimmers, pool_size)
+    lanes = lane_order(pool_size)
+    heats = len(sizes)
+    plan = []
+    filled = [0] * heats
+
+    def place(heat: int):
+        plan.append((heat + 1, lanes[filled[heat]]))
+        filled[heat] += 1
+
+    fastest_first = list(range(heats - 1, -1, -1))
+    if method == "circle":
+        circle = fastest_first[:circle_heats]
+        fastest_first = fastest_first[circle_heats:]
+        for _ in range(sum(sizes[heat] for heat in circle)):
+            # Next heat round the circle that still has a lane free
+            open_heats = [heat for heat in circle if filled[heat] < sizes[heat]]
+            place(min(open_heats, key=lambda heat: (filled[heat], -heat)))
+    for heat in fastest_first:
+        for _ in range(sizes[heat]):
+            place(heat)
+    return tuple(plan)
+
+def _event_key(entry: dict):
+    # Same grouping as bulk_import_entries: the event column, else the description
+    event_key = entry.get("event")
+    if event_key in (None, ""):
+        event_key = tuple(str(entry.get(field, "")).strip()
+                          for field in ("gender", "age_min", "age_max", "distance", "stroke"))
+    return event_key
+
+def seed_entries(entries: Iterable[dict], pool_size: int = MAX_LANES, method: str = "timed_finals",
+                 circle_heats: int = DEFAULT_CIRCLE_HEATS) -> list:
+    """
+    Returns the entries with heat_num and lane_num filled in, ordered by
+    event, heat and lane, ready for bulk_import_entries.
+
+    Everything is seeded with one sort of the whole entry list by (event,
+    seed time), then each event's run of entries is laid out by its
+    seeding_plan. A bad seed time raises EntryImportError.
+    """
+    if not 1 <= pool_size <= MAX_LANES:
+        raise ValueError(f"pool_size must be between 1 and {MAX_LANES} (the lanes table allows lanes 1-{MAX_LANES}), "
+                         f"got {pool_size}")
+    if method not in SEEDING_METHODS:
+        raise ValueError(f"method must be one of {', '.join(SEEDING_METHODS)}, got {method!r}")
+
+    entries = list(entries)
+    event_numbers = {}
+    keys = []
+    for entry_number, entry in enumerate(entries, start=1):
+        try:
+            seed_time = parse_seed_time(entry.get("seed_time"))
+        except ValueError:
+            raise EntryImportError(entry_number, f"seed_time must be seconds or m:ss.ss, "
+                                                 f"got {entry.get('seed_time')!r}") from None
+        event_number = event_numbers.setdefault(_event_key(entry), len(event_numbers))
+        keys.append((event_number, seed_time is None, seed_time or 0.0, entry_number - 1))
+    keys.sort()
+
+    seeded = []
+    start = 0
+    while start < len(keys):
+        event_number = keys[start][0]
+        end = start
+        while end < len(keys) and keys[end][0] == event_number:
+            end += 1
+        plan = seeding_plan(end - start, pool_size, method, circle_heats)
+        event_entries = [
+            dict(entries[key[3]], heat_num=heat_num, lane_num=lane_num)
+            for key, (heat_num, lane_num) in zip(keys[start:end], plan)
+        ]
+        event_entries.sort(key=lambda entry: (entry["heat_num"], entry["lane_num"]))
+        seeded.extend(event_entries)
+        start = end
+    return seeded
+
+def import_seeded_entries(db_path: str, entries: Iterable[dict], pool_size: int = MAX_LANES,
+                          method: str = "timed_finals", circle_heats: int = DEFAULT_CIRCLE_HEATS) -> dict:
+    """Seeds entries (see seed_entries) and writes them in one bulk_import_entries transaction; returns its ids."""
+    return bulk_import_entries(db_path, seed_entries(entries, pool_size, method, circle_heats))
@@ -0,0 +1,159 @@
+import itertools
+import random
+
+from entry_import import bulk_import_entries
+from meet_store import get_store
+
+# Reproducible meets for benchmarks and load tests: the same size and seed
+# always give the same events, heats, lanes, names and times.
+#
+#     build_synthetic_meet("bench.db", "championship", seed=1)
+#
+# Swimmers have an age, a gender, an ability and a team; each enters a few
+# events of their age group, events are seeded slowest heat first from entry
+# times, and the three timers read the swim time plus a little human reaction
+# noise.
+MEET_SIZES = {
+    #                  events  swimmers  max events per swimmer  teams
+    "small":        {"num_events": 24, "num_swimmers": 150, "max_entries": 3, "num_teams": 2},
+    "league":       {"num_events": 96, "num_swimmers": 800, "max_entries": 4, "num_teams": 2},
+    "championship": {"num_events": 384, "num_swimmers": 3000, "max_entries": 5, "num_teams": 12},
+}
+
+FIRST_NAMES = [
+    "Liam", "Olivia", "Noah", "Emma", "Elijah", "Ava", "James", "Sophia", "Benjamin", "Isabella", "Lucas", "Mia",
+    "Mason", "Amelia", "Ethan", "Harper", "Logan", "Evelyn", "Oliver", "Abigail", "Aiden", "Emily", "Jackson",
+    "Ella", "Sebastian", "Elizabeth", "Mateo", "Camila", "Jack", "Luna", "Owen", "Sofia", "Theodore", "Avery",
+    "Samuel", "Scarlett", "Henry", "Eleanor", "Leo", "Madison", "Wyatt", "Layla", "Daniel", "Penelope", "Caleb",
+    "Aria", "Ryan", "Chloe", "Nathan", "Grace", "Isaac", "Nora", "Dylan", "Riley", "Zoë", "Joaquín", "Chloé",
+    "Siobhan", "Kenji", "Priya",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Wilson", "Martinez", "Lee",
+    "Clark", "Rodriguez", "Lewis", "Walker", "Hall", "Allen", "Young", "King", "Wright", "Scott", "Torres",
+    "Nguyen", "Hill", "Flores", "Green", "Adams", "Nelson", "Baker", "Campbell", "Mitchell", "Carter", "Roberts",
+    "Phillips", "Evans", "Turner", "Parker", "Collins", "Edwards", "Stewart", "Morris", "Murphy", "Cook",
+    "Rogers", "Morgan", "Peterson", "Cooper", "Reed", "Bailey", "Bell", "Kelly", "Howard", "Ward", "Cox",
+    "O'Brien", "Müller", "Pérez", "Kowalski", "Tanaka", "Thompson-White",
+]
+TEAM_NAMES = [
+    "Sharks", "Dolphins", "Marlins", "Barracudas", "Stingrays", "Orcas", "Otters", "Seals", "Manta Rays",
+    "Piranhas", "Tarpons", "Gators",
+]
+AGE_GROUPS = [(7, 8), (9, 10), (11, 12), (13, 14), (15, 16), (17, 18)]
+# (distance, stroke, seconds per 50m for an average 13-14 year old)
+RACES = [
+    (50, "freestyle", 33.0), (100, "freestyle", 36.0), (200, "freestyle", 39.0), (400, "freestyle", 41.5),
+    (50, "backstroke", 38.0), (100, "backstroke", 41.0), (200, "backstroke", 44.0),
+    (50, "breaststroke", 43.0), (100, "breaststroke", 46.0), (200, "breaststroke", 49.0),
+    (50, "butterfly", 36.5), (100, "butterfly", 40.5), (200, "butterfly", 45.0),
+    (100, "medley", 41.0), (200, "medley", 43.5), (400, "medley", 46.5),
+]
+LANES = 8
+TIMER_NOISE = 0.08           # standard deviation of a hand timer, seconds
+MISSED_TIMER_CHANCE = 0.04   # a timer that didn't press their watch
+NO_SHOW_CHANCE = 0.03        # entered but never swam, so the lane stays untimed
+
+
+def event_program(num_events: int) -> list:
+    """
+    (gender, age_min, age_max, distance, stroke) for each event, in meet order.
+
+    Every race is swum by each age group, girls then boys; beyond the 192
+    distinct events the program repeats as later sessions (e.g. finals).
+    """
+    events = [
+        (gender, age_min, age_max, distance, stroke)
+        for distance, stroke, _ in RACES
+        for age_min, age_max in AGE_GROUPS
+        for gender in ("Girls", "Boys")
+    ]
+    return list(itertools.islice(itertools.cycle(events), num_events))
+
+def _swimmers(rng: random.Random, num_swimmers: int) -> list:
+    # Unique names while the name lists last, then repeats like a real meet has
+    names = [f"{first} {last}" for first in FIRST_NAMES for last in LAST_NAMES]
+    names = rng.sample(names, min(num_swimmers, len(names)))
+    names += [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}" for _ in range(num_swimmers - len(names))]
+    return [
+        {"name": name, "gender": rng.choice(("Girls", "Boys")), "age": rng.randint(7, 18),
+         # Ability: multiplies the average pace, below 1 is faster
+         "ability": rng.lognormvariate(0, 0.07)}
+        for name in names
+    ]
+
+def _swim_time(rng: random.Random, swimmer: dict, distance: int, pace: float) -> float:
+    # Younger swimmers are slower, roughly 4% per year either side of 13-14
+    age_factor = 1 + 0.04 * (13.5 - swimmer["age"])
+    return round(distance / 50 * pace * age_factor * swimmer["ability"] * rng.gauss(1, 0.015), 2)
+
+def plan_synthetic_meet(size: str = "league", seed: int = 0, **overrides) -> tuple:
+    """
+    Returns (entries, times) for a synthetic meet without touching a database.
+
+    entries are bulk_import_entries dicts. times maps (event, heat_num) to
+    {lane_num: (timer1, timer2, timer3)} for every lane that swam; a missed
+    timer is None. overrides replace any MEET_SIZES setting.
+    """
+    settings = dict(MEET_SIZES[size], **overrides)
+    rng = random.Random(seed)
+    swimmers = _swimmers(rng, settings["num_swimmers"])
+    for number, swimmer in enumerate(swimmers):
+        swimmer["team"] = TEAM_NAMES[number % settings["num_teams"]]
+    program = event_program(settings["num_events"])
+    paces = {(distance, stroke): pace for distance, stroke, pace in RACES}
+
+    # Each swimmer picks up to max_entries events open to their gender and age
+    open_events = {}
+    for event_num, (gender, age_min, age_max, _, _) in enumerate(program, start=1):
+        for age in range(age_min, age_max + 1):
+            open_events.setdefault((gender, age), []).append(event_num)
+    entrants = {event_num: [] for event_num in range(1, len(program) + 1)}
+    for swimmer in swimmers:
+        choices = open_events.get((swimmer["gender"], swimmer["age"]), [])
+        for event_num in rng.sample(choices, min(len(choices), rng.randint(1, settings["max_entries"]))):
+            entrants[event_num].append(swimmer)
+
+    entries = []
+    times = {}
+    for event_num, (gender, age_min, age_max, distance, stroke) in enumerate(program, start=1):
+        pace = paces[(distance, stroke)]
+        # Seed by entry time, slowest heat first, fastest swimmers in the final heat
+        seeded = sorted(entrants[event_num], key=lambda s: _swim_time(rng, s, distance, pace), reverse=True)
+        for heat_num, start in enumerate(range(0, len(seeded), LANES), start=1):
+            for lane_num, swimmer in enumerate(seeded[start:start + LANES], start=1):
+                entries.append({
+                    "event": event_num, "gender": gender, "age_min": age_min, "age_max": age_max,
+                    "distance": distance, "stroke": stroke, "heat_num": heat_num, "lane_num": lane_num,
+                    "swimmer_name": swimmer["name"], "team": swimmer["team"],
+                })
+                if rng.random() < NO_SHOW_CHANCE:
+                    continue
+                swum = _swim_time(rng, swimmer, distance, pace)
+                timers = tuple(
+                    None if rng.random() < MISSED_TIMER_CHANCE else round(swum + rng.gauss(0, TIMER_NOISE), 2)
+                    for _ in range(3)
+                )
+                if any(t is not None for t in timers):
+                    times.setdefault((event_num, heat_num), {})[lane_num] = timers
+    return entries, times
+
+def build_synthetic_meet(db_path: str, size: str = "league", seed: int = 0, timed: bool = True, **overrides) -> dict:
+    """
+    Imports a synthetic meet (see plan_synthetic_meet) into db_path and, with
+    timed=True, enters every heat's times the way the time desk does.
+    Returns {"events", "heats", "lanes", "timed_heats"} counts.
+    """
+    entries, times = plan_synthetic_meet(size, seed, **overrides)
+    store = get_store(db_path)
+    store.initialize_schema()
+    ids = bulk_import_entries(db_path, entries)
+    if timed:
+        with store.transaction():
+            for key, lane_times in times.items():
+                store.update_heat_times(ids["heats"][key], lane_times)
+    summary = {"events": len(ids["events"]), "heats": len(ids["heats"]), "lanes": len(ids["lanes"]),
+               "timed_heats": len(times) if timed else 0}
+    print(f"Synthetic {size} meet (seed {seed}): {summary['events']} events, {summary['heats']} heats, "
+          f"{summary['lanes']} swimmers entered.")
+    return summary
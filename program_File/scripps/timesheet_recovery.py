@@ -0,0 +1,204 @@
+import os
+import shutil
+import sqlite3
+import urllib.parse
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image
+from pyzbar.pyzbar import decode
+
+from entry_import import SQL_INSERT_EVENT_WITH_ID, SQL_INSERT_HEAT_WITH_ID, SQL_INSERT_LANE_WITH_ID
+from meet_store import SQL_INTERN_SWIMMER, MeetStore
+from qr_payload import NAME_TEXT_LENGTH, decode_lane_payload, swimmer_name_hash
+
+
+TIMESHEET_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# The QR code sits in the top-left corner of every sheet: pasted at (15, 15)
+# and 125px square on a 1000x400 sheet. Scans come back at other resolutions,
+# so the crop is kept as a fraction of the image size, with a little quiet zone.
+QR_REGION = (0.0, 0.0, 0.15, 0.37)
+MIN_DECODE_SIZE = 600
+
+# Placeholder description for an event whose details only lived in the lost
+# database. Its gender is unknown, so it is left NULL (schema v11).
+UNKNOWN_EVENT = (None, 0, 0, 0, "unknown (recovered)")
+
+
+def find_timesheet_images(timesheet_dir: str) -> list:
+    """Every sheet image under timesheet_dir, including the nested {event}/{heat} folders."""
+    paths = []
+    for root, _, files in os.walk(timesheet_dir):
+        for filename in files:
+            if filename.lower().endswith(TIMESHEET_EXTENSIONS):
+                paths.append(os.path.join(root, filename))
+    return sorted(paths)
+
+def decode_timesheet_qr(image_path: str) -> list:
+    """Decodes the QR payloads on one sheet, trying the QR corner before the full image."""
+    with Image.open(image_path) as img:
+        img = img.convert("L")
+        width, height = img.size
+        left, top, right, bottom = QR_REGION
+        corner = img.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+        decoded = decode(corner)
+        if not decoded and min(corner.size) < MIN_DECODE_SIZE:
+            # Rendered sheets and low-DPI scans leave only a couple of pixels per module
+            scale = -(-MIN_DECODE_SIZE // min(corner.size))
+            decoded = decode(corner.resize((corner.width * scale, corner.height * scale), Image.BILINEAR))
+        if not decoded:
+            decoded = decode(img)
+
+    payloads = []
+    for item in decoded:
+        try:
+            payloads.append(decode_lane_payload(item.data))
+        except (UnicodeDecodeError, ValueError):
+            continue
+    return payloads
+
+def _decode_task(image_path: str):
+    # Top-level so it can be pickled into a process pool worker
+    try:
+        return image_path, decode_timesheet_qr(image_path), None
+    except Exception as e:
+        return image_path, [], str(e)
+
+def _salvage_rows(damaged_db_path: str, sql: str) -> list:
+    """Reads whatever rows of one query are still readable from the damaged database."""
+    if not damaged_db_path or not os.path.exists(damaged_db_path):
+        return []
+    try:
+        # Quoted, so a path with "?", "#" or "%" in it still names the file
+        conn = sqlite3.connect(f"file:{urllib.parse.quote(os.path.abspath(damaged_db_path))}?mode=ro", uri=True)
+        try:
+            return conn.execute(sql).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        print(f"Could not salvage from {damaged_db_path}: {e}")
+        return []
+
+def rebuild_database_from_timesheets(timesheet_dir: str, new_db_path: str, damaged_db_path: str | None = None,
+                                     workers: int | None = None) -> dict:
+    """
+    Rebuilds a new SQLite database from available sources:
+    - Salvageable event descriptions and names in the damaged database
+    - QR codes in the timesheet images under `timesheet_dir`
+
+    Original event, heat and lane ids are kept so printed sheets stay valid.
+    Placeholder events and names that couldn't be recovered exactly are listed
+    in the returned summary.
+    """
+    if os.path.exists(new_db_path):
+        raise FileExistsError(f"Refusing to rebuild over an existing database: {new_db_path}")
+
+    print("Starting database rebuild process...")
+
+    # Backup the damaged database if it exists
+    if damaged_db_path and os.path.exists(damaged_db_path):
+        backup_path = damaged_db_path + ".bak"
+        shutil.copy(damaged_db_path, backup_path)
+        print(f"Backed up damaged database to: {backup_path}")
+    else:
+        print("No damaged database found. Rebuilding from scratch.")
+    salvaged_events = {row[0]: tuple(row[1:]) for row in _salvage_rows(
+        damaged_db_path, "SELECT id, gender, age_min, age_max, distance, stroke FROM events")}
+    # Meets from before schema v10 keep the name on the lane
+    if "swimmer_id" in {row[1] for row in _salvage_rows(damaged_db_path, "PRAGMA table_info(lanes)")}:
+        salvaged_names = dict(_salvage_rows(
+            damaged_db_path, "SELECT lanes.id, swimmers.name FROM lanes JOIN swimmers ON lanes.swimmer_id = swimmers.id"))
+    else:
+        salvaged_names = dict(_salvage_rows(damaged_db_path, "SELECT id, swimmer_name FROM lanes"))
+
+    # Step 1: Decode every sheet
+    image_paths = find_timesheet_images(timesheet_dir)
+    print(f"Scanning {len(image_paths)} timesheets under: {timesheet_dir}")
+    if workers == 1:
+        results = map(_decode_task, image_paths)
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_decode_task, image_paths, chunksize=16)
+
+    # Step 2: Dedupe by lane_id; when a lane shows up on several sheets the newest file wins
+    lanes_by_id = {}
+    newest = {}
+    unreadable = []
+    try:
+        for image_path, payloads, error in results:
+            if error:
+                print(f"Error reading {image_path}: {error}")
+                unreadable.append(image_path)
+                continue
+            modified = os.path.getmtime(image_path)
+            for payload in payloads:
+                lane_id = payload["lane_id"]
+                lane = (payload["event_id"], payload["heat_id"], payload["heat_num"],
+                        payload["lane_num"], payload["swimmer_name"], payload["name_hash"], payload["name_text"])
+                if lane_id not in lanes_by_id or modified >= newest[lane_id]:
+                    lanes_by_id[lane_id] = lane
+                    newest[lane_id] = modified
+    finally:
+        if workers != 1:
+            pool.shutdown()
+
+    print(f"Total recovered swimmers: {len(lanes_by_id)}")
+
+    # Step 3: Bulk insert into the new database in one transaction
+    event_rows = {}
+    heat_rows = {}
+    lane_rows = []
+    unknown_events = set()
+    approximate_names = []
+    unnamed_lanes = []
+    for lane_id, (event_id, heat_id, heat_num, lane_num, swimmer_name, name_hash, name_text) in sorted(lanes_by_id.items()):
+        if swimmer_name is None:
+            swimmer_name = salvaged_names.get(lane_id)
+            if swimmer_name is None or (name_hash and swimmer_name_hash(swimmer_name) != name_hash):
+                if name_text:
+                    # Cut names can collide, so each lane gets its own swimmer
+                    swimmer_name = f"{name_text} (lane {lane_id})"
+                    approximate_names.append(lane_id)
+                else:
+                    swimmer_name = f"Unknown swimmer (lane {lane_id})"
+                    unnamed_lanes.append(lane_id)
+        if event_id not in event_rows:
+            description = salvaged_events.get(event_id)
+            if description is None:
+                description = UNKNOWN_EVENT
+                unknown_events.add(event_id)
+            event_rows[event_id] = (event_id, *description)
+        heat_rows.setdefault(heat_id, (heat_id, event_id, heat_num))
+        lane_rows.append((lane_id, heat_id, lane_num, swimmer_name))
+
+    store = MeetStore(new_db_path)
+    try:
+        store.initialize_schema()
+        with store.transaction() as conn:
+            conn.executemany(SQL_INSERT_EVENT_WITH_ID, sorted(event_rows.values()))
+            conn.executemany(SQL_INSERT_HEAT_WITH_ID, sorted(heat_rows.values()))
+            conn.executemany(SQL_INTERN_SWIMMER, [(name, name) for _, _, _, name in lane_rows])
+            conn.executemany(SQL_INSERT_LANE_WITH_ID, lane_rows)
+    finally:
+        store.close()
+
+    if unknown_events:
+        print(f"Warning: no description survived for events {sorted(unknown_events)}; "
+              f"they were restored as '{UNKNOWN_EVENT[4]}' and need editing.")
+    if approximate_names:
+        print(f"Warning: {len(approximate_names)} lanes have no matching name in the damaged database; "
+              f"they were restored with the sheet's upper-case name, cut to {NAME_TEXT_LENGTH} characters "
+              "and tagged with the lane id, and need checking.")
+    if unnamed_lanes:
+        print(f"Warning: {len(unnamed_lanes)} lanes came from compact QR codes with no name on the sheet and "
+              "none matching in the damaged database; their swimmer names need re-entering.")
+    print(f"Database rebuild complete. New database written to: {new_db_path}")
+    return {
+        "events": len(event_rows),
+        "heats": len(heat_rows),
+        "lanes": len(lane_rows),
+        "unknown_events": sorted(unknown_events),
+        "approximate_names": approximate_names,
+        "unnamed_lanes": unnamed_lanes,
+        "unreadable": unreadable,
+    }
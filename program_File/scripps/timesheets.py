@@ -0,0 +1,342 @@
+import functools
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import qrcode
+import qrcode.util
+from qrcode.constants import ERROR_CORRECT_H
+from PIL import ImageDraw, ImageFont, Image
+
+import meet_metrics
+from meet_store import QR_FORMATS, get_store
+from qr_payload import encode_lane_payload, encode_legacy_lane_payload
+
+
+DEFAULT_OUTPUT_ROOT = os.path.join("Active_meet", "Time_sheets")
+
+QR_SIZE = 125
+SHEET_WIDTH = 1000
+SHEET_HEIGHT = 400
+MARGIN_LEFT = 30
+MARGIN_TOP = 20
+LINE_SPACING = 50
+
+# Print pages for the PDF output: US Letter at 150 dpi, four sheets stacked per page
+PAGE_DPI = 150
+PAGE_WIDTH = 1275
+PAGE_HEIGHT = 1650
+SHEETS_PER_PAGE = 4
+
+# Bump when the sheet drawing changes so every heat gets redrawn on the next run
+TIMESHEET_LAYOUT_VERSION = 3
+MANIFEST_NAME = "manifest.json"
+
+DEFAULT_QR_FORMAT = "legacy"
+
+
+def _qr_modules_image(qr: qrcode.QRCode) -> Image.Image:
+    # The same pixels as qr.make_image(fill_color="black", back_color="white"),
+    # which draws every module as its own rectangle
+    matrix = qr.get_matrix()
+    size = len(matrix)
+    modules = Image.new("1", (size, size), 255)
+    modules.putdata([0 if dark else 255 for row in matrix for dark in row])
+    return modules.resize((size * qr.box_size, size * qr.box_size), Image.NEAREST).convert("RGBA")
+def generate_qr_image(data: str) -> Image.Image:
+    qr = qrcode.QRCode(
+        version=5,
+        error_correction=ERROR_CORRECT_H,
+        box_size=2,
+        border=4,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return _qr_modules_image(qr)
+def generate_compact_qr_image(payload: str, max_size: int = QR_SIZE) -> Image.Image:
+    """
+    QR for a compact payload: alphanumeric mode at the smallest version that
+    fits, drawn with whole-pixel modules so the code is never resampled.
+    """
+    qr = qrcode.QRCode(version=None, error_correction=ERROR_CORRECT_H, box_size=1, border=4)
+    qr.add_data(qrcode.util.QRData(payload, mode=qrcode.util.MODE_ALPHA_NUM))
+    qr.make(fit=True)
+    box_size = max(1, max_size // (qr.modules_count + 2 * qr.border))
+    qr.box_size = box_size
+    return _qr_modules_image(qr)
+@functools.lru_cache(maxsize=None)
+def load_timesheet_font(size: int = 30):
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    font_path = os.path.join(base_dir, 'app_resources', 'arial.ttf')
+
+    try:
+        return ImageFont.truetype(font_path, size)
+    except IOError:
+        print("Warning: 'arial.ttf' font not found, using default font.")
+        return ImageFont.load_default()
+@functools.lru_cache(maxsize=None)
+def timesheet_template() -> Image.Image:
+    """The blank sheet with the four timer lines, drawn once per process and copied for every lane."""
+    font = load_timesheet_font()
+    background = Image.new("RGBA", (SHEET_WIDTH, SHEET_HEIGHT), (255, 255, 255, 255))
+    draw = ImageDraw.Draw(background)
+
+    line_y = MARGIN_TOP + LINE_SPACING * 2 - 10
+    times_start_y = line_y + 30
+    draw.text((MARGIN_LEFT, times_start_y), "Timer 1: ____________________", fill=(0, 0, 0), font=font)
+    draw.text((MARGIN_LEFT, times_start_y + LINE_SPACING), "Timer 2: ____________________", fill=(0, 0, 0), font=font)
+    draw.text((MARGIN_LEFT, times_start_y + 2 * LINE_SPACING), "Timer 3: ____________________", fill=(0, 0, 0), font=font)
+    draw.text((MARGIN_LEFT, times_start_y + 3 * LINE_SPACING), "Total:   ____________________", fill=(0, 0, 0), font=font)
+    return background
+
+def render_lane_sheet(event_id: int, heat_id: int, heat_num: int, lane_num: int,
+                      lane_id: int | None, swimmer_name: str, qr_format: str = DEFAULT_QR_FORMAT) -> Image.Image:
+    background = timesheet_template().copy()
+    draw = ImageDraw.Draw(background)
+    font = load_timesheet_font()
+
+    if lane_id and qr_format == "legacy":
+        qr_code_data = encode_legacy_lane_payload(event_id, heat_id, heat_num, lane_id, lane_num, swimmer_name)
+        qr_img = generate_qr_image(qr_code_data).resize((QR_SIZE, QR_SIZE))
+        background.paste(qr_img, (15, 15), qr_img)
+    elif lane_id:
+        qr_code_data = encode_lane_payload(event_id, heat_id, heat_num, lane_id, lane_num, swimmer_name)
+        qr_img = generate_compact_qr_image(qr_code_data)
+        # Centre the code in the same 125px box the legacy QR fills
+        offset = 15 + (QR_SIZE - qr_img.width) // 2
+        background.paste(qr_img, (offset, offset), qr_img)
+
+    margin_left_2 = MARGIN_LEFT + QR_SIZE
+    draw.text((margin_left_2, MARGIN_TOP), f"Swimmer: {swimmer_name}", fill=(0, 0, 0), font=font)
+    draw.text((margin_left_2, MARGIN_TOP + LINE_SPACING), f"Event: {event_id} | Heat: {heat_num} | Lane: {lane_num}", fill=(0, 0, 0), font=font)
+    return background
+
+def get_event_layout(db_path: str, event_id: int) -> list:
+    """
+    Reads an event's heats and lanes in one query.
+
+    Returns [(heat_id, heat_num, {lane_num: (lane_id, swimmer_name)}), ...] in heat order.
+    """
+    heats = {}
+    for heat_id, heat_num, lane_num, lane_id, swimmer_name in get_store(db_path).get_event_lane_layout(event_id):
+        lanes = heats.setdefault((heat_id, heat_num), {})
+        if lane_num is not None:
+            lanes[lane_num] = (lane_id, swimmer_name)
+    return [(heat_id, heat_num, lanes) for (heat_id, heat_num), lanes in heats.items()]
+
+def render_heat_timesheets(event_id: int, heat_id: int, heat_num: int, lanes: dict,
+                           output_root: str = DEFAULT_OUTPUT_ROOT, qr_format: str = DEFAULT_QR_FORMAT,
+                           sheet_seconds: list | None = None) -> int:
+    """
+    Renders the 8 lane sheets of one heat and returns how many were written.
+
+    sheet_seconds, if given, gets the time each sheet took to draw and save.
+    """
+    output_dir = os.path.join(output_root, str(event_id), str(heat_num))
+    os.makedirs(output_dir, exist_ok=True)
+
+    for lane_num in range(1, 9):
+        start = time.perf_counter()
+        lane_id, swimmer_name = lanes.get(lane_num, (None, "Empty Lane"))
+        sheet = render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, swimmer_name, qr_format)
+        output_path = os.path.join(output_dir, f"lane_{lane_num}_timesheet.png")
+        # The sheet is black on white, so grayscale keeps every pixel and encodes in a third of the time
+        sheet.convert("L").save(output_path)
+        if sheet_seconds is not None:
+            sheet_seconds.append(time.perf_counter() - start)
+    return 8
+def _observe_sheets(sheet_seconds: list):
+    for seconds in sheet_seconds:
+        meet_metrics.observe("swim_meet_timesheet_render_seconds", seconds)
+def render_event_timesheets(db_path: str, event_id: int, output_root: str = DEFAULT_OUTPUT_ROOT,
+                            qr_format: str = DEFAULT_QR_FORMAT) -> int:
+    sheets = 0
+    sheet_seconds = [] if meet_metrics.enabled else None
+    for heat_id, heat_num, lanes in get_event_layout(db_path, event_id):
+        sheets += render_heat_timesheets(event_id, heat_id, heat_num, lanes, output_root, qr_format, sheet_seconds)
+    _observe_sheets(sheet_seconds or [])
+    return sheets
+
+def _render_heat_task(task):
+    # Sheet times travel back with the result; a worker's own metrics are never collected
+    event_id, heat_id, heat_num, lanes, output_root, qr_format, timed = task
+    sheet_seconds = [] if timed else None
+    count = render_heat_timesheets(event_id, heat_id, heat_num, lanes, output_root, qr_format, sheet_seconds)
+    return event_id, heat_num, count, sheet_seconds or []
+
+def heat_content_hash(event_id: int, heat_id: int, heat_num: int, lanes: dict,
+                      qr_format: str = DEFAULT_QR_FORMAT) -> str:
+    """Hash of everything that ends up on a heat's sheets: the QR payload fields and the drawn text."""
+    content = [TIMESHEET_LAYOUT_VERSION, qr_format, event_id, heat_id, heat_num,
+               sorted((lane_num, lane_id, swimmer_name) for lane_num, (lane_id, swimmer_name) in lanes.items())]
+    return hashlib.sha256(json.dumps(content).encode("utf-8")).hexdigest()
+def heat_sheet_files(event_id: int, heat_num: int) -> list:
+    return [os.path.join(str(event_id), str(heat_num), f"lane_{lane_num}_timesheet.png") for lane_num in range(1, 9)]
+
+def load_render_manifest(output_root: str) -> dict:
+    manifest_path = os.path.join(output_root, MANIFEST_NAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    # Anything we don't recognise just means a full re-render
+    heats = manifest.get("heats") if isinstance(manifest, dict) else None
+    return heats if isinstance(heats, dict) else {}
+def save_render_manifest(output_root: str, heats: dict):
+    os.makedirs(output_root, exist_ok=True)
+    manifest_path = os.path.join(output_root, MANIFEST_NAME)
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "heats": heats}, f, indent=1, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+def _remove_stale_sheets(output_root: str, stale_files: set) -> int:
+    removed = 0
+    for relative_path in sorted(stale_files):
+        path = os.path.join(output_root, relative_path)
+        try:
+            os.remove(path)
+            removed += 1
+        except FileNotFoundError:
+            continue
+        # Drop heat/event folders that are now empty
+        directory = os.path.dirname(path)
+        while os.path.abspath(directory) != os.path.abspath(output_root):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                break
+            directory = os.path.dirname(directory)
+    return removed
+
+def render_all_timesheets(db_path: str, workers: int = 1, output_root: str = DEFAULT_OUTPUT_ROOT,
+                          incremental: bool = True, qr_format: str | None = None) -> dict:
+    """
+    Renders the meet's sheets and returns {"rendered", "skipped", "removed"} sheet counts.
+
+    incremental=True only redraws heats whose manifest hash changed and deletes
+    sheets of heats that are gone. qr_format=None uses the meet's setting.
+    workers > 1 (None for one per CPU) renders one heat per process pool task.
+    """
+    store = get_store(db_path)
+    qr_format = qr_format or store.get_setting("qr_format")
+    if qr_format not in QR_FORMATS:
+        raise ValueError(f"qr_format must be one of {QR_FORMATS}, got {qr_format!r}")
+    # Event ids can have gaps (a rebuild keeps the original ids), so never count from 1
+    event_ids = [event[0] for event in store.get_all_events()]
+    old_manifest = load_render_manifest(output_root) if incremental else {}
+    new_manifest = {}
+    stale_files = {path for entry in old_manifest.values() for path in entry.get("files", [])}
+    report = {"rendered": 0, "skipped": 0, "removed": 0}
+
+    # Work out which heats need drawing, event by event
+    tasks_by_event = {}
+    for event_id in event_ids:
+        tasks = []
+        for heat_id, heat_num, lanes in get_event_layout(db_path, event_id):
+            key = f"{event_id}/{heat_num}"
+            files = heat_sheet_files(event_id, heat_num)
+            content_hash = heat_content_hash(event_id, heat_id, heat_num, lanes, qr_format)
+            new_manifest[key] = {"hash": content_hash, "files": files}
+            stale_files.difference_update(files)
+
+            previous = old_manifest.get(key, {})
+            if previous.get("hash") == content_hash and all(
+                    os.path.exists(os.path.join(output_root, path)) for path in files):
+                report["skipped"] += len(files)
+                continue
+            tasks.append((event_id, heat_id, heat_num, lanes, output_root, qr_format, meet_metrics.enabled))
+        tasks_by_event[event_id] = tasks
+
+    report["removed"] = _remove_stale_sheets(output_root, stale_files)
+
+    if workers == 1:
+        for i, event_id in enumerate(event_ids, start=1):
+            for task in tasks_by_event[event_id]:
+                _, _, count, sheet_seconds = _render_heat_task(task)
+                report["rendered"] += count
+                _observe_sheets(sheet_seconds)
+            percent = (i / (len(event_ids)))  # Calculate percentage of completion
+            percent = round(percent * 100, 2)
+            print(f"Rendering timesheets for event {event_id} ({i} of {len(event_ids)}):")
+            print(f"{percent} %")
+    else:
+        tasks = [task for event_tasks in tasks_by_event.values() for task in event_tasks]
+        if tasks:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_render_heat_task, task) for task in tasks]
+                for done, future in enumerate(as_completed(futures), start=1):
+                    event_id, heat_num, count, sheet_seconds = future.result()
+                    report["rendered"] += count
+                    _observe_sheets(sheet_seconds)
+                    percent = round(done / len(tasks) * 100, 2)
+                    print(f"Rendered timesheets for event {event_id} heat {heat_num} ({done} of {len(tasks)} heats):")
+                    print(f"{percent} %")
+
+    save_render_manifest(output_root, new_manifest)
+    print(f"Timesheets: {report['rendered']} rendered, {report['skipped']} unchanged and skipped, "
+          f"{report['removed']} stale sheets removed")
+    return report
+
+def render_heat_pages(event_id: int, heat_id: int, heat_num: int, lanes: dict, skip_empty: bool = False,
+                      sheets_per_page: int = SHEETS_PER_PAGE, qr_format: str = DEFAULT_QR_FORMAT) -> list:
+    """Tiles a heat's lane sheets onto grayscale print pages; a new heat always starts a new page."""
+    lane_nums = [n for n in range(1, 9) if not skip_empty or n in lanes]
+    gap_x = (PAGE_WIDTH - SHEET_WIDTH) // 2
+    gap_y = (PAGE_HEIGHT - sheets_per_page * SHEET_HEIGHT) // (sheets_per_page + 1)
+    if gap_y < 0:
+        raise ValueError(f"{sheets_per_page} sheets don't fit on a {PAGE_WIDTH}x{PAGE_HEIGHT} page")
+
+    pages = []
+    for first in range(0, len(lane_nums), sheets_per_page):
+        page = Image.new("L", (PAGE_WIDTH, PAGE_HEIGHT), 255)
+        for slot, lane_num in enumerate(lane_nums[first:first + sheets_per_page]):
+            lane_id, swimmer_name = lanes.get(lane_num, (None, "Empty Lane"))
+            sheet = render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, swimmer_name, qr_format)
+            page.paste(sheet.convert("L"), (gap_x, gap_y + slot * (SHEET_HEIGHT + gap_y)))
+        pages.append(page)
+    return pages
+def _save_pdf_pages(pages: list, pdf_path: str, append: bool):
+    pages[0].save(pdf_path, "PDF", resolution=PAGE_DPI, quality=95,
+                  save_all=True, append_images=pages[1:], append=append)
+
+def render_timesheet_pdfs(db_path: str, pdf_scope: str = "event", skip_empty: bool = False,
+                          output_root: str = DEFAULT_OUTPUT_ROOT, qr_format: str | None = None) -> list:
+    """
+    Writes the meet's timesheets as print-ready multi-page PDFs and returns their paths.
+
+    pdf_scope="event" writes event_{id}_timesheets.pdf per event; "meet" writes a
+    single meet_timesheets.pdf. skip_empty leaves out the "Empty Lane" sheets.
+    Each sheet is drawn by render_lane_sheet, so the QR codes match the PNGs.
+    """
+    if pdf_scope not in ("event", "meet"):
+        raise ValueError(f"pdf_scope must be 'event' or 'meet', got {pdf_scope!r}")
+    store = get_store(db_path)
+    qr_format = qr_format or store.get_setting("qr_format")
+    if qr_format not in QR_FORMATS:
+        raise ValueError(f"qr_format must be one of {QR_FORMATS}, got {qr_format!r}")
+    os.makedirs(output_root, exist_ok=True)
+
+    event_ids = [event[0] for event in store.get_all_events()]
+    meet_pdf = os.path.join(output_root, "meet_timesheets.pdf")
+    written = []
+    for i, event_id in enumerate(event_ids, start=1):
+        pages = []
+        for heat_id, heat_num, lanes in get_event_layout(db_path, event_id):
+            pages += render_heat_pages(event_id, heat_id, heat_num, lanes, skip_empty, qr_format=qr_format)
+        if pages:
+            if pdf_scope == "event":
+                pdf_path = os.path.join(output_root, f"event_{event_id}_timesheets.pdf")
+                _save_pdf_pages(pages, pdf_path, append=False)
+                written.append(pdf_path)
+            else:
+                # Append event by event so only one event's pages are held in memory
+                _save_pdf_pages(pages, meet_pdf, append=bool(written))
+                written = [meet_pdf]
+        percent = round(i / len(event_ids) * 100, 2)
+        print(f"Writing timesheet PDF pages for event {event_id} ({i} of {len(event_ids)}):")
+        print(f"{percent} %")
+    return written
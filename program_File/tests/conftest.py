@@ -0,0 +1,20 @@
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+from meet_store import MeetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    """An empty meet at the latest schema, closed after the test."""
+    store = MeetStore(str(tmp_path / "swim_meet.db"))
+    with contextlib.redirect_stdout(io.StringIO()):
+        store.initialize_schema()
+    yield store
+    store.close()
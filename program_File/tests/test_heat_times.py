@@ -0,0 +1,77 @@
+"""
+Batch heat entry: official times from one, two or three watches, missing and
+bad times, and the timer disagreements update_heat_times reports.
+"""
+import pytest
+
+from meet_store import DEFAULT_DISAGREEMENT_THRESHOLD, compute_total_time
+
+SQL_HEAT_TIMES = """
+    SELECT lane_num, timer1_time, timer2_time, timer3_time, total_time
+    FROM lanes WHERE heat_id = ? ORDER BY lane_num
+"""
+
+
+@pytest.fixture
+def heat(store):
+    event_id = store.create_event("Girls", 11, 12, 100, "breaststroke")
+    heat_id = store.add_heat(event_id, 1)
+    for lane_num in range(1, 6):
+        store.add_swimmer_to_lane(heat_id, lane_num, f"Swimmer {lane_num}")
+    return heat_id
+
+def heat_times(store, heat_id: int) -> list:
+    return store.connection().execute(SQL_HEAT_TIMES, (heat_id,)).fetchall()
+
+
+@pytest.mark.parametrize("timers, expected", [
+    ((60.0, 60.2, 60.4), 60.2),
+    ((60.0, None, 60.4), 60.2),
+    ((None, 61.5, None), 61.5),
+    ((None, None, None), None),
+])
+def test_total_is_the_average_of_the_watches_present(timers, expected):
+    assert compute_total_time(*timers) == expected
+
+@pytest.mark.parametrize("timers", [(0.0, 60.0, 60.0), (60.0, -1.0, None), (None, None, 0)])
+def test_non_positive_time_raises(timers):
+    with pytest.raises(ValueError):
+        compute_total_time(*timers)
+
+def test_update_heat_times_with_one_two_three_and_no_timers(store, heat):
+    result = store.update_heat_times(heat, {
+        1: (60.0, 60.2, 60.4),
+        2: (59.0, None, 59.2),
+        3: (None, None, 58.5),
+        4: (None, None, None),
+    })
+    assert heat_times(store, heat) == [
+        (1, 60.0, 60.2, 60.4, 60.2),
+        (2, 59.0, None, 59.2, 59.1),
+        (3, None, None, 58.5, 58.5),
+        (4, None, None, None, None),
+        (5, None, None, None, None),
+    ]
+    assert result["standings"] == [(1, 3, "Swimmer 3", 58.5), (2, 2, "Swimmer 2", 59.1), (3, 1, "Swimmer 1", 60.2)]
+    assert result["disagreements"] == [(1, 0.4)]
+
+def test_disagreement_threshold(store, heat):
+    just_over = round(DEFAULT_DISAGREEMENT_THRESHOLD + 0.01, 2)
+    result = store.update_heat_times(heat, {
+        1: (60.0, 60.0 + DEFAULT_DISAGREEMENT_THRESHOLD, None),
+        2: (60.0, 60.0, 60.0 + just_over),
+        3: (61.0, None, None),
+    })
+    # Exactly the threshold is accepted; a single watch can't disagree
+    assert result["disagreements"] == [(2, just_over)]
+    assert store.update_heat_times(heat, {1: (60.0, 60.5, None)}, disagreement_threshold=1.0)["disagreements"] == []
+
+def test_bad_time_leaves_the_heat_untouched(store, heat):
+    store.update_heat_times(heat, {1: (60.0, 60.0, 60.0)})
+    before = heat_times(store, heat)
+    with pytest.raises(ValueError):
+        store.update_heat_times(heat, {1: (50.0, 50.0, 50.0), 2: (59.0, 0.0, 59.0)})
+    with pytest.raises(ValueError):
+        store.update_heat_times(heat, {1: (50.0, 50.0, 50.0), 8: (59.0, 59.0, 59.0)})
+    assert heat_times(store, heat) == before
+    assert store.check_standings() == []
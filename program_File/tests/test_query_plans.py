@@ -0,0 +1,81 @@
+"""
+The EXPLAIN QUERY PLAN of every lookup in meet_store must use its index:
+each query has to show the expected SEARCH steps and no scan of a large table.
+
+Run:  python3 -m pytest program_File/tests/test_query_plans.py
+"""
+import pytest
+
+import meet_store
+from meet_store import MeetStore
+
+HEATS_BY_EVENT = "SEARCH heats USING COVERING INDEX idx_heats_event_heat (event_id=?)"
+LANES_BY_HEAT = "SEARCH lanes USING INDEX idx_lanes_heat_lane (heat_id=?)"
+STANDINGS_BY_EVENT = "SEARCH event_standings USING PRIMARY KEY (event_id=?)"
+
+# Only the events table (a few hundred rows at most) may ever be scanned
+FORBIDDEN = ["SCAN heats", "SCAN lanes", "SCAN swimmers", "SCAN event_standings", "SCAN meet_metadata USING PRIMARY KEY"]
+
+# (query constant, parameters, strings that must appear in the plan)
+EXPECTED_PLANS = [
+    ("SQL_GET_HEATS_FOR_EVENT", (1,), [HEATS_BY_EVENT]),
+    ("SQL_GET_SWIMMERS_IN_HEAT", (1,), [LANES_BY_HEAT]),
+    ("SQL_GET_FASTEST_SWIMMER_IN_EVENT", (1,), [STANDINGS_BY_EVENT]),
+    ("SQL_LIST_SWIMMERS_IN_EVENT", (1,), [HEATS_BY_EVENT, LANES_BY_HEAT]),
+    ("SQL_GET_EVENT_RESULTS", (1,), [STANDINGS_BY_EVENT]),
+    ("SQL_GET_EVENT_STANDINGS", (1,), [STANDINGS_BY_EVENT]),
+    ("SQL_LIVE_EVENT_STANDINGS", (1,), [HEATS_BY_EVENT, LANES_BY_HEAT]),
+    ("SQL_GET_CHANGES_SINCE", (50,), ["SEARCH change_log USING INDEX idx_change_log_seq (seq>?)"]),
+    ("SQL_SEARCH", ('"sw"*', 0, 26), ["SCAN search_index VIRTUAL TABLE INDEX",
+                                       "SEARCH lanes USING INTEGER PRIMARY KEY (rowid=?)",
+                                       "SEARCH event_standings USING INDEX idx_event_standings_lane (lane_id=?)"]),
+    ("SQL_LIST_ALL_SWIMMERS", (), ["SEARCH heats USING COVERING INDEX idx_heats_event_heat (event_id=?)",
+                                   LANES_BY_HEAT]),
+    ("SQL_GET_EVENT_LANE_LAYOUT", (1,), [HEATS_BY_EVENT, LANES_BY_HEAT]),
+    ("SQL_GET_LANE_ID_BY_HEAT_AND_LANE", (1, 1),
+     ["SEARCH lanes USING COVERING INDEX idx_lanes_heat_lane (heat_id=? AND lane_num=?)"]),
+    ("SQL_GET_EVENT_ID_FROM_HEAT", (1,), ["SEARCH heats USING INTEGER PRIMARY KEY (rowid=?)"]),
+    ("SQL_GET_SWIMMER_NAME_FROM_LANE", (1,), ["SEARCH lanes USING INTEGER PRIMARY KEY (rowid=?)"]),
+    ("SQL_GET_HEAT_NUMBER_FROM_ID", (1,), ["SEARCH heats USING INTEGER PRIMARY KEY (rowid=?)"]),
+    ("SQL_GET_NUMBER_OF_HEATS_FOR_EVENT", (1,), [HEATS_BY_EVENT]),
+    ("SQL_LIVE_EVENT_TEAM_POINTS", (1,), [STANDINGS_BY_EVENT, "SEARCH lanes USING INTEGER PRIMARY KEY (rowid=?)",
+                                          "SEARCH scoring_points USING INTEGER PRIMARY KEY"]),
+    ("SQL_ADD_EVENT_TEAM_POINTS", (1, 1), ["SEARCH team_event_points USING PRIMARY KEY (event_id=?)"]),
+    ("SQL_GET_TEAM_EVENT_POINTS", (1,), ["SEARCH team_event_points USING PRIMARY KEY (event_id=?)"]),
+    ("SQL_GET_SWIMMER_ID", ("ava smith",), ["SEARCH swimmers USING COVERING INDEX sqlite_autoindex_swimmers_1 (name_key=?)"]),
+    ("SQL_GET_SWIMMER_ENTRIES", (1,), ["SEARCH lanes USING INDEX idx_lanes_swimmer (swimmer_id=?)",
+                                       "SEARCH heats USING INTEGER PRIMARY KEY (rowid=?)",
+                                       "SEARCH event_standings USING INDEX idx_event_standings_lane (lane_id=?)"]),
+    ("SQL_GET_METADATA", ("meet_name",), ["SEARCH meet_metadata USING PRIMARY KEY (key=?)"]),
+    ("SQL_GET_METADATA_VERSION", (), ["SCAN meet_metadata USING INDEX idx_meet_metadata_version"]),
+    ("SQL_SET_METADATA", ("meet_name", '""', 0.0), ["SEARCH meet_metadata USING COVERING INDEX idx_meet_metadata_version"]),
+]
+
+
+def build_sample_meet(store: MeetStore):
+    with store.transaction():
+        for e in range(20):
+            event_id = store.create_event("Boys" if e % 2 else "Girls", 9, 10, 50, "freestyle")
+            for heat_num in range(1, 6):
+                heat_id = store.add_heat(event_id, heat_num)
+                for lane_num in range(1, 9):
+                    lane_id = store.add_swimmer_to_lane(heat_id, lane_num, f"Swimmer {lane_num}")
+                    store.update_lane_times(lane_id, 30.0, 30.1, 30.2)
+    store.connection().execute("ANALYZE")
+
+
+@pytest.fixture(scope="module")
+def plan_store(tmp_path_factory):
+    store = MeetStore(str(tmp_path_factory.mktemp("plans") / "plans.db"))
+    store.initialize_schema()
+    build_sample_meet(store)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("name, params, expected", EXPECTED_PLANS, ids=[plan[0] for plan in EXPECTED_PLANS])
+def test_query_plan(plan_store, name, params, expected):
+    sql = getattr(meet_store, name)
+    plan = [row[3] for row in plan_store.connection().execute("EXPLAIN QUERY PLAN " + sql, params)]
+    assert [step for step in expected if not any(p.startswith(step) for p in plan)] == [], plan
+    assert [step for step in FORBIDDEN if any(p.startswith(step) for p in plan)] == [], plan
@@ -0,0 +1,66 @@
+"""
+The scanned_sheets ledger: a sheet file that has been ingested once is skipped
+on every later pass, by the same service or after a restart, even under a new
+file name. Needs pyzbar and the zbar shared library.
+"""
+import contextlib
+import io
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("pyzbar.pyzbar", reason="decoding sheets needs pyzbar and the zbar shared library",
+                    exc_type=ImportError)
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore, get_store
+from scan_ingest import ScanIngestService
+from timesheets import render_lane_sheet
+
+SQL_LANES = """
+    SELECT heats.event_id, heats.id, heats.heat_num, lanes.lane_num, lanes.id, swimmers.name
+    FROM lanes JOIN heats ON lanes.heat_id = heats.id JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    ORDER BY lanes.id
+"""
+SQL_LEDGER = "SELECT file_hash, file_name, lane_id, status FROM scanned_sheets ORDER BY file_hash"
+
+
+@pytest.fixture
+def scans(tmp_path):
+    db_path = str(tmp_path / "swim_meet.db")
+    store = MeetStore(db_path)
+    store.initialize_schema()
+    store.close()
+    entries = [{"event": 1, "gender": "Boys", "age_min": 11, "age_max": 12, "distance": 50, "stroke": "freestyle",
+                "heat_num": 1, "lane_num": lane_num, "swimmer_name": f"Scanned Swimmer {lane_num}"}
+               for lane_num in range(1, 5)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_import_entries(db_path, entries)
+    drop_dir = str(tmp_path / "Scans")
+    os.makedirs(drop_dir)
+    for event_id, heat_id, heat_num, lane_num, lane_id, name in get_store(db_path).connection().execute(SQL_LANES):
+        sheet = render_lane_sheet(event_id, heat_id, heat_num, lane_num, lane_id, name)
+        sheet.save(os.path.join(drop_dir, f"scan_{lane_id:04}.png"))
+    yield db_path, drop_dir
+    get_store(db_path).close()
+
+def ledger(db_path: str) -> list:
+    return get_store(db_path).connection().execute(SQL_LEDGER).fetchall()
+
+
+def test_reingesting_a_file_is_a_no_op(scans):
+    db_path, drop_dir = scans
+    service = ScanIngestService(db_path, drop_dir)
+    assert service.process_once()["queued"] == 4
+    recorded = ledger(db_path)
+    assert sorted(status for *_, status in recorded) == ["queued"] * 4
+
+    assert service.process_once() == {"queued": 4, "duplicate": 0, "mismatch": 0, "unreadable": 0, "skipped": 4}
+    assert service.time_entry_queue.qsize() == 4
+    # A restarted service and a copy of a sheet under a new name are skipped too
+    shutil.copy(os.path.join(drop_dir, "scan_0001.png"), os.path.join(drop_dir, "copy_of_scan_0001.png"))
+    restarted = ScanIngestService(db_path, drop_dir)
+    assert restarted.process_once() == {"queued": 0, "duplicate": 0, "mismatch": 0, "unreadable": 0, "skipped": 5}
+    assert restarted.time_entry_queue.qsize() == 0
+    assert ledger(db_path) == recorded
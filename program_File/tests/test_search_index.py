@@ -0,0 +1,36 @@
+"""
+A meet that reached schema v6 under an SQLite without FTS5 has no search index;
+the next read-write open by an SQLite with FTS5 builds it.
+"""
+import contextlib
+import io
+
+from meet_store import MeetStore
+from schema_migrations import LATEST_VERSION, get_schema_version
+
+SEARCH_TRIGGERS = ("lanes_search_insert", "lanes_search_update", "swimmers_search_update", "lanes_search_delete",
+                   "heats_search_update", "events_search_update")
+
+
+def test_missing_search_index_is_built_on_open(store):
+    heat_id = store.add_heat(store.create_event("Girls", 9, 10, 50, "backstroke"), 1)
+    store.add_swimmer_to_lane(heat_id, 3, "Ada Lovelace")
+    # What a v6 upgrade without FTS5 leaves behind
+    conn = store.connection()
+    for trigger in SEARCH_TRIGGERS:
+        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+    conn.execute("DROP TABLE search_index")
+    store.close()
+
+    reopened = MeetStore(store.db_path)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            conn = reopened.connection()
+        assert get_schema_version(conn) == LATEST_VERSION
+        rows, _ = reopened.search("ada")
+        assert [row[1] for row in rows] == ["Ada Lovelace"]
+        # The triggers are back too, so later lanes are found
+        reopened.add_swimmer_to_lane(heat_id, 4, "Ada Byron")
+        assert [row[1] for row in reopened.search("ada")[0]] == ["Ada Lovelace", "Ada Byron"]
+    finally:
+        reopened.close()
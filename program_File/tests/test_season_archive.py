@@ -0,0 +1,49 @@
+"""
+Season best times list each swimmer once, even one who moved up an age group
+during the season, unless the query asks for a single age group.
+"""
+import contextlib
+import io
+
+import pytest
+
+from meet_store import MeetStore, close_all_stores
+from season_archive import close_meet, season_best_times
+
+# (meet date, age group, {swimmer: 50 freestyle time})
+MEETS = [
+    ("2026-03-01", (9, 10), {"Moved Up": 33.0, "Stayed Young": 34.0}),
+    ("2026-06-01", (11, 12), {"Moved Up": 32.5, "Always Older": 32.8}),
+]
+
+
+@pytest.fixture
+def archive_dir(tmp_path):
+    archive_dir = str(tmp_path / "season")
+    for number, (meet_date, (age_min, age_max), times) in enumerate(MEETS, start=1):
+        db_path = str(tmp_path / f"meet-{number}.db")
+        store = MeetStore(db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            store.initialize_schema()
+        heat_id = store.add_heat(store.create_event("Girls", age_min, age_max, 50, "freestyle"), 1)
+        for lane_num, (name, time) in enumerate(times.items(), start=1):
+            store.update_lane_times(store.add_swimmer_to_lane(heat_id, lane_num, name), time, time, time)
+        store.close()
+        with contextlib.redirect_stdout(io.StringIO()):
+            close_meet(db_path, archive_dir, f"Meet {number}", meet_date)
+    yield archive_dir
+    close_all_stores()
+
+
+def test_swimmer_in_two_age_groups_is_listed_once(archive_dir):
+    rows = season_best_times(archive_dir, 50, "freestyle")
+    assert [(row[0], row[1], row[3], row[4], row[5]) for row in rows] == [
+        ("Moved Up", 32.5, 11, 12, "Meet 2"),
+        ("Always Older", 32.8, 11, 12, "Meet 2"),
+        ("Stayed Young", 34.0, 9, 10, "Meet 1"),
+    ]
+
+def test_age_group_lists_that_groups_best(archive_dir):
+    rows = season_best_times(archive_dir, 50, "freestyle", age_group=(9, 10))
+    assert [(row[0], row[1]) for row in rows] == [("Moved Up", 33.0), ("Stayed Young", 34.0)]
+    assert season_best_times(archive_dir, 50, "freestyle", limit=1)[0][:2] == ("Moved Up", 32.5)
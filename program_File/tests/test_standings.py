@@ -0,0 +1,82 @@
+"""
+The materialized event_standings must always equal a fresh RANK() over lanes,
+checked after every kind of write that changes times or teams.
+"""
+import pytest
+
+from meet_store import SQL_GET_MATERIALIZED_STANDINGS, SQL_LIVE_STANDINGS
+
+
+def live_standings(store) -> list:
+    return store.connection().execute(SQL_LIVE_STANDINGS + "    ORDER BY 1, 2").fetchall()
+
+def materialized_standings(store) -> list:
+    return store.connection().execute(SQL_GET_MATERIALIZED_STANDINGS).fetchall()
+
+def assert_standings_match(store):
+    assert materialized_standings(store) == live_standings(store)
+
+@pytest.fixture
+def meet(store):
+    """Two events of two heats with four swimmers each: {event_id: {heat_num: (heat_id, [lane_id, ...])}}."""
+    layout = {}
+    for gender in ("Girls", "Boys"):
+        event_id = store.create_event(gender, 9, 10, 50, "freestyle")
+        for heat_num in (1, 2):
+            heat_id = store.add_heat(event_id, heat_num)
+            lanes = [store.add_swimmer_to_lane(heat_id, lane_num, f"{gender} {heat_num}-{lane_num}")
+                     for lane_num in range(1, 5)]
+            layout.setdefault(event_id, {})[heat_num] = (heat_id, lanes)
+    return layout
+
+
+def test_update_lane_times_keeps_standings(store, meet):
+    (event_id, heats), (other_event, _) = meet.items()
+    _, lanes = heats[1]
+    for lane_id, time in zip(lanes, (31.0, 30.0, 32.0)):
+        store.update_lane_times(lane_id, time, time, time)
+        assert_standings_match(store)
+    assert [row[2] for row in materialized_standings(store)] == [1, 2, 3]
+    assert store.connection().execute("SELECT COUNT(*) FROM event_standings WHERE event_id = ?",
+                                      (other_event,)).fetchone()[0] == 0
+
+def test_ties_share_a_place(store, meet):
+    event_id, heats = next(iter(meet.items()))
+    (_, first), (_, second) = heats[1], heats[2]
+    store.update_lane_times(first[0], 30.0, 30.0, 30.0)
+    store.update_lane_times(second[0], 30.0, 30.0, 30.0)
+    store.update_lane_times(first[1], 31.0, 31.0, 31.0)
+    assert_standings_match(store)
+    # Tied swimmers share 1st, the next swimmer is 3rd; heat then lane breaks the listing order
+    assert [(row[2], row[3]) for row in materialized_standings(store)] == [(1, first[0]), (1, second[0]), (3, first[1])]
+
+def test_clearing_a_time_removes_the_lane(store, meet):
+    event_id, heats = next(iter(meet.items()))
+    _, lanes = heats[1]
+    for lane_id in lanes:
+        store.update_lane_times(lane_id, 30.0 + lane_id, 30.0 + lane_id, None)
+    store.update_lane_times(lanes[0], None, None, None)
+    assert_standings_match(store)
+    assert lanes[0] not in [row[3] for row in materialized_standings(store)]
+    assert [row[2] for row in materialized_standings(store)] == [1, 2, 3]
+
+def test_update_heat_times_keeps_standings(store, meet):
+    event_id, heats = next(iter(meet.items()))
+    heat_id, _ = heats[2]
+    store.update_heat_times(heat_id, {1: (30.5, 30.5, 30.5), 2: (29.9, None, 30.1), 3: (30.5, 30.5, 30.5)})
+    assert_standings_match(store)
+    # Re-entering the heat with a lane cleared and a new tie
+    store.update_heat_times(heat_id, {1: (None, None, None), 2: (30.5, 30.5, 30.5), 4: (28.0, 28.0, 28.0)})
+    assert_standings_match(store)
+    assert [row[2] for row in materialized_standings(store)] == [1, 2, 2]
+
+def test_set_lane_teams_keeps_standings(store, meet):
+    event_id, heats = next(iter(meet.items()))
+    heat_id, lanes = heats[1]
+    store.update_heat_times(heat_id, {1: (30.0, 30.0, 30.0), 2: (30.0, 30.0, 30.0), 3: (31.0, 31.0, 31.0)})
+    red, blue = store.add_team("Red"), store.add_team("Blue")
+    store.set_lane_teams({lanes[0]: red, lanes[1]: blue, lanes[2]: red, lanes[3]: blue})
+    assert_standings_match(store)
+    store.set_lane_teams({lanes[0]: None})
+    assert_standings_match(store)
+    assert store.check_standings() == []
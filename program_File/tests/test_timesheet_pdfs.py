@@ -0,0 +1,94 @@
+"""
+Print-ready PDFs: one page per four sheets with every heat starting a new page,
+tiles that are the PNG sheets themselves, and PNGs left untouched by the PDF path.
+"""
+import contextlib
+import io
+import math
+import os
+
+import pytest
+from PIL import Image, PdfParser
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore
+from timesheets import (PAGE_HEIGHT, PAGE_WIDTH, SHEET_HEIGHT, SHEET_WIDTH, SHEETS_PER_PAGE, get_event_layout,
+                        render_all_timesheets, render_heat_pages, render_timesheet_pdfs)
+
+# Lanes taken in each heat of each event
+HEAT_LANES = {1: [(1, 2, 3, 4, 5, 6, 7, 8), (2, 4, 6)], 2: [(3, 4, 5, 6, 7)]}
+
+
+@pytest.fixture
+def meet(tmp_path):
+    db_path = str(tmp_path / "swim_meet.db")
+    store = MeetStore(db_path)
+    store.initialize_schema()
+    store.close()
+    entries = [{"event": event, "gender": "Girls", "age_min": 9, "age_max": 10, "distance": 50,
+                "stroke": "butterfly", "heat_num": heat_num, "lane_num": lane_num,
+                "swimmer_name": f"Swimmer {event}-{heat_num}-{lane_num}"}
+               for event, heats in HEAT_LANES.items()
+               for heat_num, lane_nums in enumerate(heats, start=1) for lane_num in lane_nums]
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_import_entries(db_path, entries)
+    return db_path
+
+def pdf_page_count(path: str) -> int:
+    pdf = PdfParser.PdfParser(path)
+    try:
+        return len(pdf.pages)
+    finally:
+        pdf.close()
+
+def expected_pages(heats: list, skip_empty: bool) -> int:
+    return sum(math.ceil((len(lanes) if skip_empty else 8) / SHEETS_PER_PAGE) for lanes in heats)
+
+def png_files(root: str) -> dict:
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(".png"):
+                with open(os.path.join(directory, name), "rb") as f:
+                    files[os.path.relpath(os.path.join(directory, name), root)] = f.read()
+    return files
+
+
+@pytest.mark.parametrize("skip_empty", [False, True])
+def test_page_count_per_event_and_meet(meet, tmp_path, skip_empty):
+    with contextlib.redirect_stdout(io.StringIO()):
+        event_pdfs = render_timesheet_pdfs(meet, "event", skip_empty, str(tmp_path / "event"))
+        meet_pdfs = render_timesheet_pdfs(meet, "meet", skip_empty, str(tmp_path / "meet"))
+    assert [os.path.basename(path) for path in event_pdfs] == ["event_1_timesheets.pdf", "event_2_timesheets.pdf"]
+    for path, heats in zip(event_pdfs, HEAT_LANES.values()):
+        assert pdf_page_count(path) == expected_pages(heats, skip_empty)
+    assert pdf_page_count(meet_pdfs[0]) == sum(expected_pages(heats, skip_empty) for heats in HEAT_LANES.values())
+
+def test_pages_tile_each_heats_png_sheets(meet, tmp_path):
+    sheets_dir = str(tmp_path / "Time_sheets")
+    with contextlib.redirect_stdout(io.StringIO()):
+        render_all_timesheets(meet, output_root=sheets_dir)
+    gap_x = (PAGE_WIDTH - SHEET_WIDTH) // 2
+    gap_y = (PAGE_HEIGHT - SHEETS_PER_PAGE * SHEET_HEIGHT) // (SHEETS_PER_PAGE + 1)
+    for heat_id, heat_num, lanes in get_event_layout(meet, 1):
+        pages = render_heat_pages(1, heat_id, heat_num, lanes, skip_empty=True)
+        assert len(pages) == math.ceil(len(lanes) / SHEETS_PER_PAGE)
+        tiles = [(page, slot) for page in pages for slot in range(SHEETS_PER_PAGE)]
+        for (page, slot), lane_num in zip(tiles, sorted(lanes)):
+            top = gap_y + slot * (SHEET_HEIGHT + gap_y)
+            tile = page.crop((gap_x, top, gap_x + SHEET_WIDTH, top + SHEET_HEIGHT))
+            with Image.open(os.path.join(sheets_dir, "1", str(heat_num), f"lane_{lane_num}_timesheet.png")) as png:
+                assert tile.tobytes() == png.convert("L").tobytes()
+        # The slots after a heat's last sheet stay blank
+        for page, slot in tiles[len(lanes):]:
+            top = gap_y + slot * (SHEET_HEIGHT + gap_y)
+            assert page.crop((gap_x, top, gap_x + SHEET_WIDTH, top + SHEET_HEIGHT)).getextrema() == (255, 255)
+
+def test_pngs_are_unchanged_by_the_pdf_path(meet, tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        render_all_timesheets(meet, output_root=str(tmp_path / "png_only"))
+        render_timesheet_pdfs(meet, "meet", output_root=str(tmp_path / "with_pdf"))
+        render_all_timesheets(meet, output_root=str(tmp_path / "with_pdf"))
+    png_only, with_pdf = png_files(str(tmp_path / "png_only")), png_files(str(tmp_path / "with_pdf"))
+    assert len(png_only) == 8 * sum(len(heats) for heats in HEAT_LANES.values())
+    assert png_only == with_pdf
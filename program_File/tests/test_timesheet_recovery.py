@@ -0,0 +1,116 @@
+"""
+Round trip for the QR recovery path: render a meet's timesheets, delete the
+database, rebuild it from the sheets and compare events, heats and lanes row
+by row with the originals. Needs pyzbar and the zbar shared library.
+"""
+import contextlib
+import io
+import os
+import random
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pyzbar.pyzbar", reason="decoding sheets needs pyzbar and the zbar shared library",
+                    exc_type=ImportError)
+
+from entry_import import bulk_import_entries
+from meet_store import MeetStore
+from qr_payload import sheet_name_text
+from timesheet_recovery import UNKNOWN_EVENT, rebuild_database_from_timesheets
+from timesheets import render_all_timesheets
+
+SQL_EVENTS = "SELECT id, gender, age_min, age_max, distance, stroke FROM events ORDER BY id"
+SQL_HEATS = "SELECT id, event_id, heat_num FROM heats ORDER BY id"
+SQL_LANES = """
+    SELECT lanes.id, lanes.heat_id, lanes.lane_num, swimmers.name
+    FROM lanes JOIN swimmers ON lanes.swimmer_id = swimmers.id
+    ORDER BY lanes.id
+"""
+
+
+def sample_entries(num_events: int = 3, seed: int = 11):
+    rng = random.Random(seed)
+    for event_num in range(1, num_events + 1):
+        for heat_num in range(1, rng.randint(1, 3) + 1):
+            for lane_num in sorted(rng.sample(range(1, 9), rng.randint(2, 8))):
+                yield {
+                    "event": event_num, "gender": "Boys" if event_num % 2 else "Girls", "age_min": 9, "age_max": 10,
+                    "distance": 25, "stroke": "backstroke", "heat_num": heat_num, "lane_num": lane_num,
+                    "swimmer_name": f"Swimmer {event_num}-{heat_num}-{lane_num}",
+                }
+
+def read_tables(db_path: str) -> tuple:
+    store = MeetStore(db_path)
+    try:
+        conn = store.connection()
+        return tuple(conn.execute(sql).fetchall() for sql in (SQL_EVENTS, SQL_HEATS, SQL_LANES))
+    finally:
+        store.close()
+
+def delete_database(db_path: str):
+    for path in (db_path, db_path + "-wal", db_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def assert_same_rows(rebuilt: list, original: list):
+    assert len(rebuilt) == len(original)
+    for rebuilt_row, original_row in zip(rebuilt, original):
+        assert rebuilt_row == original_row
+
+@pytest.fixture
+def meet(tmp_path):
+    db_path = str(tmp_path / "swim_meet.db")
+    store = MeetStore(db_path)
+    store.initialize_schema()
+    store.close()
+    with contextlib.redirect_stdout(io.StringIO()):
+        bulk_import_entries(db_path, sample_entries())
+    return db_path
+
+
+def test_rebuild_from_legacy_sheets_and_salvaged_events(meet, tmp_path):
+    sheets_dir = str(tmp_path / "Time_sheets")
+    with contextlib.redirect_stdout(io.StringIO()):
+        render_all_timesheets(meet, output_root=sheets_dir, qr_format="legacy")
+    events, heats, lanes = read_tables(meet)
+    # Only the events table survives in the damaged copy
+    damaged_path = str(tmp_path / "damaged.db")
+    with sqlite3.connect(damaged_path) as damaged:
+        damaged.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, gender, age_min, age_max, distance, stroke)")
+        damaged.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)", events)
+    delete_database(meet)
+
+    rebuilt_path = str(tmp_path / "rebuilt.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = rebuild_database_from_timesheets(sheets_dir, rebuilt_path, damaged_path, workers=1)
+
+    assert summary["unreadable"] == [] and summary["unknown_events"] == []
+    rebuilt_events, rebuilt_heats, rebuilt_lanes = read_tables(rebuilt_path)
+    assert_same_rows(rebuilt_events, events)
+    assert_same_rows(rebuilt_heats, heats)
+    assert_same_rows(rebuilt_lanes, lanes)
+
+def test_rebuild_from_compact_sheets_alone(meet, tmp_path):
+    sheets_dir = str(tmp_path / "Time_sheets")
+    with contextlib.redirect_stdout(io.StringIO()):
+        render_all_timesheets(meet, output_root=sheets_dir, qr_format="compact")
+    events, heats, lanes = read_tables(meet)
+    delete_database(meet)
+
+    rebuilt_path = str(tmp_path / "rebuilt.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = rebuild_database_from_timesheets(sheets_dir, rebuilt_path, workers=1)
+
+    rebuilt_events, rebuilt_heats, rebuilt_lanes = read_tables(rebuilt_path)
+    # No description survives: every event is a placeholder without a gender
+    assert_same_rows(rebuilt_events, [(event[0], *UNKNOWN_EVENT) for event in events])
+    assert_same_rows(rebuilt_heats, heats)
+    assert_same_rows([lane[:3] for lane in rebuilt_lanes], [lane[:3] for lane in lanes])
+    # Names are the sheet's truncated text tagged with the lane, each reported for checking
+    assert [lane[3] for lane in rebuilt_lanes] == [f"{sheet_name_text(lane[3])} (lane {lane[0]})" for lane in lanes]
+    assert summary["approximate_names"] == [lane[0] for lane in lanes]
+    # Swimmers whose cut names collide stay apart
+    assert len({sheet_name_text(lane[3]) for lane in lanes}) < len(lanes)
+    with sqlite3.connect(rebuilt_path) as conn:
+        assert conn.execute("SELECT COUNT(DISTINCT swimmer_id) FROM lanes").fetchone()[0] == len(lanes)
@@ -0,0 +1,48 @@
+"""
+MeetStore.transaction nests through savepoints: a failed inner block is undone
+on its own, journal records included, and the outer block still commits.
+"""
+import pytest
+
+from meet_journal import MeetJournal, read_records
+
+
+@pytest.fixture
+def journal(store, tmp_path):
+    journal = MeetJournal(str(tmp_path / "journal"), checkpoint_every=None)
+    store.attach_journal(journal)
+    yield journal
+    journal.close()
+
+def heat_nums(store) -> list:
+    return [row[0] for row in store.connection().execute("SELECT heat_num FROM heats ORDER BY heat_num")]
+
+
+def test_failed_inner_block_is_undone_alone(store, journal):
+    event_id = store.create_event("Boys", 13, 14, 200, "individual medley")
+    with store.transaction():
+        store.add_heat(event_id, 1)
+        with pytest.raises(ValueError):
+            with store.transaction():
+                store.add_heat(event_id, 2)
+                store.add_heat(event_id, 3)
+                raise ValueError("bad heat")
+        store.add_heat(event_id, 4)
+    assert heat_nums(store) == [1, 4]
+    journal.flush()
+    assert [(op, rows[0][2]) for _, _, op, rows in read_records(journal.journal_dir) if op == "heats"] == [
+        ("heats", 1), ("heats", 4)]
+
+def test_outer_failure_undoes_committed_inner_blocks(store, journal):
+    event_id = store.create_event("Boys", 13, 14, 200, "individual medley")
+    with pytest.raises(ValueError):
+        with store.transaction():
+            with store.transaction():
+                store.add_heat(event_id, 1)
+            raise ValueError("bad meet")
+    assert heat_nums(store) == []
+    with store.transaction():
+        store.add_heat(event_id, 2)
+    assert heat_nums(store) == [2]
+    journal.flush()
+    assert [rows[0][2] for _, _, op, rows in read_records(journal.journal_dir) if op == "heats"] == [2]
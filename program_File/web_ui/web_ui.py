@@ -1,10 +1,289 @@
-from flask import Flask, render_template
+import argparse
+import datetime
+import functools
+import gzip
+import json
+import logging
+import os
+import sys
+import threading
+
+from flask import Flask, Response, abort, g, render_template, request
+from werkzeug.serving import make_server
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripps"))
+
+import meet_metrics
+# The web UI only reads results, so it talks to the store and the change feed
+# directly instead of importing the whole meet API.
+from meet_store import get_store
+from results_feed import ResultsFeed
+
+DB_PATH = os.environ.get("SWIM_MEET_DB", "Active_meet/swim_meet.db")
+DEFAULT_HOST = os.environ.get("WEB_UI_HOST", "0.0.0.0")
+DEFAULT_PORT = int(os.environ.get("WEB_UI_PORT", 5000))
+STREAM_HEARTBEAT = 15.0
+SEARCH_PAGE_SIZE = 25
+SEARCH_MAX_PAGE_SIZE = 100
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+# Static URLs carry the file's mtime (see static_version), so browsers may keep them for a year
+STATIC_MAX_AGE = 365 * 24 * 3600
+GZIP_TYPES = {"text/html", "text/css", "text/plain", "text/javascript", "application/javascript",
+              "application/json", "image/svg+xml"}
+GZIP_MIN_SIZE = 512
 
 app = Flask(__name__)
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_feed() -> ResultsFeed:
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                # Web workers only read, so they never compete with the time desk for the write lock
+                feed = ResultsFeed(DB_PATH, read_only=True)
+                feed.start()
+                _feed = feed
+    return _feed
+
+def not_modified(etag: str, changed_at: float) -> bool:
+    """True when the client's If-None-Match / If-Modified-Since still match (If-None-Match wins)."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since is not None:
+        return int(changed_at) <= request.if_modified_since.timestamp()
+    return False
+def conditional_response(etag: str, changed_at: float, make_body, mimetype: str = "application/json") -> Response:
+    """
+    Answers with 304 when the validators match, otherwise with make_body().
+
+    make_body is only called for a 200, so an unchanged poll never reaches SQLite.
+    """
+    if not_modified(etag, changed_at):
+        response = Response(status=304)
+    else:
+        response = Response(make_body(), mimetype=mimetype)
+    response.set_etag(etag)
+    response.last_modified = datetime.datetime.fromtimestamp(int(changed_at), datetime.timezone.utc)
+    # Phones must revalidate on every poll rather than show a cached result
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@functools.lru_cache(maxsize=256)
+def gzipped_static(path: str, mtime_ns: int) -> bytes:
+    # Keyed by mtime so an edited file is compressed again
+    with open(path, "rb") as f:
+        return gzip.compress(f.read(), compresslevel=9, mtime=0)
+
+@app.url_defaults
+def static_version(endpoint: str, values: dict):
+    if endpoint == "static" and "filename" in values:
+        try:
+            values.setdefault("v", int(os.stat(os.path.join(app.static_folder, values["filename"])).st_mtime))
+        except OSError:
+            pass
+
+@app.after_request
+def compress(response: Response) -> Response:
+    """Gzips text responses for clients that accept it; static files are compressed once and cached."""
+    if (response.status_code != 200 or response.is_streamed and request.endpoint != "static"
+            or response.mimetype not in GZIP_TYPES or "Content-Encoding" in response.headers
+            or not request.accept_encodings["gzip"]):
+        return response
+
+    if request.endpoint == "static":
+        path = os.path.join(app.static_folder, request.view_args["filename"])
+        body = gzipped_static(path, os.stat(path).st_mtime_ns)
+        if "v" in request.args:
+            response.cache_control.immutable = True
+    else:
+        data = response.get_data()
+        if len(data) < GZIP_MIN_SIZE:
+            return response
+        body = gzip.compress(data, compresslevel=6, mtime=0)
+
+    response.direct_passthrough = False
+    response.set_data(body)
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers.pop("Accept-Ranges", None)
+    response.vary.add("Accept-Encoding")
+    # The compressed body is a different representation of the same version
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@app.before_request
+def start_request_metrics():
+    if meet_metrics.enabled:
+        g.metrics_token = meet_metrics.begin_call(request.endpoint or "unknown")
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    # Registered after compress, so it runs first; compression time is left out
+    token = g.pop("metrics_token", None)
+    if token is not None:
+        endpoint = request.endpoint or "unknown"
+        meet_metrics.end_call(token, "swim_meet_http_request_duration_seconds", endpoint=endpoint)
+        meet_metrics.inc("swim_meet_http_requests_total", endpoint=endpoint, status=str(response.status_code))
+    return response
+
+@app.template_filter("race_time")
+def race_time(seconds: float) -> str:
+    minutes, seconds = divmod(seconds, 60)
+    return f"{int(minutes)}:{seconds:05.2f}" if minutes else f"{seconds:.2f}"
+
+@app.template_filter("medal")
+def medal(place: int) -> str:
+    return MEDALS.get(place, "")
 
 @app.route('/')
 def home():
     return render_template('index.html', title='Swim Meet Management')
 
+@app.route('/auth')
+def auth():
+    return render_template('auth.html')
+
+@app.route('/results')
+def results():
+    feed = get_feed()
+    version, changed_at = feed.meet_version()
+    def page():
+        events = [feed.event_results(event_id) for event_id in sorted(feed.events)]
+        return render_template('results.html', events=events, meet_version=feed.seq, meet=feed.settings)
+    return conditional_response(f"meet-{version}", changed_at, page, mimetype="text/html")
+
+@app.route('/results/events.json')
+def results_index():
+    feed = get_feed()
+    version, changed_at = feed.meet_version()
+    return conditional_response(f"meet-{version}", changed_at, lambda: json.dumps(feed.meet_index()))
+
+@app.route('/results/events/<int:event_id>.json')
+def event_results(event_id: int):
+    feed = get_feed()
+    if event_id not in feed.events:
+        abort(404)
+    seq, changed_at = feed.event_version(event_id)
+    return conditional_response(f"event-{event_id}-{seq}", changed_at, lambda: feed.event_payload(event_id)[1])
+
+@app.route('/results/teams.json')
+def team_scores():
+    """Team scoreboard: every team's points so far, highest first."""
+    feed = get_feed()
+    version, changed_at = feed.meet_version()
+    return conditional_response(f"teams-{version}", changed_at, feed.team_scores_payload)
+
+@app.route('/results/meet.json')
+def meet_settings():
+    """Meet name, date, venue, course, pool size and dual meet teams, from the feed's copy of meet_metadata."""
+    feed = get_feed()
+    version, changed_at = feed.meet_version()
+    return conditional_response(f"settings-{version}", changed_at, feed.settings_payload)
+
+@app.route('/results/search.json')
+def search_results():
+    """
+    Swimmer / event search for the results filter bar, one page at a time.
+
+    ?q= is matched by word prefix; pass the returned "next" back as ?after=
+    for the following page.
+    """
+    limit = min(request.args.get("limit", SEARCH_PAGE_SIZE, type=int), SEARCH_MAX_PAGE_SIZE)
+    rows, next_after = get_store(DB_PATH, read_only=True).search(
+        request.args.get("q", ""), request.args.get("after", 0, type=int), max(limit, 1))
+    body = {
+        "results": [
+            {"lane_id": lane_id, "swimmer_name": swimmer_name, "event_id": event_id, "event_name": event_name,
+             "heat_num": heat_num, "lane_num": lane_num, "total_time": total_time, "place": place}
+            for lane_id, swimmer_name, event_id, event_name, heat_num, lane_num, total_time, place in rows
+        ],
+        "next": next_after,
+    }
+    response = Response(json.dumps(body), mimetype="application/json")
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+@app.route('/results/stream')
+def results_stream():
+    """
+    Server-sent events: one 'results' message with the event's full results
+    each time its times are committed. The message id is the change seq, so a
+    reconnecting browser resumes from Last-Event-ID without missing an event.
+    """
+    feed = get_feed()
+    last_seen = request.headers.get("Last-Event-ID", type=int)
+    if last_seen is None:
+        last_seen = request.args.get("since", feed.seq, type=int)
+    last_seen = min(last_seen, feed.seq)
+
+    def stream(seq: int):
+        yield "retry: 3000\n\n"
+        while True:
+            changes, current = feed.wait_for_changes(seq, STREAM_HEARTBEAT)
+            if not changes:
+                yield ": keep-alive\n\n"
+            for event_id, event_seq in changes:
+                payload = feed.event_payload(event_id)
+                if payload is not None:
+                    yield f"id: {event_seq}\nevent: results\ndata: {payload[1]}\n\n"
+            seq = max(seq, current)
+
+    return Response(stream(last_seen), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus text format, summed over the time desk and every web worker (see meet_metrics)."""
+    response = Response(meet_metrics.prometheus_text(), mimetype="text/plain")
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+@app.route('/metrics.json')
+def metrics_snapshot():
+    response = Response(json.dumps(meet_metrics.collect()), mimetype="application/json")
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, fd: int | None = None):
+    """
+    Runs one production worker: a threaded WSGI server with no debugger or reloader.
+
+    Each connection gets its own thread, so long-lived result streams don't
+    starve ordinary requests. With fd the worker serves an already bound socket
+    inherited from start_WEB_UI, which runs several of these side by side.
+    """
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    meet_metrics.enable_from_env()
+    server = make_server(host, port, app, threaded=True, fd=fd)
+    print(f"[WEB_UI] Worker {os.getpid()} serving {DB_PATH} on http://{host}:{server.port}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        get_store(DB_PATH, read_only=True).close()
+
 if __name__ == '__main__':
-    app.run(host='100.70.61.9', port=5000, debug=True)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Swim meet web UI")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--fd", type=int, help="serve a listening socket inherited from start_WEB_UI")
+    parser.add_argument("--dev", action="store_true", help="Flask development server with debugger and reloader")
+    args = parser.parse_args()
+
+    if args.fd is None:
+        # start_WEB_UI upgrades the schema before launching workers; on our own we do it here
+        get_store(DB_PATH).initialize_schema()
+        get_store(DB_PATH).close()
+    if args.dev:
+        meet_metrics.enable_from_env()
+        app.run(host=args.host, port=args.port, debug=True, threaded=True)
+    else:
+        serve(args.host, args.port, args.fd)